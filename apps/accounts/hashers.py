@@ -0,0 +1,89 @@
+"""
+Password hashing and login verification
+
+Passwords are hashed with Argon2 when argon2-cffi is installed (see
+PASSWORD_HASHERS), with parameters from the PASSWORD_ARGON2_* settings
+instead of Django's defaults, whose 100 MiB per hash is too much for our
+small containers. Existing PBKDF2 hashes, and Argon2 hashes made with other
+parameters, are rewritten on the next successful login: Django's
+check_password re-hashes whenever the stored hash is not in the preferred
+format.
+
+Hashing is CPU bound, so login views verify passwords through
+verify_credentials(), which lets at most PASSWORD_HASH_CONCURRENCY
+verifications run at once per process. The other gunicorn threads keep
+rendering pages during a login burst; a login that waits longer than
+PASSWORD_HASH_WAIT_TIMEOUT is turned away as busy. Verification time and
+outcome are recorded in the request metrics store.
+"""
+
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.contrib.auth import authenticate
+from django.contrib.auth.hashers import Argon2PasswordHasher
+
+from apps.core.metrics import get_metrics_store
+
+logger = logging.getLogger(__name__)
+
+
+class TunedArgon2PasswordHasher(Argon2PasswordHasher):
+    """Argon2id with the cost parameters from settings"""
+
+    @property
+    def time_cost(self):
+        return settings.PASSWORD_ARGON2_TIME_COST
+
+    @property
+    def memory_cost(self):
+        return settings.PASSWORD_ARGON2_MEMORY_COST
+
+    @property
+    def parallelism(self):
+        return settings.PASSWORD_ARGON2_PARALLELISM
+
+
+class LoginBusy(Exception):
+    """Too many password verifications are already running"""
+
+
+_slots = None
+_slots_lock = threading.Lock()
+
+
+def hash_slots():
+    global _slots
+    if _slots is None:
+        with _slots_lock:
+            if _slots is None:
+                _slots = threading.BoundedSemaphore(settings.PASSWORD_HASH_CONCURRENCY)
+    return _slots
+
+
+def record_login(outcome, duration):
+    try:
+        get_metrics_store().login_finished(outcome, duration)
+    except Exception as e:
+        logger.warning(f"Could not record login metrics: {e}")
+
+
+def verify_credentials(request, **credentials):
+    """
+    authenticate() with a bounded number of concurrent verifications
+
+    Returns the user or None; raises LoginBusy when no slot frees up in time.
+    """
+    slots = hash_slots()
+    if not slots.acquire(timeout=settings.PASSWORD_HASH_WAIT_TIMEOUT):
+        record_login('busy', 0.0)
+        raise LoginBusy()
+    start = time.perf_counter()
+    try:
+        user = authenticate(request, **credentials)
+    finally:
+        slots.release()
+    record_login('success' if user is not None else 'failure', time.perf_counter() - start)
+    return user
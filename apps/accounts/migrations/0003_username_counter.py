@@ -0,0 +1,25 @@
+# Generated by Django 5.0.6 on 2026-10-19 15:01
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0002_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UsernameCounter',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('base', models.CharField(max_length=150, unique=True)),
+                ('last_suffix', models.BigIntegerField(default=-1)),
+            ],
+            options={
+                'verbose_name': 'عداد أسماء المستخدمين',
+                'verbose_name_plural': 'عدادات أسماء المستخدمين',
+            },
+        ),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 5.0.6 on 2026-10-19 15:05
+
+from django.db import migrations, models
+
+from apps.core.utils import normalize_arabic_name, normalize_phone
+
+
+def fill_lookup_fields(apps, schema_editor):
+    """Normalize existing rows; a phone number already taken by an older citizen stays unset"""
+    Citizen = apps.get_model('accounts', 'Citizen')
+    seen = set()
+    batch = []
+    for citizen in Citizen.objects.only('id', 'phone_number', 'first_name').order_by('id').iterator(chunk_size=2000):
+        phone = normalize_phone(citizen.phone_number)
+        citizen.phone_normalized = phone if phone not in seen else None
+        seen.add(phone)
+        citizen.first_name_normalized = normalize_arabic_name(citizen.first_name)[:100]
+        batch.append(citizen)
+        if len(batch) >= 2000:
+            Citizen.objects.bulk_update(batch, ['phone_normalized', 'first_name_normalized'])
+            batch = []
+    Citizen.objects.bulk_update(batch, ['phone_normalized', 'first_name_normalized'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0003_username_counter'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='citizen',
+            name='first_name_normalized',
+            field=models.CharField(blank=True, editable=False, max_length=100),
+        ),
+        migrations.AddField(
+            model_name='citizen',
+            name='phone_normalized',
+            field=models.CharField(blank=True, editable=False, max_length=20, null=True, unique=True),
+        ),
+        migrations.RunPython(fill_lookup_fields, migrations.RunPython.noop),
+    ]
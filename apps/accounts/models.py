@@ -10,6 +10,9 @@ class Citizen(models.Model):
     last_name = models.CharField(max_length=100, verbose_name="الاسم الأخير")
     email = models.EmailField(unique=True, verbose_name="البريد الإلكتروني")
     phone_number = models.CharField(max_length=20, blank=True, verbose_name="رقم الهاتف")
+    # Lookup columns for quick login, kept in sync by save()/set_lookup_fields()
+    phone_normalized = models.CharField(max_length=20, unique=True, null=True, blank=True, editable=False)
+    first_name_normalized = models.CharField(max_length=100, blank=True, editable=False)
     governorate = models.ForeignKey("core.Governorate", on_delete=models.SET_NULL, null=True, blank=True, verbose_name="المحافظة")
     area_type = models.CharField(max_length=50, blank=True, verbose_name="نوع المنطقة")
     area_name = models.CharField(max_length=200, blank=True, verbose_name="اسم المنطقة")
@@ -23,3 +26,30 @@ class Citizen(models.Model):
 
     def __str__(self):
         return f"{self.first_name} {self.last_name}"
+
+    def set_lookup_fields(self):
+        """Fill the normalized columns; call before bulk_create, which skips save()"""
+        from apps.core.utils import normalize_arabic_name, normalize_phone
+        self.phone_normalized = normalize_phone(self.phone_number)
+        self.first_name_normalized = normalize_arabic_name(self.first_name)[:100]
+
+    def save(self, *args, **kwargs):
+        self.set_lookup_fields()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None:
+            kwargs['update_fields'] = {*update_fields, 'phone_normalized', 'first_name_normalized'}
+        super().save(*args, **kwargs)
+
+
+class UsernameCounter(models.Model):
+    """Last numeric suffix handed out for a username base (see apps.accounts.usernames)"""
+    base = models.CharField(max_length=150, unique=True)
+    # -1: nothing allocated yet, 0: the bare base, n: base + str(n)
+    last_suffix = models.BigIntegerField(default=-1)
+
+    class Meta:
+        verbose_name = "عداد أسماء المستخدمين"
+        verbose_name_plural = "عدادات أسماء المستخدمين"
+
+    def __str__(self):
+        return f"{self.base} ({self.last_suffix})"
@@ -0,0 +1,126 @@
+"""
+Username allocation
+
+Usernames are derived from a base (the local part of an email address) plus
+a numeric suffix: ahmed, ahmed1, ahmed2, ... Instead of probing one candidate
+per query, a UsernameCounter row per base remembers the last suffix handed
+out. The row is created on first use from the highest existing suffix (one
+indexed prefix query) and then advanced with a row lock, so concurrent
+registrations never receive the same name and the cost stays constant however
+many "ahmed" accounts exist.
+
+    allocate_username('ahmed.ali')          # 'ahmed.ali' or 'ahmed.ali7'
+    create_user_with_username('ahmed@x.com', email='ahmed@x.com', password=...)
+    allocate_usernames(['ahmed', 'ahmed'])  # one counter update per base
+"""
+
+import re
+from collections import Counter
+
+from django.contrib.auth.models import User
+from django.db import IntegrityError, transaction
+from django.db.models import BigIntegerField, Max
+from django.db.models.functions import Cast, Substr
+
+from .models import UsernameCounter
+
+MAX_SUFFIX_DIGITS = 9
+MAX_BASE_LENGTH = User._meta.get_field('username').max_length - MAX_SUFFIX_DIGITS
+INVALID_CHARS_RE = re.compile(r'[^\w.@+-]')
+
+
+def username_base(value):
+    """A valid username base from an email address or name"""
+    base = INVALID_CHARS_RE.sub('', value.split('@')[0].strip().lower())
+    return base[:MAX_BASE_LENGTH] or 'user'
+
+
+def username_for(base, suffix):
+    return base if suffix == 0 else f'{base}{suffix}'
+
+
+def highest_suffix(base):
+    """
+    Highest suffix already in use for a base: -1 if the base is free, 0 if
+    only the bare base exists
+    """
+    # LIKE 'base%' is served by the username pattern index on PostgreSQL
+    taken = User.objects.filter(username__startswith=base)
+    highest = taken.filter(username__regex=rf'^{re.escape(base)}[0-9]{{1,{MAX_SUFFIX_DIGITS}}}$').aggregate(
+        n=Max(Cast(Substr('username', len(base) + 1), BigIntegerField()))
+    )['n']
+    if highest is not None:
+        return highest
+    return 0 if taken.filter(username=base).exists() else -1
+
+
+def reserve_suffixes(base, count):
+    """Advance the counter of a base by `count`; returns the first reserved suffix"""
+    with transaction.atomic():
+        counter = UsernameCounter.objects.select_for_update().filter(base=base).first()
+        if counter is None:
+            try:
+                with transaction.atomic():
+                    counter = UsernameCounter.objects.create(base=base, last_suffix=highest_suffix(base))
+            except IntegrityError:
+                # Another registration created it first
+                counter = UsernameCounter.objects.select_for_update().get(base=base)
+        first = counter.last_suffix + 1
+        counter.last_suffix += count
+        counter.save(update_fields=['last_suffix'])
+    return first
+
+
+def next_free_username(base, skip=()):
+    """Reserve the next suffix of a base whose name is neither in `skip` nor in use"""
+    while True:
+        username = username_for(base, reserve_suffixes(base, 1))
+        # Names created outside this service (admin, imports of old data) are skipped
+        if username not in skip and not User.objects.filter(username=username).exists():
+            return username
+
+
+def allocate_username(value):
+    """Reserve a free username derived from `value`"""
+    return next_free_username(username_base(value))
+
+
+def create_user_with_username(value, attempts=3, **fields):
+    """
+    User.objects.create_user() under a username allocated from `value`
+
+    Different bases can produce the same name ('ahmed' + 1 and 'ahmed1'), and
+    the name is only checked before the insert, so another registration may
+    take it first; the insert is then retried with a new name.
+    """
+    for attempt in range(attempts):
+        try:
+            with transaction.atomic():
+                return User.objects.create_user(username=allocate_username(value), **fields)
+        except IntegrityError:
+            if attempt == attempts - 1:
+                raise
+
+
+def allocate_usernames(values):
+    """Reserve free usernames for many values at once, in the same order"""
+    bases = [username_base(value) for value in values]
+    next_suffix = {base: reserve_suffixes(base, count) for base, count in Counter(bases).items()}
+    usernames = []
+    for base in bases:
+        usernames.append(username_for(base, next_suffix[base]))
+        next_suffix[base] += 1
+
+    taken = set(User.objects.filter(username__in=usernames).values_list('username', flat=True))
+    # A name can also repeat within the batch when one base plus a suffix
+    # equals another base; replacements avoid every name of the batch
+    skip = set(usernames)
+    handed_out = set()
+    allocated = []
+    for base, username in zip(bases, usernames):
+        if username in taken or username in handed_out:
+            username = next_free_username(base, skip)
+            skip.add(username)
+        handed_out.add(username)
+        allocated.append(username)
+    return allocated
@@ -3,13 +3,18 @@ Views for accounts app
 """
 
 from django.shortcuts import render, redirect
-from django.contrib.auth import authenticate, login, logout
+from django.contrib.auth import login, logout
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 from django.http import HttpResponse
 from django.contrib.auth.models import User
+from django.conf import settings
+from django_ratelimit.decorators import ratelimit
+from .hashers import LoginBusy, verify_credentials
 from .models import Citizen
+from .usernames import create_user_with_username
 from apps.core.models import Governorate
+from apps.core.utils import normalize_arabic_name, normalize_phone
 
 
 def user_login(request):
@@ -20,7 +25,11 @@ def user_login(request):
         username = request.POST.get('username')
         password = request.POST.get('password')
         
-        user = authenticate(request, username=username, password=password)
+        try:
+            user = verify_credentials(request, username=username, password=password)
+        except LoginBusy:
+            messages.error(request, 'الخدمة مشغولة حالياً. يرجى المحاولة مرة أخرى بعد لحظات.')
+            return render(request, 'accounts/login.html', status=503)
         if user is not None:
             login(request, user)
             messages.success(request, 'تم تسجيل الدخول بنجاح.')
@@ -75,19 +84,16 @@ def citizen_register(request):
         if User.objects.filter(email=email).exists():
             messages.error(request, 'يوجد حساب مسجل بهذا البريد الإلكتروني بالفعل.')
             return render(request, 'accounts/register.html')
-        
-        # Create username from email
-        username = email.split('@')[0]
-        counter = 1
-        original_username = username
-        while User.objects.filter(username=username).exists():
-            username = f"{original_username}{counter}"
-            counter += 1
+
+        normalized_phone = normalize_phone(phone)
+        if normalized_phone and Citizen.objects.filter(phone_normalized=normalized_phone).exists():
+            messages.error(request, 'يوجد حساب مسجل برقم الهاتف هذا بالفعل.')
+            return render(request, 'accounts/register.html')
         
         try:
-            # Create user
-            user = User.objects.create_user(
-                username=username,
+            # Create user, with a username derived from the email
+            user = create_user_with_username(
+                email,
                 email=email,
                 password=password1,
                 first_name=first_name,
@@ -149,9 +155,24 @@ def edit_citizen_profile(request):
 
 
 
+def quick_login_rate(setting):
+    return lambda group, request: getattr(settings, setting)
+
+
+def quick_login_phone(group, request):
+    return normalize_phone(request.POST.get('phone_number', '')) or ''
+
+
+@ratelimit(key='ip', rate=quick_login_rate('QUICK_LOGIN_RATE_PER_IP'), method='POST', block=False)
+@ratelimit(key=quick_login_phone, rate=quick_login_rate('QUICK_LOGIN_RATE_PER_PHONE'), method='POST', block=False)
 def quick_login(request):
     """
     Quick login view from landing page
+
+    The citizen is found through the unique normalized phone number (one
+    index probe) and must match the typed first name, compared without
+    diacritics or alef/yaa/taa marbuta spelling differences. Attempts are
+    counted per IP and per phone number in the cache.
     """
     if request.method == 'POST':
         governorate_name = request.POST.get("governorate", "").strip()
@@ -162,30 +183,30 @@ def quick_login(request):
         if not governorate_name or not citizen_name or not phone_number:
             messages.error(request, 'يرجى ملء جميع حقول الدخول السريع.')
             return redirect('/')
-        
-        # Try to find a citizen with matching data
-        try:
-            # Look for a citizen with matching phone number and name
-            citizen = Citizen.objects.filter(
-                phone_number=phone_number,
-                first_name__icontains=citizen_name.split()[0] if citizen_name.split() else citizen_name
+
+        if getattr(request, 'limited', False):
+            messages.error(request, 'محاولات كثيرة لتسجيل الدخول السريع. يرجى الانتظار قليلاً ثم المحاولة مرة أخرى.')
+            return redirect('/')
+
+        phone = normalize_phone(phone_number)
+        first_name = normalize_arabic_name(citizen_name.split()[0])
+        citizen = None
+        if phone and first_name:
+            citizen = Citizen.objects.select_related('user').filter(
+                phone_normalized=phone,
+                first_name_normalized__contains=first_name,
             ).first()
-            
-            if citizen:
-                # Log the user in
-                login(request, citizen.user)
-                messages.success(request, f'مرحباً {citizen.first_name}! تم تسجيل الدخول السريع بنجاح.')
-                return redirect('/')
-            else:
-                # If no matching citizen found, suggest registration
-                messages.warning(request, 'لم يتم العثور على حساب مطابق. يرجى التحقق من البيانات أو إنشاء حساب جديد.')
-                return redirect('/')
-                
-        except Exception as e:
-            print(f"Quick login error: {e}")  # For debugging
-            messages.error(request, 'حدث خطأ أثناء محاولة تسجيل الدخول. يرجى المحاولة مرة أخرى.')
+
+        if citizen:
+            # Log the user in
+            login(request, citizen.user)
+            messages.success(request, f'مرحباً {citizen.first_name}! تم تسجيل الدخول السريع بنجاح.')
             return redirect('/')
-    
+
+        # If no matching citizen found, suggest registration
+        messages.warning(request, 'لم يتم العثور على حساب مطابق. يرجى التحقق من البيانات أو إنشاء حساب جديد.')
+        return redirect('/')
+
     return redirect('/')
 
 
@@ -5,3 +5,6 @@ class CandidatesConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.candidates'
     verbose_name = 'إدارة المرشحين'
+
+    def ready(self):
+        import apps.candidates.signals  # noqa: F401
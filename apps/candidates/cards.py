@@ -0,0 +1,147 @@
+"""
+Cached rendering of candidate cards
+
+Each card is rendered once and stored under a key built from the candidate id
+and a per-candidate version number. The version is bumped by signals whenever
+the candidate changes or receives a vote, rating or message, so listing pages
+assemble cached HTML and only re-render the cards that actually changed.
+"""
+
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Avg, Count, F, IntegerField, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+from django.template.loader import render_to_string
+from django.utils.safestring import mark_safe
+
+from apps.messaging.models import Message
+from apps.voting.models import Rating, Vote
+from .models import ElectoralPromise
+
+CARD_TEMPLATE = 'candidates/partials/candidate_card.html'
+COMPACT_CARD_TEMPLATE = 'candidates/partials/candidate_card_compact.html'
+
+CARD_VERSION_KEY = 'candidate_card_version:{}'
+CARD_DEBOUNCE_KEY = 'candidate_card_debounce:{}'
+CARD_FRAGMENT_KEY = 'candidate_card:{}:{}:{}'
+
+
+def _related_count(model, **filters):
+    """Correlated subquery counting rows of `model` that belong to the outer candidate"""
+    rows = (
+        model.objects.filter(candidate=OuterRef('pk'), **filters)
+        .order_by()
+        .values('candidate')
+        .annotate(n=Count('pk'))
+        .values('n')
+    )
+    return Coalesce(Subquery(rows, output_field=IntegerField()), Value(0))
+
+
+def annotate_card_stats(queryset):
+    """
+    Annotate candidates with the tallies shown on their cards in a single query
+    """
+    avg_rating = (
+        Rating.objects.filter(candidate=OuterRef('pk'))
+        .order_by()
+        .values('candidate')
+        .annotate(avg=Avg('stars'))
+        .values('avg')
+    )
+    return queryset.annotate(
+        total_votes=_related_count(Vote),
+        approve_votes=_related_count(Vote, vote_type='approve'),
+        disapprove_votes=_related_count(Vote, vote_type='disapprove'),
+        total_ratings=_related_count(Rating),
+        total_messages=_related_count(Message),
+        total_promises=_related_count(ElectoralPromise),
+        avg_rating=Coalesce(Subquery(avg_rating), Value(0.0)),
+    ).annotate(
+        total_activity=F('total_votes') + F('total_ratings') + F('total_messages'),
+    )
+
+
+def card_stats(candidate):
+    """Build the card item dict for a candidate annotated by annotate_card_stats"""
+    total_votes = candidate.total_votes
+    return {
+        'candidate': candidate,
+        'total_votes': total_votes,
+        'approve_votes': candidate.approve_votes,
+        'disapprove_votes': candidate.disapprove_votes,
+        'approval_rate': round(candidate.approve_votes / total_votes * 100) if total_votes else 0,
+        'avg_rating': round(candidate.avg_rating or 0, 1),
+        'total_ratings': candidate.total_ratings,
+        'total_messages': candidate.total_messages,
+        'total_promises': candidate.total_promises,
+        'total_activity': candidate.total_activity,
+    }
+
+
+def get_card_versions(candidate_ids):
+    """
+    Get the current card version of each candidate
+
+    Missing versions (first use or evicted keys) are initialised to a fresh,
+    unique value so that no fragment cached before an eviction is ever reused.
+    """
+    keys = {CARD_VERSION_KEY.format(pk): pk for pk in candidate_ids}
+    found = cache.get_many(list(keys))
+    versions = {}
+    missing = {}
+    for key, pk in keys.items():
+        if key in found:
+            versions[pk] = found[key]
+        else:
+            versions[pk] = missing[key] = time.time_ns()
+    if missing:
+        cache.set_many(missing, None)
+    return versions
+
+
+def bump_card_version(candidate_id, debounce=False):
+    """
+    Invalidate the cached cards of a candidate
+
+    With `debounce`, bumps are skipped while one already happened within
+    CANDIDATE_CARD_DEBOUNCE seconds; tallies may then lag behind by at most
+    CANDIDATE_CARD_TIMEOUT.
+    """
+    delay = getattr(settings, 'CANDIDATE_CARD_DEBOUNCE', 0)
+    if debounce and delay and not cache.add(CARD_DEBOUNCE_KEY.format(candidate_id), 1, delay):
+        return
+    cache.set(CARD_VERSION_KEY.format(candidate_id), time.time_ns(), None)
+
+
+def render_candidate_cards(items, template_name=CARD_TEMPLATE):
+    """
+    Attach rendered card HTML to each item as item['card_html']
+
+    Items are dicts holding at least a 'candidate' plus the tallies the card
+    template displays. Cached fragments are fetched with one get_many call and
+    only the missing ones are rendered and stored.
+    """
+    items = list(items)
+    if not items:
+        return items
+
+    versions = get_card_versions([item['candidate'].pk for item in items])
+    keys = [
+        CARD_FRAGMENT_KEY.format(item['candidate'].pk, versions[item['candidate'].pk], template_name)
+        for item in items
+    ]
+    cached = cache.get_many(keys)
+
+    rendered = {}
+    for key, item in zip(keys, items):
+        html = cached.get(key)
+        if html is None:
+            html = rendered[key] = render_to_string(template_name, {'item': item})
+        item['card_html'] = mark_safe(html)
+
+    if rendered:
+        cache.set_many(rendered, getattr(settings, 'CANDIDATE_CARD_TIMEOUT', 600))
+    return items
@@ -14,6 +14,8 @@ class Candidate(models.Model):
     constituency = models.CharField(max_length=200, verbose_name="الدائرة الانتخابية")
     profile_picture = models.ImageField(upload_to='candidate_profiles/', null=True, blank=True, verbose_name="الصورة الشخصية")
     banner_image = models.ImageField(upload_to='candidate_banners/', null=True, blank=True, verbose_name="صورة البانر")
+    # Responsive sizes of the images above (apps.core.images)
+    image_derivatives = models.JSONField(default=dict, blank=True, editable=False)
     bio = models.TextField(verbose_name="البيان الشخصي", blank=True)
     
     # Enhanced candidate profile fields
@@ -0,0 +1,26 @@
+"""
+Signals for the candidates app
+"""
+
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from apps.messaging.models import Message
+from apps.voting.models import Rating, Vote
+from .cards import bump_card_version
+from .models import Candidate, ElectoralPromise
+
+
+@receiver([post_save, post_delete], sender=Candidate)
+def invalidate_candidate_card(sender, instance, **kwargs):
+    """Re-render the candidate's cards after any change to the candidate"""
+    bump_card_version(instance.pk)
+
+
+@receiver([post_save, post_delete], sender=Vote)
+@receiver([post_save, post_delete], sender=Rating)
+@receiver([post_save, post_delete], sender=Message)
+@receiver([post_save, post_delete], sender=ElectoralPromise)
+def invalidate_candidate_card_tallies(sender, instance, **kwargs):
+    """Refresh the tallies on the candidate's cards, debounced for hot candidates"""
+    bump_card_version(instance.candidate_id, debounce=True)
@@ -15,6 +15,7 @@ urlpatterns = [
     
     # Candidate dashboard
     path('dashboard/', views.candidate_dashboard, name='candidate_dashboard'),
+    path('messages/', views.candidate_messages, name='candidate_messages'),
 ]
 
 
@@ -4,7 +4,7 @@ Views for candidate management and display
 
 from django.contrib.auth.models import User
 from django.core.paginator import Paginator
-from django.db.models import Count, Q, Avg
+from django.db.models import Count, Q, Avg, Sum
 from django.shortcuts import render, get_object_or_404, redirect
 from django.contrib.auth import authenticate, login, logout
 from django.contrib.auth.decorators import login_required
@@ -14,16 +14,21 @@ from django.views.decorators.cache import cache_page
 from django.views.decorators.http import require_POST, require_GET
 
 from .models import Candidate, ElectoralPromise, PublicServiceHistory, FeaturedCandidate
-from apps.messaging.models import Message
+from .cards import annotate_card_stats, card_stats, render_candidate_cards
+from apps.messaging.models import Conversation, Message
 from apps.voting.models import Rating, Vote, RatingReply
 from apps.accounts.models import Citizen
 from apps.core.models import ActivityLog
+from apps.core.pagination import KeysetPaginator
 from apps.core.utils import get_governorate_by_id
 
 import json
 from django.conf import settings
 
 
+CONVERSATIONS_PER_PAGE = 20
+
+
 def candidate_list(request):
     """
     صفحة قائمة جميع المرشحين مع البحث والفلترة
@@ -48,55 +53,36 @@ def candidate_list(request):
     if governorate_id:
         candidates = candidates.filter(governorate_id=governorate_id)
     
-    # Calculate statistics for each candidate
-    candidates_with_stats = []
-    for candidate in candidates:
-        # Calculate statistics
-        total_votes = candidate.votes.count()
-        approve_votes = candidate.votes.filter(vote_type="approve").count()
-        disapprove_votes = candidate.votes.filter(vote_type="disapprove").count()
-        
-        ratings = candidate.ratings.all()
-        avg_rating = ratings.aggregate(Avg("stars"))["stars__avg"] or 0
-        total_ratings = ratings.count()
-        
-        total_messages = candidate.messages.count()
-        total_activity = total_votes + total_ratings + total_messages
-        
-        candidates_with_stats.append({
-            "candidate": candidate,
-            "total_votes": total_votes,
-            "approve_votes": approve_votes,
-            "disapprove_votes": disapprove_votes,
-            "avg_rating": round(avg_rating, 1),
-            "total_ratings": total_ratings,
-            "total_messages": total_messages,
-            "total_activity": total_activity,
-        })
+    # Calculate statistics for all candidates in one query
+    candidates = annotate_card_stats(candidates)
     
     # Apply sorting
     if sort_by == "rating":
-        candidates_with_stats.sort(key=lambda x: x["avg_rating"], reverse=True)
+        candidates = candidates.order_by("-avg_rating", "name")
     elif sort_by == "votes":
-        candidates_with_stats.sort(key=lambda x: x["total_votes"], reverse=True)
+        candidates = candidates.order_by("-total_votes", "name")
     elif sort_by == "activity":
-        candidates_with_stats.sort(key=lambda x: x["total_activity"], reverse=True)
+        candidates = candidates.order_by("-total_activity", "name")
     else:
         # Default sort by name
-        candidates_with_stats.sort(key=lambda x: x["candidate"].name)
+        candidates = candidates.order_by("name")
     
     # Pagination
-    paginator = Paginator(candidates_with_stats, 12)  # Show 12 candidates per page
+    paginator = Paginator(candidates, 12)  # Show 12 candidates per page
     page_number = request.GET.get("page")
     page_obj = paginator.get_page(page_number)
     
+    # Render the cards of the current page, mostly from cache
+    page_obj.object_list = render_candidate_cards(card_stats(candidate) for candidate in page_obj.object_list)
+    
     context = {
         "page_title": "جميع المرشحين",
         "page_obj": page_obj,
         "search_query": search_query,
         "governorate_id": governorate_id,
         "sort_by": sort_by,
-        "total_candidates": len(candidates_with_stats),
+        "total_candidates": paginator.count,
+        "candidates_page": page_obj,
     }
     return render(request, "candidates/candidates.html", context)
 
@@ -305,8 +291,8 @@ def candidate_dashboard(request):
     avg_rating = ratings.aggregate(Avg("stars"))["stars__avg"] or 0
     total_ratings = ratings.count()
     
-    # Get unread messages
-    unread_messages = candidate.messages.filter(is_read=False).order_by("-timestamp")
+    # Unread messages from the conversation counters
+    unread_messages = candidate.conversations.aggregate(n=Sum("candidate_unread_count"))["n"] or 0
     
     # Get recent ratings
     recent_ratings = ratings.order_by("-timestamp")[:10]
@@ -329,6 +315,30 @@ def candidate_dashboard(request):
     return render(request, "candidates/candidate_dashboard.html", context)
 
 
+@login_required
+def candidate_messages(request):
+    """
+    صفحة محادثات المرشح مرتبة حسب آخر رسالة
+    """
+    try:
+        candidate = request.user.candidate_profile
+    except Candidate.DoesNotExist:
+        messages.error(request, "هذا الحساب غير مخصص للمرشحين.")
+        return redirect("core:home")
+    
+    conversations = Conversation.objects.filter(candidate=candidate).select_related("citizen", "root")
+    page_obj = KeysetPaginator(
+        conversations, ordering=("-last_message_at", "-id"), per_page=CONVERSATIONS_PER_PAGE
+    ).get_page(request.GET.get("cursor"))
+    
+    context = {
+        "page_title": "الرسائل الواردة",
+        "candidate": candidate,
+        "page_obj": page_obj,
+    }
+    return render(request, "candidates/candidate_messages.html", context)
+
+
 def candidate_logout(request):
     logout(request)
     messages.success(request, "تم تسجيل الخروج بنجاح.")
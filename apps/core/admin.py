@@ -1,7 +1,9 @@
 from django.contrib import admin
+from django.utils.html import format_html_join
 from .models import (
     Governorate,
     ActivityLog,
+    UserImport,
 )
 
 
@@ -27,3 +29,30 @@ class ActivityLogAdmin(admin.ModelAdmin):
         # Prevent editing of activity logs
         return False
 
+
+
+@admin.register(UserImport)
+class UserImportAdmin(admin.ModelAdmin):
+    """
+    Upload a CSV of candidates or citizens; the process_user_imports worker imports it
+    """
+    list_display = ('__str__', 'kind', 'status', 'created_count', 'error_count', 'created_by', 'finished_at')
+    list_filter = ('kind', 'status')
+    fields = ('kind', 'file', 'status', 'created_count', 'error_list', 'created_by', 'finished_at')
+    readonly_fields = ('status', 'created_count', 'error_list', 'created_by', 'finished_at')
+
+    def has_change_permission(self, request, obj=None):
+        # The form is only used to upload; results are read-only
+        return obj is None and super().has_change_permission(request, obj)
+
+    def save_model(self, request, obj, form, change):
+        obj.created_by = request.user
+        super().save_model(request, obj, form, change)
+
+    @admin.display(description='عدد الأخطاء')
+    def error_count(self, obj):
+        return len(obj.errors)
+
+    @admin.display(description='الأخطاء')
+    def error_list(self, obj):
+        return format_html_join('\n', '<div>سطر {}: {}</div>', obj.errors[:500]) or '-'
@@ -0,0 +1,387 @@
+"""
+Bulk import of candidates and citizens from CSV
+
+    python manage.py import_users candidates candidates.csv
+    python manage.py import_users citizens citizens.csv --dry-run
+
+or upload the file under "استيراد المستخدمين" in the admin; the
+process_user_imports worker then runs it in the background.
+
+Files may come straight from Excel ("CSV UTF-8", comma or semicolon
+separated). The columns are:
+
+    candidates  name, email, governorate_id, constituency
+                [phone_number, election_number, election_symbol, role, password]
+    citizens    first_name, last_name, email, phone_number, governorate_id
+                [area_type, area_name, address, password]
+
+The whole file is validated column by column before anything is written:
+value lengths against the model fields, email format and duplicates (inside
+the file and against existing accounts, in one query per chunk), Egyptian
+phone numbers (unique among citizens), governorate ids. Invalid rows
+are reported with their line number and skipped. Valid rows are inserted with
+bulk_create in batches, usernames come from apps.accounts.usernames, and
+passwords are hashed in a process pool because hashing is CPU bound. Rows
+without a password get an unusable one and sign in after a password reset.
+If a batch fails, the batches before it stay imported and the import stops
+with ImportBatchError, which names the lines of the failed batch.
+"""
+
+import csv
+import io
+import logging
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+
+import django
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.core.validators import validate_email
+from django.db import transaction
+from django.db.models.functions import Lower
+from django.utils import timezone
+
+from apps.accounts.models import Citizen
+from apps.accounts.usernames import allocate_usernames
+from apps.candidates.models import Candidate
+from .models import Governorate, UserImport
+from .page_cache import purge_page_cache
+from .utils import format_egyptian_phone, load_governorates_data, validate_egyptian_phone
+
+logger = logging.getLogger(__name__)
+
+COLUMNS = {
+    'candidates': {
+        'required': ['name', 'email', 'governorate_id', 'constituency'],
+        'optional': ['phone_number', 'election_number', 'election_symbol', 'role', 'password'],
+    },
+    'citizens': {
+        'required': ['first_name', 'last_name', 'email', 'phone_number', 'governorate_id'],
+        'optional': ['area_type', 'area_name', 'address', 'password'],
+    },
+}
+# Model whose fields bound the length of each column
+COLUMN_MODELS = {'candidates': Candidate, 'citizens': Citizen}
+EMAIL_QUERY_CHUNK = 1000
+# Minimum passwords in a batch before hashing is spread over processes
+POOL_THRESHOLD = 8
+POOL_CHUNK_SIZE = 16
+
+
+class ImportFileError(Exception):
+    """The file cannot be imported at all (encoding, missing columns)"""
+
+
+class ImportBatchError(Exception):
+    """
+    A batch could not be written; `created` rows from earlier batches were
+    imported and `errors` holds the row errors plus one for the failed batch
+    """
+
+    def __init__(self, created, line, message, errors):
+        super().__init__(message)
+        self.created = created
+        self.errors = sorted(errors + [(line, message)])
+
+
+def read_rows(file):
+    """Rows of a CSV file as dicts with stripped values, numbered by file line"""
+    data = file.read()
+    if isinstance(data, bytes):
+        try:
+            data = data.decode('utf-8-sig')
+        except UnicodeDecodeError:
+            raise ImportFileError('الملف ليس بترميز UTF-8؛ احفظه من Excel بصيغة "CSV UTF-8".')
+    try:
+        dialect = csv.Sniffer().sniff(data[:4096], delimiters=',;\t')
+    except csv.Error:
+        dialect = csv.excel
+    reader = csv.DictReader(io.StringIO(data), dialect=dialect)
+    reader.fieldnames = [(name or '').strip().lower() for name in reader.fieldnames or []]
+    rows = []
+    for row in reader:
+        values = {key: (value or '').strip() for key, value in row.items() if key}
+        if any(values.values()):
+            values['line'] = reader.line_num
+            rows.append(values)
+    return reader.fieldnames, rows
+
+
+def column_max_lengths(kind):
+    """{column: max length} for the columns stored in length-limited fields"""
+    lengths = {'email': User._meta.get_field('email').max_length}
+    model = COLUMN_MODELS[kind]
+    for column in COLUMNS[kind]['required'] + COLUMNS[kind]['optional']:
+        try:
+            max_length = model._meta.get_field(column).max_length
+        except FieldDoesNotExist:
+            continue
+        if max_length:
+            lengths[column] = min(max_length, lengths.get(column, max_length))
+    return lengths
+
+
+def existing_emails(emails):
+    """
+    The emails (lowercase) already used by an account or a citizen profile,
+    compared case-insensitively with how they were stored
+    """
+    emails = sorted({email.lower() for email in emails})
+    found = set()
+    for start in range(0, len(emails), EMAIL_QUERY_CHUNK):
+        chunk = emails[start:start + EMAIL_QUERY_CHUNK]
+        for model in (User, Citizen):
+            found.update(
+                model.objects.annotate(email_lower=Lower('email'))
+                .filter(email_lower__in=chunk)
+                .values_list('email_lower', flat=True)
+            )
+    return found
+
+
+def existing_phones(phones):
+    """The formatted phone numbers already used by a citizen"""
+    found = set()
+    for start in range(0, len(phones), EMAIL_QUERY_CHUNK):
+        chunk = phones[start:start + EMAIL_QUERY_CHUNK]
+        found.update(Citizen.objects.filter(phone_normalized__in=chunk).values_list('phone_normalized', flat=True))
+    return found
+
+
+def validate_rows(kind, fieldnames, rows):
+    """
+    Check all rows of a file; returns (valid rows, [(line, message)])
+
+    Valid rows get normalized values: lowercase email, formatted phone
+    number and an integer governorate_id.
+    """
+    missing = [column for column in COLUMNS[kind]['required'] if column not in fieldnames]
+    if missing:
+        raise ImportFileError(f"أعمدة مطلوبة غير موجودة: {', '.join(missing)}")
+
+    errors = {}
+
+    def fail(row, message):
+        errors.setdefault(row['line'], []).append(message)
+
+    for row in rows:
+        for column in COLUMNS[kind]['required']:
+            if not row.get(column):
+                fail(row, f'{column} مطلوب')
+
+    # Lengths, so that no value is rejected by the database mid-import
+    max_lengths = column_max_lengths(kind)
+    for row in rows:
+        for column, max_length in max_lengths.items():
+            if len(row.get(column, '')) > max_length:
+                fail(row, f'{column} أطول من {max_length} حرفاً')
+
+    # Emails: format, duplicates inside the file, existing accounts in any letter case
+    for row in rows:
+        row['email'] = row.get('email', '').lower()
+        if row['email']:
+            try:
+                validate_email(row['email'])
+            except ValidationError:
+                fail(row, 'بريد إلكتروني غير صالح')
+    counts = Counter(row['email'] for row in rows if row['email'])
+    taken = existing_emails(counts)
+    for row in rows:
+        if counts[row['email']] > 1:
+            fail(row, 'البريد الإلكتروني مكرر في الملف')
+        if row['email'] in taken:
+            fail(row, 'يوجد حساب بهذا البريد الإلكتروني')
+
+    # Phone numbers
+    for row in rows:
+        phone = row.get('phone_number', '')
+        if phone:
+            if validate_egyptian_phone(phone):
+                row['phone_number'] = format_egyptian_phone(phone)
+            else:
+                fail(row, 'رقم هاتف مصري غير صالح')
+    if kind == 'citizens':
+        # Citizens sign in with their phone number, so it is unique across citizens
+        phone_counts = Counter(row['phone_number'] for row in rows if row.get('phone_number'))
+        taken_phones = existing_phones(list(phone_counts))
+        for row in rows:
+            phone = row.get('phone_number', '')
+            if phone_counts[phone] > 1:
+                fail(row, 'رقم الهاتف مكرر في الملف')
+            if phone in taken_phones:
+                fail(row, 'يوجد مواطن مسجل برقم الهاتف هذا')
+
+    # Governorates
+    governorate_ids = {gov['id'] for gov in load_governorates_data()}
+    for row in rows:
+        value = row.get('governorate_id', '')
+        if value:
+            try:
+                row['governorate_id'] = int(value)
+            except ValueError:
+                row['governorate_id'] = None
+            if row['governorate_id'] not in governorate_ids:
+                fail(row, 'معرف محافظة غير معروف')
+
+    valid = [row for row in rows if row['line'] not in errors]
+    return valid, sorted((line, message) for line, messages in errors.items() for message in messages)
+
+
+def hash_passwords(passwords, pool=None):
+    """make_password for every value; blank values get an unusable password"""
+    to_hash = [(i, password) for i, password in enumerate(passwords) if password]
+    hashed = [make_password(None)] * len(passwords)
+    if pool is not None and len(to_hash) >= POOL_THRESHOLD:
+        results = pool.map(make_password, [password for _, password in to_hash], chunksize=POOL_CHUNK_SIZE)
+    else:
+        results = map(make_password, [password for _, password in to_hash])
+    for (i, _), value in zip(to_hash, results):
+        hashed[i] = value
+    return hashed
+
+
+def create_users(rows, names, pool):
+    usernames = allocate_usernames([row['email'] for row in rows])
+    passwords = hash_passwords([row.get('password', '') for row in rows], pool)
+    users = [
+        User(username=username, email=row['email'], password=password, first_name=first_name[:150], last_name=last_name[:150])
+        for row, username, password, (first_name, last_name) in zip(rows, usernames, passwords, names)
+    ]
+    return User.objects.bulk_create(users)
+
+
+def import_candidates(rows, pool):
+    names = [(row['name'].split(' ', 1) + [''])[:2] for row in rows]
+    with transaction.atomic():
+        users = create_users(rows, names, pool)
+        Candidate.objects.bulk_create([
+            Candidate(
+                user=user,
+                name=row['name'],
+                governorate_id=row['governorate_id'],
+                constituency=row['constituency'],
+                phone_number=row.get('phone_number', ''),
+                election_number=row.get('election_number', ''),
+                election_symbol=row.get('election_symbol', ''),
+                **({'role': row['role']} if row.get('role') else {}),
+            )
+            for user, row in zip(users, rows)
+        ])
+
+
+def import_citizens(rows, pool, governorate_rows):
+    names = [(row['first_name'], row['last_name']) for row in rows]
+    with transaction.atomic():
+        users = create_users(rows, names, pool)
+        citizens = [
+            Citizen(
+                user=user,
+                first_name=row['first_name'],
+                last_name=row['last_name'],
+                email=row['email'],
+                phone_number=row['phone_number'],
+                governorate=governorate_rows[row['governorate_id']],
+                area_type=row.get('area_type', ''),
+                area_name=row.get('area_name', ''),
+                address=row.get('address', ''),
+            )
+            for user, row in zip(users, rows)
+        ]
+        # bulk_create skips save(), which fills the lookup columns
+        for citizen in citizens:
+            citizen.set_lookup_fields()
+        Citizen.objects.bulk_create(citizens)
+
+
+def import_file(kind, file, dry_run=False, batch_size=None, workers=None):
+    """
+    Validate and import a CSV file; returns (rows created, [(line, message)])
+
+    Each batch is committed on its own, so a failure keeps earlier batches;
+    it raises ImportBatchError with the number of rows already created.
+    """
+    batch_size = batch_size or settings.USER_IMPORT_BATCH_SIZE
+    workers = settings.USER_IMPORT_HASH_WORKERS if workers is None else workers
+    fieldnames, rows = read_rows(file)
+    valid, errors = validate_rows(kind, fieldnames, rows)
+    if dry_run or not valid:
+        return 0, errors
+
+    if kind == 'citizens':
+        # Citizen.governorate points at the Governorate table, keyed by Arabic name
+        names = {gov['id']: gov['name_ar'] for gov in load_governorates_data()}
+        governorate_rows = {
+            gov_id: Governorate.objects.get_or_create(name=names[gov_id])[0]
+            for gov_id in {row['governorate_id'] for row in valid}
+        }
+
+    created = 0
+    pool = ProcessPoolExecutor(max_workers=workers, initializer=django.setup) if workers > 1 else None
+    try:
+        for start in range(0, len(valid), batch_size):
+            batch = valid[start:start + batch_size]
+            try:
+                if kind == 'candidates':
+                    import_candidates(batch, pool)
+                else:
+                    import_citizens(batch, pool, governorate_rows)
+            except Exception as e:
+                first, last = batch[0]['line'], batch[-1]['line']
+                logger.exception(f"Import of lines {first}-{last} failed: {e}")
+                raise ImportBatchError(
+                    created, first,
+                    f'تعذر استيراد الأسطر {first}-{last} وتوقف الاستيراد عندها؛ تم إنشاء {created} حساباً قبلها',
+                    errors,
+                )
+            created += len(batch)
+    finally:
+        if pool is not None:
+            pool.shutdown()
+        if kind == 'candidates' and created:
+            # bulk_create sends no post_save, so the cached candidate pages are purged here
+            purge_page_cache('candidates')
+    return created, errors
+
+
+def run_import(user_import):
+    """Import an uploaded file and record the outcome on its UserImport"""
+    try:
+        with user_import.file.open('rb') as f:
+            created, errors = import_file(user_import.kind, f)
+    except ImportFileError as e:
+        user_import.status = 'failed'
+        user_import.errors = [[0, str(e)]]
+    except ImportBatchError as e:
+        user_import.status = 'failed'
+        user_import.created_count = e.created
+        user_import.errors = [list(error) for error in e.errors]
+    except Exception as e:
+        logger.exception(f"User import {user_import.pk} failed: {e}")
+        user_import.status = 'failed'
+        user_import.errors = [[0, 'حدث خطأ أثناء الاستيراد']]
+    else:
+        user_import.status = 'done'
+        user_import.created_count = created
+        user_import.errors = [list(error) for error in errors]
+    user_import.finished_at = timezone.now()
+    user_import.save(update_fields=['status', 'created_count', 'errors', 'finished_at'])
+    return user_import
+
+
+def process_imports(limit=5):
+    """Run pending uploaded imports; returns how many were handled"""
+    processed = 0
+    while processed < limit:
+        with transaction.atomic():
+            user_import = UserImport.objects.select_for_update(skip_locked=True).filter(
+                status='pending',
+            ).order_by('created_at').first()
+            if user_import is None:
+                break
+            user_import.status = 'running'
+            user_import.save(update_fields=['status'])
+        run_import(user_import)
+        processed += 1
+    return processed
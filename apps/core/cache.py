@@ -0,0 +1,115 @@
+"""
+Stale-while-revalidate caching for expensive, shared values
+
+Values are stored together with a soft expiry time. Once a value is past its
+soft expiry it is still served to every request except one: the request that
+wins a short-lived lock in the cache recomputes and stores the new value. The
+hard timeout of the key is longer than the soft one, so a hot key never
+disappears under load and expiry does not send every worker to the database
+at once. Both timeouts are jittered so keys written together expire apart.
+"""
+
+import logging
+import random
+import time
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+LOCK_KEY = '{}:refresh_lock'
+
+
+def jittered(timeout, jitter=None):
+    """Spread `timeout` by +/- the configured jitter fraction"""
+    if jitter is None:
+        jitter = getattr(settings, 'CACHE_REFRESH_JITTER', 0.1)
+    return timeout * (1 + random.uniform(-jitter, jitter))
+
+
+def _store(key, value, timeout, stale_timeout):
+    soft_timeout = jittered(timeout)
+    cache.set(key, (value, time.time() + soft_timeout), int(soft_timeout + jittered(stale_timeout)))
+
+
+def _acquire(key, lock_timeout):
+    token = uuid.uuid4().hex
+    return token if cache.add(LOCK_KEY.format(key), token, lock_timeout) else None
+
+
+def _release(key, token):
+    lock_key = LOCK_KEY.format(key)
+    if cache.get(lock_key) == token:
+        cache.delete(lock_key)
+
+
+def _compute_and_store(key, token, compute, timeout, stale_timeout):
+    try:
+        value = compute()
+        _store(key, value, timeout, stale_timeout)
+        return value
+    finally:
+        _release(key, token)
+
+
+def get_or_refresh(key, compute, timeout, stale_timeout=None, lock_timeout=None, wait_timeout=None):
+    """
+    Get a cached value, recomputing it with `compute()` in at most one worker
+
+    `timeout` is the soft TTL in seconds; stale values are served for up to
+    `stale_timeout` more seconds (defaults to `timeout`) while the lock holder
+    refreshes them. On a cold miss, workers that lose the lock wait up to
+    `wait_timeout` seconds for the winner, taking the lock over if the winner
+    fails and releases it, before computing themselves. `lock_timeout` only
+    bounds how long a crashed holder keeps the lock.
+    """
+    if stale_timeout is None:
+        stale_timeout = timeout
+    if lock_timeout is None:
+        lock_timeout = getattr(settings, 'CACHE_REFRESH_LOCK_TIMEOUT', 30)
+    if wait_timeout is None:
+        wait_timeout = getattr(settings, 'CACHE_REFRESH_WAIT_TIMEOUT', 3)
+
+    entry = cache.get(key)
+    if entry is not None:
+        value, soft_expires_at = entry
+        if time.time() < soft_expires_at:
+            return value
+        token = _acquire(key, lock_timeout)
+        if token is None:
+            # Another worker is already refreshing; serve the stale value
+            return value
+        try:
+            value = compute()
+            _store(key, value, timeout, stale_timeout)
+        except Exception as e:
+            logger.warning(f"Refreshing cache key {key} failed, serving stale value: {e}")
+        finally:
+            _release(key, token)
+        return value
+
+    deadline = time.time() + wait_timeout
+    while True:
+        # add() only succeeds once the lock is free again, e.g. after the holder failed
+        token = _acquire(key, lock_timeout)
+        if token is not None:
+            return _compute_and_store(key, token, compute, timeout, stale_timeout)
+        if time.time() >= deadline:
+            break
+        time.sleep(0.05)
+        entry = cache.get(key)
+        if entry is not None:
+            return entry[0]
+    logger.warning(f"Timed out waiting for cache key {key}; computing it")
+    return compute()
+
+
+def expire(key, stale_timeout=300):
+    """
+    Mark a cached value stale so the next read refreshes it without a cold miss
+    """
+    entry = cache.get(key)
+    if entry is not None:
+        cache.set(key, (entry[0], 0), stale_timeout)
@@ -0,0 +1,275 @@
+"""
+Cache backends for the core app
+
+TwoTierRedisCache keeps a small, bounded LRU of recently read values in each
+worker process in front of django_redis. Reads served from the local tier
+never touch the network; every write goes to Redis and is broadcast on a
+pub/sub channel so all workers drop their local copy of the key.
+
+    CACHES = {
+        'default': {
+            'BACKEND': 'apps.core.cache_backends.TwoTierRedisCache',
+            'LOCATION': 'redis://localhost:6379/1',
+            'OPTIONS': {
+                'CLIENT_CLASS': 'django_redis.client.DefaultClient',
+                'LOCAL_MAX_ENTRIES': 1000,
+                'LOCAL_TIMEOUT': 5,
+                'INVALIDATION_CHANNEL': 'naebak:cache:invalidate',
+            },
+        },
+    }
+
+Local entries live at most LOCAL_TIMEOUT seconds, which bounds staleness if
+an invalidation message is lost while a worker reconnects.
+"""
+
+import logging
+import os
+import pickle
+import threading
+import time
+import uuid
+from collections import Counter, OrderedDict
+
+from django.core.cache.backends.base import DEFAULT_TIMEOUT
+from django_redis.cache import RedisCache
+
+logger = logging.getLogger(__name__)
+
+_MISSING = object()
+CLEAR_ALL = '*'
+
+
+class LocalLRU:
+    """Thread-safe, size-bounded LRU of pickled values with per-entry expiry"""
+
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self.lock = threading.Lock()
+        self.entries = OrderedDict()
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return _MISSING
+            blob, expires_at = entry
+            if expires_at <= time.monotonic():
+                del self.entries[key]
+                return _MISSING
+            self.entries.move_to_end(key)
+        return pickle.loads(blob)
+
+    def set(self, key, value, timeout):
+        # Values are kept pickled so callers never share a mutable object
+        blob = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+        with self.lock:
+            self.entries[key] = (blob, time.monotonic() + timeout)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def discard(self, keys):
+        with self.lock:
+            for key in keys:
+                self.entries.pop(key, None)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+    def __len__(self):
+        return len(self.entries)
+
+
+class TwoTierRedisCache(RedisCache):
+    """
+    django_redis cache with a per-process LRU tier and pub/sub invalidation
+    """
+
+    def __init__(self, server, params):
+        params = dict(params)
+        options = dict(params.get('OPTIONS', {}))
+        self.local_max_entries = options.pop('LOCAL_MAX_ENTRIES', 1000)
+        self.local_timeout = options.pop('LOCAL_TIMEOUT', 5)
+        self.channel = options.pop('INVALIDATION_CHANNEL', 'naebak:cache:invalidate')
+        self.local_exclude_prefixes = tuple(options.pop('LOCAL_EXCLUDE_PREFIXES', ()))
+        params['OPTIONS'] = options
+        super().__init__(server, params)
+
+        self.local = LocalLRU(self.local_max_entries)
+        self.stats_lock = threading.Lock()
+        self.stats = Counter()
+        self.sender_id = None
+        self.listener_pid = None
+        self.listener_lock = threading.Lock()
+
+    # Local tier
+
+    def _use_local(self, key):
+        return self.local_max_entries > 0 and not key.startswith(self.local_exclude_prefixes)
+
+    def _count(self, tier, result, n=1):
+        if n:
+            with self.stats_lock:
+                self.stats[(tier, result)] += n
+
+    def tier_stats(self):
+        """Hit and miss counters per tier for this process"""
+        with self.stats_lock:
+            stats = {f'{tier}_{result}': n for (tier, result), n in self.stats.items()}
+        stats['local_entries'] = len(self.local)
+        return stats
+
+    # Invalidation
+
+    def _ensure_listener(self):
+        """Start the invalidation listener once per process (also after a fork)"""
+        pid = os.getpid()
+        if self.listener_pid == pid:
+            return
+        with self.listener_lock:
+            if self.listener_pid == pid:
+                return
+            # A forked worker must not trust entries inherited from its parent
+            self.local.clear()
+            self.sender_id = f'{pid}-{uuid.uuid4().hex[:8]}'
+            threading.Thread(target=self._listen, name='cache-invalidation', daemon=True).start()
+            self.listener_pid = pid
+
+    def _listen(self):
+        while True:
+            try:
+                pubsub = self.client.get_client(write=False).pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(self.channel)
+                # Anything may have changed while we were not subscribed
+                self.local.clear()
+                for message in pubsub.listen():
+                    sender, _, key = message['data'].decode().partition(':')
+                    if sender == self.sender_id:
+                        continue
+                    if key == CLEAR_ALL:
+                        self.local.clear()
+                    else:
+                        self.local.discard(key.split('\n'))
+            except Exception as e:
+                logger.warning(f"Cache invalidation listener disconnected: {e}")
+                self.local.clear()
+                time.sleep(1)
+
+    def _invalidate(self, keys):
+        """Drop keys locally and tell the other workers to drop them"""
+        keys = list(keys)
+        if keys == [CLEAR_ALL]:
+            self.local.clear()
+        else:
+            self.local.discard(keys)
+        self._ensure_listener()
+        try:
+            self.client.get_client(write=True).publish(self.channel, f'{self.sender_id}:' + '\n'.join(keys))
+        except Exception as e:
+            logger.warning(f"Could not publish cache invalidation: {e}")
+
+    # Reads
+
+    def get(self, key, default=None, version=None, client=None):
+        full_key = self.make_key(key, version=version)
+        if not self._use_local(key):
+            return super().get(key, default, version=version, client=client)
+
+        self._ensure_listener()
+        value = self.local.get(full_key)
+        if value is not _MISSING:
+            self._count('local', 'hits')
+            return value
+        self._count('local', 'misses')
+
+        value = super().get(key, _MISSING, version=version, client=client)
+        if value is _MISSING:
+            self._count('redis', 'misses')
+            return default
+        self._count('redis', 'hits')
+        self.local.set(full_key, value, self.local_timeout)
+        return value
+
+    def get_many(self, keys, version=None, client=None):
+        self._ensure_listener()
+        found = {}
+        remote_keys = []
+        for key in keys:
+            value = self.local.get(self.make_key(key, version=version)) if self._use_local(key) else _MISSING
+            if value is _MISSING:
+                remote_keys.append(key)
+            else:
+                found[key] = value
+        self._count('local', 'hits', len(found))
+        self._count('local', 'misses', len(remote_keys))
+
+        if remote_keys:
+            remote = super().get_many(remote_keys, version=version, client=client)
+            self._count('redis', 'hits', len(remote))
+            self._count('redis', 'misses', len(remote_keys) - len(remote))
+            for key, value in remote.items():
+                if self._use_local(key):
+                    self.local.set(self.make_key(key, version=version), value, self.local_timeout)
+            found.update(remote)
+        return found
+
+    def has_key(self, key, version=None, client=None):
+        if self._use_local(key) and self.local.get(self.make_key(key, version=version)) is not _MISSING:
+            return True
+        return super().has_key(key, version=version, client=client)
+
+    # Writes
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None, **kwargs):
+        result = super().set(key, value, timeout, version=version, **kwargs)
+        self._invalidate([self.make_key(key, version=version)])
+        return result
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None, **kwargs):
+        result = super().add(key, value, timeout, version=version, **kwargs)
+        if result:
+            self._invalidate([self.make_key(key, version=version)])
+        return result
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None, **kwargs):
+        result = super().set_many(data, timeout, version=version, **kwargs)
+        self._invalidate(self.make_key(key, version=version) for key in data)
+        return result
+
+    def delete(self, key, version=None, **kwargs):
+        result = super().delete(key, version=version, **kwargs)
+        self._invalidate([self.make_key(key, version=version)])
+        return result
+
+    def delete_many(self, keys, version=None, **kwargs):
+        keys = list(keys)
+        result = super().delete_many(keys, version=version, **kwargs)
+        self._invalidate(self.make_key(key, version=version) for key in keys)
+        return result
+
+    def incr(self, key, delta=1, version=None, **kwargs):
+        result = super().incr(key, delta, version=version, **kwargs)
+        self._invalidate([self.make_key(key, version=version)])
+        return result
+
+    def decr(self, key, delta=1, version=None, **kwargs):
+        result = super().decr(key, delta, version=version, **kwargs)
+        self._invalidate([self.make_key(key, version=version)])
+        return result
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None, **kwargs):
+        result = super().touch(key, timeout, version=version, **kwargs)
+        self._invalidate([self.make_key(key, version=version)])
+        return result
+
+    def delete_pattern(self, *args, **kwargs):
+        result = super().delete_pattern(*args, **kwargs)
+        self._invalidate([CLEAR_ALL])
+        return result
+
+    def clear(self):
+        result = super().clear()
+        self._invalidate([CLEAR_ALL])
+        return result
@@ -4,8 +4,8 @@
 """
 
 from django.conf import settings
-from apps.candidates.models import Candidate
-from apps.accounts.models import Citizen
+from apps.news.ticker import get_ticker_payload
+from .utils import get_site_stats
 
 
 def site_context(request):
@@ -16,13 +16,8 @@ def site_context(request):
     
     # إحصائيات الموقع
     try:
-        stats = {
-            'total_governorates': 27,  # Fixed number of Egyptian governorates
-            'total_candidates': Candidate.objects.count(),
-            'total_voters': Citizen.objects.count(),
-            'online_visitors': 0,  # Can be implemented with sessions/cache
-        }
-    except:
+        stats = get_site_stats()
+    except Exception:
         stats = {
             'total_governorates': 27,
             'total_candidates': 0,
@@ -30,12 +25,11 @@ def site_context(request):
             'online_visitors': 0,
         }
     
-    # Add ticker news if available
+    # Ticker news from the precomputed payload
     ticker_news = []
     try:
-        from apps.news.models import News
-        ticker_news = News.get_ticker_news()[:5]
-    except:
+        ticker_news = get_ticker_payload()['items']
+    except Exception:
         pass
     
     return {
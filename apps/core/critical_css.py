@@ -0,0 +1,241 @@
+"""
+Critical CSS
+
+`manage.py build_critical_css` renders the main page types (CRITICAL_CSS_PAGES),
+collects the elements above the fold (the first CRITICAL_CSS_FOLD_ELEMENTS
+elements of <body>) and keeps only the rules of the page's stylesheets whose
+selectors can match them. The result is stored per URL name in
+CRITICAL_CSS_FILE together with the stylesheets it covers:
+
+    {"core:home": {"css": "...", "covers": ["/static/naebak/css/style.css", ...]}}
+
+base.html inlines that CSS in a <style> element and loads the covered
+stylesheets without blocking rendering (rel=preload, switched to stylesheet
+on load). Stylesheets that could not be read at build time stay blocking, so
+a partial build never renders a page unstyled.
+
+The matching is deliberately generous: every compound selector only has to
+match some element above the fold, ancestors are not checked, and attribute
+selectors and pseudo-elements are ignored. Rules that only apply on
+interaction (:hover, :focus, ...) are left to the deferred stylesheet.
+"""
+
+import json
+import re
+from functools import lru_cache
+from html.parser import HTMLParser
+from urllib.parse import urljoin
+
+from django.conf import settings
+from django.templatetags.static import static
+
+from .static_build import minify_css
+
+INTERACTIVE_RE = re.compile(r':(hover|focus|focus-visible|focus-within|active|visited|checked|disabled|invalid|valid)\b')
+PSEUDO_RE = re.compile(r'::?[\w-]+(\((?:[^()]|\([^()]*\))*\))?')
+ATTRIBUTE_RE = re.compile(r'\[[^\]]*\]')
+COMBINATOR_RE = re.compile(r'\s*[>+~]\s*|\s+')
+TAG_RE = re.compile(r'^[a-zA-Z][\w-]*')
+CLASS_RE = re.compile(r'\.((?:\\.|[\w-])+)')
+ID_RE = re.compile(r'#((?:\\.|[\w-])+)')
+URL_RE = re.compile(r'''url\(\s*(['"]?)([^'")]+)\1\s*\)''')
+FONT_FAMILY_RE = re.compile(r'font-family\s*:\s*([^;}]+)')
+# At-rules whose blocks hold rules, and are kept around the rules that match
+GROUPING_RULES = ('@media', '@supports', '@layer', '@container')
+
+
+class FoldParser(HTMLParser):
+    """Collect (tag, id, classes) of the first `limit` elements in <body>"""
+
+    def __init__(self, limit):
+        super().__init__()
+        self.limit = limit
+        self.in_body = False
+        self.elements = [('html', None, frozenset()), ('body', None, frozenset())]
+        self.stylesheets = []
+
+    def handle_starttag(self, tag, attrs):
+        attrs = dict(attrs)
+        if tag == 'link' and 'stylesheet' in (attrs.get('rel') or '').split() and attrs.get('href'):
+            self.stylesheets.append(attrs['href'])
+        if tag == 'body':
+            self.in_body = True
+            self.elements[1] = ('body', attrs.get('id'), frozenset((attrs.get('class') or '').split()))
+        elif self.in_body and len(self.elements) < self.limit:
+            self.elements.append((tag, attrs.get('id'), frozenset((attrs.get('class') or '').split())))
+
+
+def split_blocks(css):
+    """
+    Yield (prelude, body) for each top-level statement of a stylesheet;
+    statements without a block (@import, @charset) have body None
+    """
+    css = re.sub(r'/\*.*?\*/', '', css, flags=re.S)
+    i, n = 0, len(css)
+    start = 0
+    while i < n:
+        char = css[i]
+        if char in '"\'':
+            i = css.find(char, i + 1)
+            i = n if i == -1 else i + 1
+            continue
+        if char == ';':
+            yield css[start:i].strip(), None
+            start = i = i + 1
+            continue
+        if char == '{':
+            depth, j = 1, i + 1
+            while j < n and depth:
+                if css[j] in '"\'':
+                    end = css.find(css[j], j + 1)
+                    j = n if end == -1 else end + 1
+                    continue
+                depth += {'{': 1, '}': -1}.get(css[j], 0)
+                j += 1
+            yield css[start:i].strip(), css[i + 1:j - 1]
+            start = i = j
+            continue
+        i += 1
+
+
+def split_selectors(prelude):
+    """Split a selector list at the commas outside :is()/:not() arguments"""
+    selectors, depth, start = [], 0, 0
+    for i, char in enumerate(prelude):
+        depth += {'(': 1, ')': -1}.get(char, 0)
+        if char == ',' and depth == 0:
+            selectors.append(prelude[start:i])
+            start = i + 1
+    selectors.append(prelude[start:])
+    return selectors
+
+
+def compound_matches(compound, elements):
+    compound = PSEUDO_RE.sub('', ATTRIBUTE_RE.sub('', compound))
+    tag = TAG_RE.match(compound)
+    tag = tag.group().lower() if tag else None
+    classes = set(CLASS_RE.findall(compound))
+    ids = set(ID_RE.findall(compound))
+    if tag is None and not classes and not ids:
+        # `*`, `:root`, `::selection`, `[dir=rtl]`
+        return True
+    return any(
+        (tag is None or tag == element_tag)
+        and classes <= element_classes
+        and all(element_id == id_ for id_ in ids)
+        for element_tag, element_id, element_classes in elements
+    )
+
+
+def selector_matches(selector, elements):
+    selector = selector.strip()
+    if not selector or INTERACTIVE_RE.search(selector):
+        return False
+    compounds = [part for part in COMBINATOR_RE.split(PSEUDO_RE.sub(lambda m: m.group().replace(' ', ''), selector)) if part]
+    return all(compound_matches(compound, elements) for compound in compounds)
+
+
+def absolute_urls(body, base):
+    """Resolve url() references against the stylesheet they came from"""
+    def replace(match):
+        url = match.group(2)
+        if url.startswith(('data:', '#')):
+            return match.group(0)
+        return f'url("{urljoin(base, url)}")'
+
+    return URL_RE.sub(replace, body)
+
+
+def critical_rules(css, elements, base, font_faces):
+    """The rules of a stylesheet that apply above the fold, as CSS text"""
+    out = []
+    for prelude, body in split_blocks(css):
+        if body is None:
+            continue
+        lowered = prelude.lower()
+        if lowered.startswith(GROUPING_RULES):
+            inner = critical_rules(body, elements, base, font_faces)
+            if inner:
+                out.append(f'{prelude}{{{inner}}}')
+        elif lowered.startswith('@font-face'):
+            font_faces.append(absolute_urls(f'{prelude}{{{body}}}', base))
+        elif prelude.startswith('@'):
+            # @keyframes, @page: not needed for the first paint
+            continue
+        else:
+            selectors = [selector for selector in split_selectors(prelude) if selector_matches(selector, elements)]
+            if selectors:
+                out.append(f"{','.join(s.strip() for s in selectors)}{{{absolute_urls(body, base)}}}")
+    return ''.join(out)
+
+
+def used_families(css):
+    return {
+        family.strip().strip('\'"').lower()
+        for value in FONT_FAMILY_RE.findall(css)
+        for family in value.replace('!important', '').split(',')
+    }
+
+
+def extract_critical_css(html, stylesheets):
+    """
+    Critical CSS of a rendered page
+
+    `stylesheets` is a list of (href, css text or None) in document order;
+    returns (css, hrefs covered).
+    """
+    parser = FoldParser(settings.CRITICAL_CSS_FOLD_ELEMENTS)
+    parser.feed(html)
+    rules, font_faces, covers = [], [], []
+    for href, css in stylesheets:
+        if css is None:
+            continue
+        rules.append(critical_rules(css, parser.elements, href, font_faces))
+        covers.append(href)
+
+    css = ''.join(rules)
+    families = used_families(css)
+    # Only the faces the critical rules use, so icon fonts below the fold stay deferred
+    faces = [face for face in font_faces if used_families(face) & families]
+    return minify_css(''.join(faces) + css), covers
+
+
+def stylesheet_hrefs(html):
+    parser = FoldParser(0)
+    parser.feed(html)
+    return parser.stylesheets
+
+
+def static_url(url):
+    """The current (fingerprinted) URL of a /static/ URL recorded at build time"""
+    if not url.startswith(settings.STATIC_URL):
+        return url
+    try:
+        return static(url[len(settings.STATIC_URL):])
+    except ValueError:
+        return url
+
+
+def static_urls(css):
+    return URL_RE.sub(lambda match: f'url("{static_url(match.group(2))}")', css)
+
+
+def load_critical_css():
+    """{url name: {'css', 'covers'}} from CRITICAL_CSS_FILE"""
+    try:
+        with open(settings.CRITICAL_CSS_FILE, encoding='utf-8') as f:
+            pages = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    for page in pages.values():
+        page['css'] = static_urls(page['css'])
+        page['covers'] = {static_url(href) for href in page['covers']}
+    return pages
+
+
+cached_critical_css = lru_cache(maxsize=1)(load_critical_css)
+
+
+def critical_css_for(view_name):
+    pages = load_critical_css() if settings.DEBUG else cached_critical_css()
+    return pages.get(view_name)
@@ -0,0 +1,193 @@
+"""
+Responsive image derivatives
+
+Uploaded images are resized in the background to a few fixed widths in
+modern formats and stored next to the original:
+
+    candidate_profiles/photo.jpg
+    candidate_profiles/photo.w320.webp
+    candidate_profiles/photo.w320.jpeg
+    ...
+
+Models opt in through IMAGE_DERIVATIVE_FIELDS and an `image_derivatives`
+JSONField recording, per image field, which original the derivatives belong
+to and which widths/formats exist. The {% responsive_image %} tag reads that
+manifest from the already loaded row, so emitting srcset costs no query and
+falls back to the original until the worker has run.
+
+Saving a model whose image changed queues an ImageDerivativeJob; the
+process_image_derivatives worker drains the queue.
+"""
+
+import io
+import logging
+import posixpath
+
+from django.apps import apps
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import transaction
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_FIELD = 'image_derivatives'
+MIME_TYPES = {'avif': 'image/avif', 'webp': 'image/webp', 'jpeg': 'image/jpeg'}
+SAVE_OPTIONS = {
+    'avif': {'quality': 60},
+    'webp': {'quality': 80, 'method': 4},
+    'jpeg': {'quality': 82, 'optimize': True, 'progressive': True},
+}
+
+
+def derivative_fields(model):
+    """{field name: widths} configured for a model"""
+    return settings.IMAGE_DERIVATIVE_FIELDS.get(model._meta.label, {})
+
+
+def available_formats():
+    """Configured formats this Pillow build can write, best first"""
+    from PIL import Image
+
+    Image.init()
+    return [fmt for fmt in settings.IMAGE_DERIVATIVE_FORMATS if fmt.upper() in Image.SAVE]
+
+
+def derivative_name(name, width, fmt):
+    stem = posixpath.splitext(name)[0]
+    return f'{stem}.w{width}.{fmt}'
+
+
+def is_stale(instance, field_name):
+    """Whether the derivatives of an image field do not match its current file"""
+    name = getattr(instance, field_name).name or ''
+    manifest = getattr(instance, MANIFEST_FIELD).get(field_name) or {}
+    return manifest.get('src', '') != name
+
+
+def delete_derivatives(storage, manifest):
+    for width in manifest.get('widths', []):
+        for fmt in manifest.get('formats', []):
+            try:
+                storage.delete(derivative_name(manifest['src'], width, fmt))
+            except Exception as e:
+                logger.warning(f"Could not delete image derivative: {e}")
+
+
+def generate_derivatives(field_file, widths):
+    """
+    Write resized copies of an image and return their manifest entry
+
+    Widths larger than the original are skipped; the original is then the
+    largest candidate in srcset.
+    """
+    from PIL import Image, ImageOps
+
+    with field_file.open('rb') as f, Image.open(f) as original:
+        original = ImageOps.exif_transpose(original)
+        original_width = original.width
+        formats = available_formats()
+        generated = []
+        for width in sorted(set(widths)):
+            if width >= original_width:
+                continue
+            height = max(1, round(original.height * width / original_width))
+            resized = original.resize((width, height), Image.LANCZOS)
+            for fmt in formats:
+                image = resized
+                if fmt == 'jpeg' and image.mode not in ('RGB', 'L'):
+                    image = image.convert('RGB')
+                buffer = io.BytesIO()
+                image.save(buffer, fmt.upper(), **SAVE_OPTIONS.get(fmt, {}))
+                name = derivative_name(field_file.name, width, fmt)
+                if field_file.storage.exists(name):
+                    field_file.storage.delete(name)
+                field_file.storage.save(name, ContentFile(buffer.getvalue()))
+            generated.append(width)
+
+    return {'src': field_file.name, 'width': original_width, 'widths': generated, 'formats': formats}
+
+
+def refresh_derivatives(instance, field_names=None):
+    """Regenerate the derivatives of an object's stale image fields and save the manifest"""
+    manifest = dict(getattr(instance, MANIFEST_FIELD) or {})
+    changed = False
+    for field_name, widths in derivative_fields(type(instance)).items():
+        if field_names is not None and field_name not in field_names:
+            continue
+        field_file = getattr(instance, field_name)
+        old = manifest.get(field_name)
+        if old and old.get('src') != field_file.name:
+            delete_derivatives(field_file.storage, old)
+        if field_file:
+            try:
+                manifest[field_name] = generate_derivatives(field_file, widths)
+            except Exception as e:
+                logger.warning(f"Could not create derivatives for {field_file.name}: {e}")
+                manifest[field_name] = {'src': field_file.name, 'widths': [], 'formats': []}
+        else:
+            manifest.pop(field_name, None)
+        changed = True
+    if changed:
+        setattr(instance, MANIFEST_FIELD, manifest)
+        # A normal save, so the cache invalidation signals of the model run
+        instance.save(update_fields=[MANIFEST_FIELD])
+    return changed
+
+
+def queue_stale(instance):
+    """Queue the object's image fields whose derivatives are out of date"""
+    from .models import ImageDerivativeJob
+
+    for field_name in derivative_fields(type(instance)):
+        if is_stale(instance, field_name):
+            ImageDerivativeJob.objects.get_or_create(
+                model=instance._meta.label, object_id=instance.pk, field_name=field_name,
+            )
+
+
+def process_jobs(limit=20):
+    """Run queued derivative jobs; returns how many were handled"""
+    from .models import ImageDerivativeJob
+
+    processed = 0
+    while processed < limit:
+        with transaction.atomic():
+            job = ImageDerivativeJob.objects.select_for_update(skip_locked=True).order_by('created_at').first()
+            if job is None:
+                break
+            job.delete()
+        try:
+            instance = apps.get_model(job.model)._default_manager.get(pk=job.object_id)
+            refresh_derivatives(instance, [job.field_name])
+        except LookupError:
+            pass
+        except Exception as e:
+            logger.exception(f"Image derivative job {job.model}:{job.object_id}:{job.field_name} failed: {e}")
+        processed += 1
+    return processed
+
+
+def srcset_context(field_file, manifest, sizes):
+    """
+    Sources for a <picture> element: one srcset per format plus a fallback
+    """
+    url = field_file.storage.url
+    entry = manifest or {}
+    if not entry.get('widths') or entry.get('src') != field_file.name:
+        return {'src': field_file.url, 'sources': [], 'srcset': '', 'sizes': sizes}
+
+    def srcset(fmt):
+        return ', '.join(f"{url(derivative_name(field_file.name, w, fmt))} {w}w" for w in entry['widths'])
+
+    formats = entry['formats']
+    fallback = 'jpeg' if 'jpeg' in formats else None
+    # The original is the largest candidate of the fallback <img>
+    img_srcset = srcset(fallback) if fallback else ''
+    if img_srcset and entry.get('width'):
+        img_srcset += f", {field_file.url} {entry['width']}w"
+    return {
+        'src': field_file.url,
+        'sources': [{'type': MIME_TYPES[fmt], 'srcset': srcset(fmt)} for fmt in formats if fmt != fallback],
+        'srcset': img_srcset,
+        'sizes': sizes,
+    }
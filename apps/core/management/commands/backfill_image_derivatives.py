@@ -0,0 +1,48 @@
+"""
+Create responsive derivatives for images uploaded before they existed
+
+    python manage.py backfill_image_derivatives            # queue for the worker
+    python manage.py backfill_image_derivatives --now      # generate in this process
+    python manage.py backfill_image_derivatives --force    # also redo fresh ones
+
+Covers every model and field listed in IMAGE_DERIVATIVE_FIELDS.
+"""
+
+from django.apps import apps
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+
+from apps.core.images import is_stale, refresh_derivatives
+from apps.core.models import ImageDerivativeJob
+
+
+class Command(BaseCommand):
+    help = 'Queue or generate responsive image derivatives for existing images'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--now', action='store_true', help='Generate derivatives instead of queueing them')
+        parser.add_argument('--force', action='store_true', help='Regenerate derivatives that are up to date')
+
+    def handle(self, *args, **options):
+        queued = generated = 0
+        for label, fields in settings.IMAGE_DERIVATIVE_FIELDS.items():
+            model = apps.get_model(label)
+            has_image = Q()
+            for field_name in fields:
+                has_image |= ~Q(**{field_name: ''}) & Q(**{f'{field_name}__isnull': False})
+            for instance in model._default_manager.filter(has_image).iterator():
+                field_names = [name for name in fields if options['force'] or is_stale(instance, name)]
+                if not field_names:
+                    continue
+                if options['now']:
+                    refresh_derivatives(instance, field_names)
+                    generated += len(field_names)
+                else:
+                    for field_name in field_names:
+                        ImageDerivativeJob.objects.get_or_create(
+                            model=label, object_id=instance.pk, field_name=field_name,
+                        )
+                    queued += len(field_names)
+
+        self.stdout.write(self.style.SUCCESS(f'{generated} image fields generated, {queued} queued.'))
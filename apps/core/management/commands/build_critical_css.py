@@ -0,0 +1,109 @@
+"""
+Extract the critical CSS of the main page types
+
+    python manage.py build_critical_css
+    python manage.py build_critical_css --only core:home
+
+Pages are rendered in-process with the test client against the configured
+database (run generate_election_data first on an empty one). Local
+stylesheets are read through the staticfiles finders, remote ones (Bootstrap,
+Font Awesome) are downloaded; a stylesheet that cannot be read stays
+render-blocking on that page. Commit the resulting CRITICAL_CSS_FILE after
+changing templates or styles.
+"""
+
+import json
+import urllib.request
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.staticfiles import finders
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.management.base import BaseCommand
+from django.db.models import Count
+from django.test import Client
+from django.urls import NoReverseMatch, reverse
+
+from apps.candidates.models import Candidate
+from apps.core.critical_css import extract_critical_css, stylesheet_hrefs
+from apps.core.utils import get_governorate_by_id
+
+
+class Command(BaseCommand):
+    help = 'Render the main pages and store the CSS they need above the fold'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--only', nargs='*', help='Rebuild only these URL names')
+        parser.add_argument('--timeout', type=int, default=10, help='Timeout for downloading remote stylesheets')
+
+    def handle(self, *args, **options):
+        output = Path(settings.CRITICAL_CSS_FILE)
+        pages = json.loads(output.read_text(encoding='utf-8')) if output.exists() else {}
+        client = Client(raise_request_exception=False)
+        stylesheets = {}
+
+        for view_name in settings.CRITICAL_CSS_PAGES:
+            if options['only'] and view_name not in options['only']:
+                continue
+            url = self.page_url(view_name)
+            response = client.get(url) if url else None
+            if response is None or response.status_code != 200:
+                status = response.status_code if response is not None else 'no URL'
+                self.stdout.write(self.style.WARNING(f'{view_name}: skipped ({status})'))
+                continue
+
+            html = response.content.decode('utf-8')
+            hrefs = [self.source_href(href) for href in stylesheet_hrefs(html)]
+            for href in hrefs:
+                if href not in stylesheets:
+                    stylesheets[href] = self.read_stylesheet(href, options['timeout'])
+            css, covers = extract_critical_css(html, [(href, stylesheets[href]) for href in hrefs])
+            pages[view_name] = {'css': css, 'covers': covers}
+            blocking = len(hrefs) - len(covers)
+            self.stdout.write(f'{view_name:<30} {len(css) / 1024:6.1f} KB critical, {len(covers)} deferred, {blocking} blocking')
+
+        output.parent.mkdir(parents=True, exist_ok=True)
+        output.write_text(json.dumps(pages, ensure_ascii=False, indent=2, sort_keys=True), encoding='utf-8')
+        self.stdout.write(self.style.SUCCESS(f'Critical CSS written to {output}'))
+
+    def page_url(self, view_name):
+        """URL of a representative page for a URL name, from the current data"""
+        args = []
+        if view_name == 'candidates:candidate_detail':
+            candidate = Candidate.objects.order_by('-id').first()
+            if candidate is None:
+                return None
+            args = [candidate.pk]
+        elif view_name == 'core:governorate_detail':
+            busiest = Candidate.objects.values('governorate_id').annotate(n=Count('id')).order_by('-n').first()
+            governorate = get_governorate_by_id(busiest['governorate_id']) if busiest else None
+            if governorate is None:
+                return None
+            args = [governorate['slug']]
+        try:
+            return reverse(view_name, args=args)
+        except NoReverseMatch:
+            return None
+
+    def source_href(self, href):
+        """Record local stylesheets under their unhashed /static/ URL"""
+        if not href.startswith(settings.STATIC_URL):
+            return href
+        path = href[len(settings.STATIC_URL):]
+        for name, hashed_name in getattr(staticfiles_storage, 'hashed_files', {}).items():
+            if hashed_name == path:
+                return settings.STATIC_URL + name
+        return href
+
+    def read_stylesheet(self, href, timeout):
+        try:
+            if href.startswith(settings.STATIC_URL):
+                path = finders.find(href[len(settings.STATIC_URL):])
+                return Path(path).read_text(encoding='utf-8') if path else None
+            if href.startswith('//'):
+                href = 'https:' + href
+            with urllib.request.urlopen(href, timeout=timeout) as response:
+                return response.read().decode('utf-8')
+        except (OSError, ValueError) as e:
+            self.stdout.write(self.style.WARNING(f'Could not read {href}: {e}'))
+            return None
@@ -0,0 +1,62 @@
+"""
+Collect static files through the optimizing storage and report the savings
+
+    python manage.py build_static --settings=config.settings.prod
+    python manage.py build_static --json static-build.json
+
+Needs STORAGES['staticfiles'] to be apps.core.static_build.OptimizedStaticFilesStorage
+(as in production with STATIC_BACKEND=local). Sizes are listed per asset:
+the source file, the optimized file and its gzip/brotli variants.
+"""
+
+import json
+
+from django.core.files.storage import storages
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.core.static_build import OptimizedStaticFilesStorage
+
+
+def kilobytes(size):
+    return f'{size / 1024:.1f}' if size is not None else '-'
+
+
+class Command(BaseCommand):
+    help = 'Minify, fingerprint and precompress static files and report bytes saved per asset'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--clear', action='store_true', help='Delete STATIC_ROOT contents first')
+        parser.add_argument('--json', help='Also write the report to this file')
+
+    def handle(self, *args, **options):
+        storage = storages['staticfiles']
+        if not isinstance(storage, OptimizedStaticFilesStorage):
+            raise CommandError(
+                "STORAGES['staticfiles'] must be apps.core.static_build.OptimizedStaticFilesStorage"
+            )
+
+        call_command('collectstatic', interactive=False, clear=options['clear'], verbosity=0)
+        report = storage.build_report or {}
+
+        self.stdout.write(f"{'asset':<50} {'source':>8} {'built':>8} {'gzip':>8} {'brotli':>8} {'saved':>6}  (KB)")
+        total_source = total_served = 0
+        for name, sizes in sorted(report.items()):
+            served = min(size for size in (sizes['built'], sizes.get('gzip'), sizes.get('brotli')) if size is not None)
+            total_source += sizes['source']
+            total_served += served
+            saved = 100 * (1 - served / sizes['source']) if sizes['source'] else 0
+            self.stdout.write(
+                f"{sizes.get('name', name):<50} {kilobytes(sizes['source']):>8} {kilobytes(sizes['built']):>8} "
+                f"{kilobytes(sizes.get('gzip')):>8} {kilobytes(sizes.get('brotli')):>8} {saved:>5.0f}%"
+            )
+
+        if options['json']:
+            with open(options['json'], 'w') as f:
+                json.dump(report, f, indent=2, sort_keys=True)
+
+        saved = total_source - total_served
+        self.stdout.write(self.style.SUCCESS(
+            f'{len(report)} assets optimized: {kilobytes(total_source)} KB -> {kilobytes(total_served)} KB '
+            f'({kilobytes(saved)} KB saved).'
+        ))
@@ -0,0 +1,277 @@
+"""
+Generate a synthetic, election-scale dataset with bulk inserts
+
+    python manage.py generate_election_data --candidates 5000 --citizens 2000000 \
+        --votes 20000000 --ratings 5000000 --messages 1000000 --activity-logs 10000000
+
+Every generated account uses the same username prefix so repeated runs append
+to the dataset instead of colliding. Candidate popularity follows a Zipf-like
+distribution so votes, ratings and messages are skewed the way real traffic is.
+"""
+
+import bisect
+import itertools
+import random
+import time
+import zlib
+from datetime import timedelta
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+
+from apps.accounts.models import Citizen
+from apps.candidates.models import Candidate
+from apps.core.models import ActivityLog, Governorate
+from apps.core.utils import load_governorates_data
+from apps.messaging.conversations import rebuild_conversations
+from apps.messaging.models import Message
+from apps.voting.models import Rating, Vote
+
+
+FIRST_NAMES = ['أحمد', 'محمد', 'محمود', 'مصطفى', 'علي', 'حسن', 'عمر', 'خالد', 'فاطمة', 'عائشة', 'مريم', 'نورا', 'سارة', 'هبة', 'ياسمين', 'منى']
+LAST_NAMES = ['السيد', 'إبراهيم', 'عبد الله', 'حسين', 'عبد الرحمن', 'مصطفى', 'سليمان', 'الشريف', 'النجار', 'فهمي']
+AREA_TYPES = ['مدينة', 'مركز', 'قرية', 'حي']
+ACTION_TYPES = ['login', 'logout', 'message_sent', 'rating_given', 'vote_cast', 'profile_update']
+# Citizen phone numbers have 8 free digits after 01X
+MAX_CITIZENS = 10 ** 8
+
+
+class Command(BaseCommand):
+    help = 'Generate synthetic election-scale data (candidates, citizens, votes, ratings, messages, activity logs)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--candidates', type=int, default=5000)
+        parser.add_argument('--citizens', type=int, default=100000)
+        parser.add_argument('--votes', type=int, default=1000000)
+        parser.add_argument('--ratings', type=int, default=250000)
+        parser.add_argument('--messages', type=int, default=50000)
+        parser.add_argument('--activity-logs', type=int, default=500000)
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--days', type=int, default=90, help='Spread timestamps over this many past days')
+        parser.add_argument('--prefix', default='bench', help='Username prefix of generated accounts')
+        parser.add_argument('--seed', type=int, default=2025)
+
+    def handle(self, *args, **options):
+        self.batch_size = options['batch_size']
+        self.prefix = options['prefix']
+        self.days = options['days']
+        self.now = timezone.now()
+        self.random = random.Random(options['seed'])
+        # Every generated account shares one hash; hashing millions of passwords is not the point here
+        self.password = make_password('password123')
+
+        governorates = load_governorates_data()
+        if not governorates:
+            raise CommandError('Governorates data is empty; cannot assign candidates to governorates.')
+        self.governorates = governorates
+        self.governorate_rows = self.ensure_governorate_rows(governorates)
+
+        if self.next_index('citizen') + options['citizens'] > MAX_CITIZENS:
+            raise CommandError(
+                f'At most {MAX_CITIZENS:,} citizens per prefix get unique phone numbers; use another --prefix.'
+            )
+
+        candidate_ids = self.create_candidates(options['candidates'])
+        citizen_user_ids = self.create_citizens(options['citizens'])
+        if not candidate_ids or not citizen_user_ids:
+            raise CommandError('At least one candidate and one citizen are required to generate interactions.')
+
+        self.weights = self.popularity_weights(len(candidate_ids))
+        self.create_votes(candidate_ids, citizen_user_ids, options['votes'])
+        self.create_ratings(candidate_ids, citizen_user_ids, options['ratings'])
+        self.create_messages(candidate_ids, citizen_user_ids, options['messages'])
+        self.create_activity_logs(citizen_user_ids, options['activity_logs'])
+
+        self.stdout.write(self.style.SUCCESS('Synthetic election data generated.'))
+
+    # Helpers
+
+    def log(self, label, count, started):
+        elapsed = time.perf_counter() - started
+        rate = count / elapsed if elapsed else 0
+        self.stdout.write(f'{label}: {count:,} rows in {elapsed:.1f}s ({rate:,.0f} rows/s)')
+
+    def random_timestamp(self):
+        return self.now - timedelta(seconds=self.random.randint(0, self.days * 86400))
+
+    def popularity_weights(self, n):
+        """Cumulative Zipf-like weights so a few candidates receive most interactions"""
+        return list(itertools.accumulate(1.0 / (rank + 1) for rank in range(n)))
+
+    def pick_candidate(self, candidate_ids):
+        total = self.weights[-1]
+        return candidate_ids[bisect.bisect_left(self.weights, self.random.random() * total)]
+
+    def ensure_governorate_rows(self, governorates):
+        rows = []
+        for gov in governorates:
+            row, _ = Governorate.objects.get_or_create(name=gov['name_ar'])
+            rows.append(row)
+        return rows
+
+    def next_index(self, kind):
+        return User.objects.filter(username__startswith=f'{self.prefix}_{kind}_').count()
+
+    def create_users(self, kind, start, count):
+        users = []
+        for i in range(start, start + count):
+            first_name = self.random.choice(FIRST_NAMES)
+            last_name = self.random.choice(LAST_NAMES)
+            users.append(User(
+                username=f'{self.prefix}_{kind}_{i}',
+                email=f'{self.prefix}_{kind}_{i}@example.com',
+                first_name=first_name,
+                last_name=last_name,
+                password=self.password,
+            ))
+        return User.objects.bulk_create(users, batch_size=self.batch_size)
+
+    # Generators
+
+    def create_candidates(self, total):
+        started = time.perf_counter()
+        start = self.next_index('candidate')
+        for offset in range(0, total, self.batch_size):
+            count = min(self.batch_size, total - offset)
+            with transaction.atomic():
+                users = self.create_users('candidate', start + offset, count)
+                candidates = []
+                for i, user in enumerate(users):
+                    gov = self.random.choice(self.governorates)
+                    candidates.append(Candidate(
+                        user=user,
+                        name=f'{user.first_name} {user.last_name}',
+                        governorate_id=gov['id'],
+                        constituency=f'دائرة {gov["name_ar"]} {self.random.randint(1, 10)}',
+                        bio='مرشح لمجلس النواب',
+                        electoral_program='برنامج انتخابي تجريبي',
+                        is_featured=self.random.random() < 0.01,
+                        election_number=str(start + offset + i + 1),
+                    ))
+                Candidate.objects.bulk_create(candidates, batch_size=self.batch_size)
+        self.log('Candidates', total, started)
+        return list(Candidate.objects.filter(user__username__startswith=f'{self.prefix}_candidate_').values_list('id', flat=True))
+
+    def citizen_phone(self, index):
+        """
+        A valid 11-digit phone number, unique for every index of a prefix below
+        MAX_CITIZENS (citizen phones are unique); the prefix only shifts the range
+        """
+        prefix_code = zlib.crc32(self.prefix.encode()) % 100
+        return f'01{"0125"[index % 4]}{(prefix_code * 10**6 + index) % MAX_CITIZENS:08d}'
+
+    def create_citizens(self, total):
+        started = time.perf_counter()
+        start = self.next_index('citizen')
+        for offset in range(0, total, self.batch_size):
+            count = min(self.batch_size, total - offset)
+            with transaction.atomic():
+                users = self.create_users('citizen', start + offset, count)
+                citizens = []
+                for i, user in enumerate(users, start + offset):
+                    governorate = self.random.choice(self.governorate_rows)
+                    citizens.append(Citizen(
+                        user=user,
+                        first_name=user.first_name,
+                        last_name=user.last_name,
+                        email=user.email,
+                        phone_number=self.citizen_phone(i),
+                        governorate=governorate,
+                        area_type=self.random.choice(AREA_TYPES),
+                        area_name=governorate.name,
+                        address=f'شارع {self.random.randint(1, 200)}، {governorate.name}',
+                    ))
+                for citizen in citizens:
+                    citizen.set_lookup_fields()
+                Citizen.objects.bulk_create(citizens, batch_size=self.batch_size)
+        self.log('Citizens', total, started)
+        return list(User.objects.filter(username__startswith=f'{self.prefix}_citizen_').values_list('id', flat=True))
+
+    def unique_pairs(self, candidate_ids, citizen_user_ids, total):
+        """
+        Yield distinct (candidate_id, citizen_id) pairs honouring unique_together
+
+        Each citizen interacts with several candidates, picked by popularity.
+        """
+        per_citizen = max(1, -(-total // len(citizen_user_ids)))
+        per_citizen = min(per_citizen, len(candidate_ids))
+        produced = 0
+        for citizen_id in citizen_user_ids:
+            chosen = set()
+            attempts = 0
+            while len(chosen) < per_citizen and attempts < per_citizen * 20:
+                chosen.add(self.pick_candidate(candidate_ids))
+                attempts += 1
+            for candidate_id in chosen:
+                yield candidate_id, citizen_id
+                produced += 1
+                if produced >= total:
+                    return
+
+    def bulk_insert(self, label, model, rows):
+        started = time.perf_counter()
+        inserted = 0
+        for batch in iter(lambda: list(itertools.islice(rows, self.batch_size)), []):
+            # Rows from an earlier run are skipped instead of failing the whole batch
+            model.objects.bulk_create(batch, ignore_conflicts=True)
+            inserted += len(batch)
+        self.log(label, inserted, started)
+
+    def create_votes(self, candidate_ids, citizen_user_ids, total):
+        rows = (
+            Vote(
+                candidate_id=candidate_id,
+                citizen_id=citizen_id,
+                vote_type='approve' if self.random.random() < 0.7 else 'disapprove',
+                timestamp=self.random_timestamp(),
+            )
+            for candidate_id, citizen_id in self.unique_pairs(candidate_ids, citizen_user_ids, total)
+        )
+        self.bulk_insert('Votes', Vote, rows)
+
+    def create_ratings(self, candidate_ids, citizen_user_ids, total):
+        rows = (
+            Rating(
+                candidate_id=candidate_id,
+                citizen_id=citizen_id,
+                stars=self.random.choices([1, 2, 3, 4, 5], weights=[1, 1, 2, 3, 3])[0],
+                comment='' if self.random.random() < 0.6 else 'تعليق تجريبي',
+                timestamp=self.random_timestamp(),
+            )
+            for candidate_id, citizen_id in self.unique_pairs(candidate_ids, citizen_user_ids, total)
+        )
+        self.bulk_insert('Ratings', Rating, rows)
+
+    def create_messages(self, candidate_ids, citizen_user_ids, total):
+        rows = (
+            Message(
+                candidate_id=self.pick_candidate(candidate_ids),
+                sender_user_id=self.random.choice(citizen_user_ids),
+                subject=f'رسالة تجريبية {i}',
+                content='محتوى رسالة تجريبية من مواطن إلى مرشح.',
+                timestamp=self.random_timestamp(),
+                is_read=self.random.random() < 0.5,
+            )
+            for i in range(total)
+        )
+        self.bulk_insert('Messages', Message, rows)
+        # bulk_create skips the signals that maintain conversation summaries
+        if total:
+            rebuild_conversations(self.batch_size)
+
+    def create_activity_logs(self, citizen_user_ids, total):
+        rows = (
+            ActivityLog(
+                user_id=self.random.choice(citizen_user_ids),
+                action_type=action_type,
+                description=f'نشاط تجريبي: {action_type}',
+                severity='info' if self.random.random() < 0.97 else 'warning',
+                ip_address=f'10.{self.random.randint(0, 255)}.{self.random.randint(0, 255)}.{self.random.randint(1, 254)}',
+                timestamp=self.random_timestamp(),
+            )
+            for action_type in (self.random.choice(ACTION_TYPES) for _ in range(total))
+        )
+        self.bulk_insert('Activity logs', ActivityLog, rows)
@@ -0,0 +1,57 @@
+"""
+Import candidates or citizens from a CSV file
+
+    python manage.py import_users candidates candidates.csv
+    python manage.py import_users citizens citizens.csv --dry-run
+    python manage.py import_users citizens citizens.csv --workers 8 --batch-size 1000
+
+See apps.core.bulk_import for the expected columns. Invalid rows are listed
+with their line number and skipped; --dry-run only validates.
+"""
+
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.core.bulk_import import COLUMNS, ImportBatchError, ImportFileError, import_file
+
+
+class Command(BaseCommand):
+    help = 'Create candidate or citizen accounts in bulk from a CSV file'
+
+    def add_arguments(self, parser):
+        parser.add_argument('kind', choices=sorted(COLUMNS))
+        parser.add_argument('path')
+        parser.add_argument('--dry-run', action='store_true', help='Validate the file without creating accounts')
+        parser.add_argument('--batch-size', type=int, help='Rows per transaction (default: USER_IMPORT_BATCH_SIZE)')
+        parser.add_argument('--workers', type=int, help='Password hashing processes (default: USER_IMPORT_HASH_WORKERS)')
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        try:
+            with open(options['path'], 'rb') as f:
+                created, errors = import_file(
+                    options['kind'], f,
+                    dry_run=options['dry_run'],
+                    batch_size=options['batch_size'],
+                    workers=options['workers'],
+                )
+        except (OSError, ImportFileError) as e:
+            raise CommandError(str(e))
+        except ImportBatchError as e:
+            self.write_errors(e.errors)
+            raise CommandError(f'{e.created} {options["kind"]} imported before the import stopped: {e}')
+
+        self.write_errors(errors)
+        skipped = len({line for line, _ in errors})
+        elapsed = time.perf_counter() - started
+        if options['dry_run']:
+            self.stdout.write(self.style.SUCCESS(f'Validation finished: {skipped} invalid rows ({elapsed:.1f}s).'))
+        else:
+            self.stdout.write(self.style.SUCCESS(
+                f'{created} {options["kind"]} imported, {skipped} rows skipped ({elapsed:.1f}s).'
+            ))
+
+    def write_errors(self, errors):
+        for line, message in errors:
+            self.stdout.write(self.style.WARNING(f'line {line}: {message}'))
@@ -0,0 +1,61 @@
+"""
+Generate responsive image derivatives in the background
+
+    python manage.py process_image_derivatives            # long-running worker
+    python manage.py process_image_derivatives --once     # single pass, e.g. from cron
+
+Saving an image field listed in IMAGE_DERIVATIVE_FIELDS queues a job; this
+worker resizes the image and records the result on the object.
+"""
+
+import signal
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from apps.core.images import process_jobs
+
+
+class Command(BaseCommand):
+    help = 'Process queued responsive image derivative jobs'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='Process queued jobs and exit')
+        parser.add_argument('--interval', type=float, default=5.0,
+                            help='Seconds to sleep when the queue is empty')
+
+    def handle(self, *args, **options):
+        if options['once']:
+            processed = 0
+            while True:
+                batch = process_jobs()
+                processed += batch
+                if not batch:
+                    break
+            self.stdout.write(self.style.SUCCESS(f'{processed} image jobs processed.'))
+            return
+
+        self.running = True
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGINT, self.stop)
+        self.stdout.write('Image derivative worker started.')
+
+        while self.running:
+            close_old_connections()
+            processed = process_jobs()
+            if processed:
+                self.stdout.write(f'{processed} image jobs processed.')
+            else:
+                self.sleep(options['interval'])
+
+        self.stdout.write('Image derivative worker stopped.')
+
+    def sleep(self, seconds):
+        # Sleep in short steps so a stop signal is handled promptly
+        deadline = time.monotonic() + seconds
+        while self.running and time.monotonic() < deadline:
+            time.sleep(min(1.0, max(0.0, deadline - time.monotonic())))
+
+    def stop(self, signum, frame):
+        self.running = False
@@ -0,0 +1,56 @@
+"""
+Run the candidate/citizen imports uploaded in the admin
+
+    python manage.py process_user_imports            # long-running worker
+    python manage.py process_user_imports --once     # single pass, e.g. from cron
+
+Imports are CPU heavy (password hashing), so they run here instead of in the
+web workers that received the upload.
+"""
+
+import signal
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from apps.core.bulk_import import process_imports
+
+
+class Command(BaseCommand):
+    help = 'Import the candidate and citizen files uploaded in the admin'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='Run waiting imports and exit')
+        parser.add_argument('--interval', type=float, default=10.0,
+                            help='Seconds to sleep when no import is waiting')
+
+    def handle(self, *args, **options):
+        if options['once']:
+            processed = process_imports(limit=100)
+            self.stdout.write(self.style.SUCCESS(f'{processed} imports processed.'))
+            return
+
+        self.running = True
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGINT, self.stop)
+        self.stdout.write('Import worker started.')
+
+        while self.running:
+            close_old_connections()
+            processed = process_imports(limit=1)
+            if processed:
+                self.stdout.write(f'{processed} imports processed.')
+            else:
+                self.sleep(options['interval'])
+
+        self.stdout.write('Import worker stopped.')
+
+    def sleep(self, seconds):
+        # Sleep in short steps so a stop signal is handled promptly
+        deadline = time.monotonic() + seconds
+        while self.running and time.monotonic() < deadline:
+            time.sleep(min(1.0, max(0.0, deadline - time.monotonic())))
+
+    def stop(self, signum, frame):
+        self.running = False
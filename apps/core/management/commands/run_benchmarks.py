@@ -0,0 +1,161 @@
+"""
+Benchmark the hot public pages and write a comparable JSON results file
+
+    python manage.py run_benchmarks --iterations 20
+    python manage.py run_benchmarks --compare benchmarks/results/20250101-120000.json
+
+Pages are requested in-process through the Django test client against the
+configured database, so run generate_election_data first for realistic numbers.
+"""
+
+import json
+import platform
+import statistics
+import subprocess
+import time
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.db.models import Count
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import NoReverseMatch, reverse
+from django.utils import timezone
+
+from apps.accounts.models import Citizen
+from apps.candidates.models import Candidate
+from apps.core.utils import get_governorate_by_id
+from apps.messaging.models import Message
+from apps.voting.models import Rating, Vote
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))
+    return ordered[index]
+
+
+class Command(BaseCommand):
+    help = 'Measure latency and query counts of the public pages and save the results as JSON'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=10)
+        parser.add_argument('--warmup', type=int, default=2)
+        parser.add_argument('--output', help='Results file (default: benchmarks/results/<timestamp>.json)')
+        parser.add_argument('--compare', help='Previous results file to compare against')
+        parser.add_argument('--only', nargs='*', help='Benchmark only these page names')
+
+    def handle(self, *args, **options):
+        client = Client(raise_request_exception=False)
+        pages = self.get_pages()
+        if options['only']:
+            pages = [page for page in pages if page[0] in options['only']]
+
+        results = {}
+        for name, url in pages:
+            if url is None:
+                self.stdout.write(self.style.WARNING(f'{name}: skipped (URL not available)'))
+                continue
+            results[name] = self.benchmark(client, url, options['iterations'], options['warmup'])
+            r = results[name]
+            self.stdout.write(
+                f'{name:<28} {r["status"]}  median {r["median_ms"]:8.1f} ms  p95 {r["p95_ms"]:8.1f} ms  queries {r["queries"]}'
+            )
+
+        report = {
+            'created_at': timezone.now().isoformat(),
+            'git_commit': self.git_commit(),
+            'python': platform.python_version(),
+            'database': connection.vendor,
+            'settings_module': settings.SETTINGS_MODULE,
+            'iterations': options['iterations'],
+            'dataset': {
+                'candidates': Candidate.objects.count(),
+                'citizens': Citizen.objects.count(),
+                'votes': Vote.objects.count(),
+                'ratings': Rating.objects.count(),
+                'messages': Message.objects.count(),
+            },
+            'results': results,
+        }
+
+        output = Path(options['output'] or Path(settings.BASE_DIR) / 'benchmarks' / 'results' / f'{timezone.now():%Y%m%d-%H%M%S}.json')
+        output.parent.mkdir(parents=True, exist_ok=True)
+        output.write_text(json.dumps(report, ensure_ascii=False, indent=2), encoding='utf-8')
+        self.stdout.write(self.style.SUCCESS(f'Results written to {output}'))
+
+        if options['compare']:
+            self.compare(json.loads(Path(options['compare']).read_text(encoding='utf-8')), report)
+
+    def get_pages(self):
+        """Build (name, url) pairs for the benchmarked pages from the current data"""
+        candidate = Candidate.objects.order_by('-id').first()
+        busiest = Candidate.objects.values('governorate_id').annotate(n=Count('id')).order_by('-n').first()
+        governorate = get_governorate_by_id(busiest['governorate_id']) if busiest else None
+
+        def url(name, *args, query=''):
+            try:
+                return reverse(name, args=args) + query
+            except NoReverseMatch:
+                return None
+
+        return [
+            ('home', url('core:home')),
+            ('governorates', url('core:governorates')),
+            ('governorate_detail', url('core:governorate_detail', governorate['slug']) if governorate else None),
+            ('candidate_list', url('candidates:candidate_list')),
+            ('candidate_list_sorted', url('candidates:candidate_list', query='?sort=rating')),
+            ('candidate_detail', url('candidates:candidate_detail', candidate.pk) if candidate else None),
+            ('api_governorates_search', url('core:api_governorates_search', query='?q=ال')),
+            ('api_candidates_search', url('core:api_candidates_search', query='?q=أحمد')),
+            ('rating_list', url('voting:rating_list')),
+            ('vote_list', url('voting:vote_list')),
+        ]
+
+    def benchmark(self, client, url, iterations, warmup):
+        for _ in range(warmup):
+            client.get(url)
+
+        timings = []
+        queries = []
+        status = None
+        for _ in range(iterations):
+            with CaptureQueriesContext(connection) as context:
+                start = time.perf_counter()
+                response = client.get(url)
+                timings.append((time.perf_counter() - start) * 1000)
+            queries.append(len(context.captured_queries))
+            status = response.status_code
+
+        return {
+            'url': url,
+            'status': status,
+            'min_ms': round(min(timings), 2),
+            'median_ms': round(statistics.median(timings), 2),
+            'p95_ms': round(percentile(timings, 0.95), 2),
+            'max_ms': round(max(timings), 2),
+            'queries': max(queries),
+        }
+
+    def compare(self, previous, current):
+        self.stdout.write(f'\nCompared with run of {previous.get("created_at")} ({previous.get("git_commit")}):')
+        for name, result in current['results'].items():
+            before = previous.get('results', {}).get(name)
+            if not before:
+                continue
+            change = (result['median_ms'] - before['median_ms']) / before['median_ms'] * 100 if before['median_ms'] else 0
+            style = self.style.ERROR if change > 10 else self.style.SUCCESS if change < -10 else str
+            self.stdout.write(style(
+                f'{name:<28} median {before["median_ms"]:8.1f} -> {result["median_ms"]:8.1f} ms ({change:+.0f}%)'
+                f'  queries {before["queries"]} -> {result["queries"]}'
+            ))
+
+    def git_commit(self):
+        try:
+            return subprocess.check_output(
+                ['git', 'rev-parse', '--short', 'HEAD'], cwd=settings.BASE_DIR, stderr=subprocess.DEVNULL
+            ).decode().strip()
+        except (OSError, subprocess.CalledProcessError):
+            return None
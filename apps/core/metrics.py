@@ -0,0 +1,284 @@
+"""
+Request latency and throughput metrics
+
+Counters are kept in Redis when the default cache is django_redis so that all
+gunicorn workers feed the same numbers, and in process memory otherwise
+(development, tests). The collected data is exported in the Prometheus text
+format.
+"""
+
+import logging
+import threading
+from collections import defaultdict
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+METRICS_PREFIX = 'naebak:metrics'
+
+
+class LocalMetricsStore:
+    """In-process metrics store, used when Redis is not configured"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self.lock:
+            self.requests = defaultdict(int)
+            self.buckets = defaultdict(int)
+            self.duration_sum = defaultdict(float)
+            self.duration_count = defaultdict(int)
+            self.in_flight = 0
+            self.logins = defaultdict(int)
+            self.login_buckets = defaultdict(int)
+            self.login_duration_sum = 0.0
+
+    def request_started(self):
+        with self.lock:
+            self.in_flight += 1
+
+    def request_finished(self, route, method, status, duration):
+        with self.lock:
+            self.in_flight -= 1
+            self.requests[(route, method, str(status))] += 1
+            for le in bucket_bounds(duration):
+                self.buckets[(route, le)] += 1
+            self.duration_sum[route] += duration
+            self.duration_count[route] += 1
+
+    def login_finished(self, outcome, duration):
+        with self.lock:
+            self.logins[outcome] += 1
+            if outcome != 'busy':
+                for le in bucket_bounds(duration):
+                    self.login_buckets[le] += 1
+                self.login_duration_sum += duration
+
+    def snapshot(self):
+        with self.lock:
+            return {
+                'requests': dict(self.requests),
+                'buckets': dict(self.buckets),
+                'duration_sum': dict(self.duration_sum),
+                'duration_count': dict(self.duration_count),
+                'in_flight': self.in_flight,
+                'logins': dict(self.logins),
+                'login_buckets': dict(self.login_buckets),
+                'login_duration_sum': self.login_duration_sum,
+            }
+
+
+class RedisMetricsStore:
+    """Metrics store shared by all workers through Redis hashes"""
+
+    def __init__(self, alias='default'):
+        self.alias = alias
+
+    @property
+    def client(self):
+        from django_redis import get_redis_connection
+        return get_redis_connection(self.alias)
+
+    def key(self, name):
+        return f'{METRICS_PREFIX}:{name}'
+
+    def reset(self):
+        self.client.delete(*[self.key(name) for name in (
+            'requests', 'buckets', 'duration_sum', 'duration_count', 'in_flight',
+            'logins', 'login_buckets', 'login_duration_sum',
+        )])
+
+    def request_started(self):
+        self.client.incr(self.key('in_flight'))
+
+    def request_finished(self, route, method, status, duration):
+        pipe = self.client.pipeline(transaction=False)
+        pipe.decr(self.key('in_flight'))
+        pipe.hincrby(self.key('requests'), f'{route}|{method}|{status}', 1)
+        for le in bucket_bounds(duration):
+            pipe.hincrby(self.key('buckets'), f'{route}|{le}', 1)
+        pipe.hincrbyfloat(self.key('duration_sum'), route, duration)
+        pipe.hincrby(self.key('duration_count'), route, 1)
+        pipe.execute()
+
+    def login_finished(self, outcome, duration):
+        pipe = self.client.pipeline(transaction=False)
+        pipe.hincrby(self.key('logins'), outcome, 1)
+        if outcome != 'busy':
+            for le in bucket_bounds(duration):
+                pipe.hincrby(self.key('login_buckets'), le, 1)
+            pipe.incrbyfloat(self.key('login_duration_sum'), duration)
+        pipe.execute()
+
+    def snapshot(self):
+        pipe = self.client.pipeline(transaction=False)
+        for name in ('requests', 'buckets', 'duration_sum', 'duration_count', 'logins', 'login_buckets'):
+            pipe.hgetall(self.key(name))
+        pipe.get(self.key('in_flight'))
+        pipe.get(self.key('login_duration_sum'))
+        (requests, buckets, duration_sum, duration_count, logins, login_buckets,
+         in_flight, login_duration_sum) = pipe.execute()
+        return {
+            'requests': {tuple(k.decode().split('|')): int(v) for k, v in requests.items()},
+            'buckets': {_split_bucket(k.decode()): int(v) for k, v in buckets.items()},
+            'duration_sum': {k.decode(): float(v) for k, v in duration_sum.items()},
+            'duration_count': {k.decode(): int(v) for k, v in duration_count.items()},
+            'in_flight': max(int(in_flight or 0), 0),
+            'logins': {k.decode(): int(v) for k, v in logins.items()},
+            'login_buckets': {k.decode(): int(v) for k, v in login_buckets.items()},
+            'login_duration_sum': float(login_duration_sum or 0),
+        }
+
+
+def _split_bucket(field):
+    route, le = field.rsplit('|', 1)
+    return route, le
+
+
+def bucket_bounds(duration):
+    """Get the cumulative histogram bucket labels a duration falls into"""
+    bounds = [str(le) for le in LATENCY_BUCKETS if duration <= le]
+    bounds.append('+Inf')
+    return bounds
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def uses_django_redis(alias):
+    """Check whether a cache alias is served by django_redis (or a subclass)"""
+    cache_backend = settings.CACHES.get(alias, {}).get('BACKEND', '')
+    if cache_backend.startswith('django_redis'):
+        return True
+    try:
+        from django_redis.cache import RedisCache
+        return issubclass(import_string(cache_backend), RedisCache)
+    except ImportError:
+        return False
+
+
+def get_metrics_store():
+    """
+    Get the configured metrics store
+
+    settings.METRICS_BACKEND may be 'redis' or 'local'; by default Redis is used
+    whenever the default cache is backed by django_redis.
+    """
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                backend = getattr(settings, 'METRICS_BACKEND', None)
+                if backend is None:
+                    backend = 'redis' if uses_django_redis('default') else 'local'
+                _store = RedisMetricsStore() if backend == 'redis' else LocalMetricsStore()
+    return _store
+
+
+def _label(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"')
+
+
+def render_prometheus(snapshot=None):
+    """Render the collected metrics in the Prometheus text exposition format"""
+    if snapshot is None:
+        snapshot = get_metrics_store().snapshot()
+
+    lines = [
+        '# HELP naebak_http_requests_total Total HTTP requests by route, method and status.',
+        '# TYPE naebak_http_requests_total counter',
+    ]
+    for (route, method, status), count in sorted(snapshot['requests'].items()):
+        lines.append(
+            f'naebak_http_requests_total{{route="{_label(route)}",method="{method}",status="{status}"}} {count}'
+        )
+
+    lines += [
+        '# HELP naebak_http_request_duration_seconds HTTP request latency by route.',
+        '# TYPE naebak_http_request_duration_seconds histogram',
+    ]
+    for route in sorted(snapshot['duration_count']):
+        for le in [str(b) for b in LATENCY_BUCKETS] + ['+Inf']:
+            count = snapshot['buckets'].get((route, le), 0)
+            lines.append(
+                f'naebak_http_request_duration_seconds_bucket{{route="{_label(route)}",le="{le}"}} {count}'
+            )
+        lines.append(
+            f'naebak_http_request_duration_seconds_sum{{route="{_label(route)}"}} {snapshot["duration_sum"].get(route, 0.0):.6f}'
+        )
+        lines.append(
+            f'naebak_http_request_duration_seconds_count{{route="{_label(route)}"}} {snapshot["duration_count"][route]}'
+        )
+
+    lines += [
+        '# HELP naebak_http_requests_in_flight HTTP requests currently being served.',
+        '# TYPE naebak_http_requests_in_flight gauge',
+        f'naebak_http_requests_in_flight {snapshot["in_flight"]}',
+    ]
+    lines += render_login_stats(snapshot)
+    lines += render_cache_tier_stats()
+    return '\n'.join(lines) + '\n'
+
+
+def render_login_stats(snapshot):
+    """Render login outcomes and the time spent verifying passwords"""
+    logins = snapshot.get('logins', {})
+    lines = [
+        '# HELP naebak_login_attempts_total Password logins by outcome (busy: no hashing slot free).',
+        '# TYPE naebak_login_attempts_total counter',
+    ]
+    for outcome in ('success', 'failure', 'busy'):
+        lines.append(f'naebak_login_attempts_total{{outcome="{outcome}"}} {logins.get(outcome, 0)}')
+
+    buckets = snapshot.get('login_buckets', {})
+    lines += [
+        '# HELP naebak_login_verify_duration_seconds Time spent verifying a password login (mostly hashing).',
+        '# TYPE naebak_login_verify_duration_seconds histogram',
+    ]
+    for le in [str(b) for b in LATENCY_BUCKETS] + ['+Inf']:
+        lines.append(f'naebak_login_verify_duration_seconds_bucket{{le="{le}"}} {buckets.get(le, 0)}')
+    lines.append(f'naebak_login_verify_duration_seconds_sum {snapshot.get("login_duration_sum", 0.0):.6f}')
+    lines.append(f'naebak_login_verify_duration_seconds_count {buckets.get("+Inf", 0)}')
+    return lines
+
+
+def render_cache_tier_stats():
+    """
+    Render the hit/miss counters of two-tier caches
+
+    These counters are per process, so each scrape reports the worker that
+    served it.
+    """
+    from django.core.cache import caches
+
+    requests = []
+    entries = []
+    for alias in settings.CACHES:
+        tier_stats = getattr(caches[alias], 'tier_stats', None)
+        if tier_stats is None:
+            continue
+        stats = tier_stats()
+        for tier in ('local', 'redis'):
+            for result in ('hits', 'misses'):
+                requests.append(
+                    f'naebak_cache_requests_total{{alias="{_label(alias)}",tier="{tier}",result="{result}"}} '
+                    f'{stats.get(f"{tier}_{result}", 0)}'
+                )
+        entries.append(f'naebak_cache_local_entries{{alias="{_label(alias)}"}} {stats["local_entries"]}')
+
+    if not requests:
+        return []
+    return [
+        '# HELP naebak_cache_requests_total Cache lookups by tier and result (this process).',
+        '# TYPE naebak_cache_requests_total counter',
+        *requests,
+        '# HELP naebak_cache_local_entries Entries held in the local cache tier (this process).',
+        '# TYPE naebak_cache_local_entries gauge',
+        *entries,
+    ]
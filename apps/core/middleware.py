@@ -0,0 +1,158 @@
+"""
+Middleware for the core app
+"""
+
+import logging
+import re
+import time
+from collections import Counter
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+
+from .metrics import get_metrics_store
+
+logger = logging.getLogger(__name__)
+
+
+_SQL_STRINGS = re.compile(r"'(?:[^']|'')*'")
+_SQL_NUMBERS = re.compile(r"\b\d+\b")
+_SQL_PARAM_LISTS = re.compile(r"\(\s*%s(?:\s*,\s*%s)+\s*\)")
+
+
+def normalize_sql(sql):
+    """
+    Reduce a SQL statement to its shape so repeated per-row queries compare equal
+    """
+    sql = _SQL_STRINGS.sub('%s', sql)
+    sql = _SQL_NUMBERS.sub('%s', sql)
+    sql = _SQL_PARAM_LISTS.sub('(%s, ...)', sql)
+    return ' '.join(sql.split())
+
+
+class QueryStats:
+    """
+    Database execute wrapper collecting query count, time and SQL shapes
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.shapes = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - start
+            self.count += 1
+            self.shapes[normalize_sql(sql)] += 1
+
+    def duplicates(self, threshold=2):
+        """Get SQL shapes executed at least `threshold` times, most frequent first"""
+        return [(shape, n) for shape, n in self.shapes.most_common() if n >= threshold]
+
+    @property
+    def duplicate_count(self):
+        """Number of queries that repeated an already executed shape"""
+        return sum(n - 1 for n in self.shapes.values() if n > 1)
+
+
+class QueryBudgetMiddleware:
+    """
+    Count the queries of every request and log violations of per-URL budgets
+
+    Budgets are read from settings.QUERY_BUDGETS keyed by URL name
+    (e.g. 'core:governorates'), falling back to QUERY_BUDGET_DEFAULT.
+    Repeated SQL shapes above QUERY_BUDGET_DUPLICATE_THRESHOLD are logged as
+    probable N+1 patterns. When QUERY_BUDGET_HEADERS is on (DEBUG by default)
+    the numbers are also exposed as X-Query-* response headers.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.enabled = getattr(settings, 'QUERY_BUDGET_ENABLED', True)
+        self.budgets = getattr(settings, 'QUERY_BUDGETS', {})
+        self.default_budget = getattr(settings, 'QUERY_BUDGET_DEFAULT', None)
+        self.duplicate_threshold = getattr(settings, 'QUERY_BUDGET_DUPLICATE_THRESHOLD', 5)
+        self.expose_headers = getattr(settings, 'QUERY_BUDGET_HEADERS', settings.DEBUG)
+
+    def __call__(self, request):
+        if not self.enabled:
+            return self.get_response(request)
+
+        stats = QueryStats()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(stats))
+            response = self.get_response(request)
+
+        self.check_budget(request, stats)
+
+        if self.expose_headers:
+            response['X-Query-Count'] = str(stats.count)
+            response['X-Query-Time-Ms'] = f'{stats.duration * 1000:.1f}'
+            response['X-Query-Duplicates'] = str(stats.duplicate_count)
+        return response
+
+    def get_budget(self, request):
+        """Get the query budget for the resolved URL name of the request"""
+        match = getattr(request, 'resolver_match', None)
+        if match is not None and match.view_name in self.budgets:
+            return self.budgets[match.view_name]
+        return self.default_budget
+
+    def check_budget(self, request, stats):
+        """Log budget violations and suspected N+1 query patterns"""
+        budget = self.get_budget(request)
+        if budget is not None and stats.count > budget:
+            logger.warning(
+                'Query budget exceeded for %s %s: %d queries (budget %d) in %.1f ms',
+                request.method, request.path, stats.count, budget, stats.duration * 1000,
+            )
+
+        for shape, n in stats.duplicates(self.duplicate_threshold)[:3]:
+            logger.warning(
+                'Possible N+1 on %s %s: query repeated %d times: %s',
+                request.method, request.path, n, shape[:300],
+            )
+
+
+class RequestMetricsMiddleware:
+    """
+    Record per-route latency, status codes and in-flight requests
+
+    Routes are labelled by URL name so the number of series stays bounded.
+    Metrics failures are logged and never affect the response.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.enabled = getattr(settings, 'METRICS_ENABLED', True)
+        self.store = get_metrics_store() if self.enabled else None
+
+    def __call__(self, request):
+        if not self.enabled:
+            return self.get_response(request)
+
+        try:
+            self.store.request_started()
+        except Exception as e:
+            logger.warning(f"Could not record request start: {e}")
+
+        start = time.perf_counter()
+        status = 500
+        try:
+            response = self.get_response(request)
+            status = response.status_code
+            return response
+        finally:
+            duration = time.perf_counter() - start
+            match = getattr(request, 'resolver_match', None)
+            route = match.view_name if match is not None else 'unmatched'
+            try:
+                self.store.request_finished(route, request.method, status, duration)
+            except Exception as e:
+                logger.warning(f"Could not record request metrics: {e}")
@@ -0,0 +1,28 @@
+# Generated by Django 5.0.6 on 2026-10-19 14:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ImageDerivativeJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('model', models.CharField(max_length=100)),
+                ('object_id', models.CharField(max_length=64)),
+                ('field_name', models.CharField(max_length=100)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name': 'مهمة صور متجاوبة',
+                'verbose_name_plural': 'مهام الصور المتجاوبة',
+                'constraints': [models.UniqueConstraint(fields=('model', 'object_id', 'field_name'), name='unique_image_derivative_job')],
+            },
+        ),
+    ]
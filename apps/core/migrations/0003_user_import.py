@@ -0,0 +1,36 @@
+# Generated by Django 5.0.6 on 2026-10-19 15:03
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0002_imagederivativejob'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserImport',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('candidates', 'مرشحون'), ('citizens', 'مواطنون')], max_length=20, verbose_name='نوع البيانات')),
+                ('file', models.FileField(upload_to='imports/', verbose_name='ملف CSV')),
+                ('status', models.CharField(choices=[('pending', 'في الانتظار'), ('running', 'جاري الاستيراد'), ('done', 'تم'), ('failed', 'فشل')], default='pending', max_length=20, verbose_name='الحالة')),
+                ('created_count', models.PositiveIntegerField(default=0, verbose_name='عدد الحسابات المنشأة')),
+                ('errors', models.JSONField(blank=True, default=list, verbose_name='الأخطاء')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('created_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to=settings.AUTH_USER_MODEL, verbose_name='بواسطة')),
+            ],
+            options={
+                'verbose_name': 'استيراد مستخدمين',
+                'verbose_name_plural': 'استيراد المستخدمين',
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['status', 'created_at'], name='core_userim_status_51ac8c_idx')],
+            },
+        ),
+    ]
@@ -152,3 +152,55 @@ class ActivityLog(models.Model):
             severity__in=['error', 'critical']
         ).order_by('-timestamp')[:limit]
 
+
+class ImageDerivativeJob(models.Model):
+    """An image field whose responsive derivatives must be (re)generated"""
+    model = models.CharField(max_length=100)
+    object_id = models.CharField(max_length=64)
+    field_name = models.CharField(max_length=100)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = "مهمة صور متجاوبة"
+        verbose_name_plural = "مهام الصور المتجاوبة"
+        constraints = [
+            models.UniqueConstraint(fields=['model', 'object_id', 'field_name'], name='unique_image_derivative_job'),
+        ]
+
+    def __str__(self):
+        return f"{self.model}:{self.object_id}:{self.field_name}"
+
+
+class UserImport(models.Model):
+    """A CSV of candidates or citizens uploaded in the admin (see apps.core.bulk_import)"""
+    KINDS = [
+        ('candidates', 'مرشحون'),
+        ('citizens', 'مواطنون'),
+    ]
+    STATUSES = [
+        ('pending', 'في الانتظار'),
+        ('running', 'جاري الاستيراد'),
+        ('done', 'تم'),
+        ('failed', 'فشل'),
+    ]
+
+    kind = models.CharField(max_length=20, choices=KINDS, verbose_name="نوع البيانات")
+    file = models.FileField(upload_to='imports/', verbose_name="ملف CSV")
+    status = models.CharField(max_length=20, choices=STATUSES, default='pending', verbose_name="الحالة")
+    created_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, verbose_name="بواسطة")
+    created_count = models.PositiveIntegerField(default=0, verbose_name="عدد الحسابات المنشأة")
+    # [[line, message], ...] for the rows that were skipped
+    errors = models.JSONField(default=list, blank=True, verbose_name="الأخطاء")
+    created_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        verbose_name = "استيراد مستخدمين"
+        verbose_name_plural = "استيراد المستخدمين"
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', 'created_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.get_kind_display()} - {self.created_at:%Y-%m-%d %H:%M}"
@@ -0,0 +1,111 @@
+"""
+Full-page cache for anonymous visitors
+
+Public pages render identically for every anonymous visitor, so their HTML is
+cached per URL and served without running the view, context processors or
+templates. Authenticated users and requests carrying flash messages always
+bypass the cache.
+
+Pages belong to purge groups. Every group has a generation number that is part
+of the cache key; purging a group bumps its generation so all of its pages are
+re-rendered on the next hit without scanning or deleting keys.
+"""
+
+import hashlib
+import re
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.contrib import messages
+from django.core.cache import caches
+from django.http import HttpResponse
+from django.middleware.csrf import get_token
+
+PAGE_KEY = 'page_cache:{}:{}:{}'
+GENERATION_KEY = 'page_cache_generation:{}'
+ALL_PAGES = '*'
+
+# Forms rendered for anonymous visitors carry a per-visitor CSRF token; it is
+# stored as a placeholder and filled in for each visitor when served
+CSRF_PLACEHOLDER = b'__PAGE_CACHE_CSRF_TOKEN__'
+_CSRF_INPUT = re.compile(rb'(name="csrfmiddlewaretoken" value=")[^"]*(")')
+
+
+def get_page_cache():
+    return caches[getattr(settings, 'PAGE_CACHE_ALIAS', 'default')]
+
+
+def get_generations(cache, group):
+    """Get the generations of all pages and of `group`, initialising missing ones"""
+    keys = [GENERATION_KEY.format(ALL_PAGES), GENERATION_KEY.format(group)]
+    found = cache.get_many(keys)
+    missing = {key: time.time_ns() for key in keys if key not in found}
+    if missing:
+        cache.set_many(missing, None)
+        found.update(missing)
+    return found[keys[0]], found[keys[1]]
+
+
+def purge_page_cache(*groups):
+    """
+    Invalidate the cached pages of the given groups, or of every page when no
+    group is given
+    """
+    cache = get_page_cache()
+    cache.set_many({GENERATION_KEY.format(group): time.time_ns() for group in groups or [ALL_PAGES]}, None)
+
+
+def is_cacheable_request(request):
+    """Only anonymous GET/HEAD requests without pending flash messages use the page cache"""
+    if request.method not in ('GET', 'HEAD'):
+        return False
+    if request.user.is_authenticated:
+        return False
+    return not len(messages.get_messages(request))
+
+
+def anonymous_cache_page(timeout=None, group='pages'):
+    """
+    Cache the response of a view for anonymous visitors
+
+    `timeout` defaults to settings.PAGE_CACHE_TIMEOUT; `group` names the purge
+    group the page belongs to (see purge_page_cache).
+    """
+    def decorator(view_func):
+        @wraps(view_func)
+        def wrapper(request, *args, **kwargs):
+            if not getattr(settings, 'PAGE_CACHE_ENABLED', True) or not is_cacheable_request(request):
+                return view_func(request, *args, **kwargs)
+
+            cache = get_page_cache()
+            all_generation, group_generation = get_generations(cache, group)
+            path_hash = hashlib.md5(request.get_full_path().encode()).hexdigest()
+            key = PAGE_KEY.format(group, f'{all_generation}.{group_generation}', path_hash)
+
+            cached = cache.get(key)
+            if cached is not None:
+                content, content_type, has_csrf = cached
+                if has_csrf:
+                    content = content.replace(CSRF_PLACEHOLDER, get_token(request).encode())
+                response = HttpResponse(content, content_type=content_type)
+                response['X-Page-Cache'] = 'HIT'
+                return response
+
+            response = view_func(request, *args, **kwargs)
+            if (
+                response.status_code == 200
+                and not response.streaming
+                and not response.cookies
+                and not len(messages.get_messages(request))
+            ):
+                content, csrf_inputs = _CSRF_INPUT.subn(rb'\1' + CSRF_PLACEHOLDER + rb'\2', response.content)
+                cache.set(
+                    key,
+                    (content, response['Content-Type'], bool(csrf_inputs)),
+                    timeout if timeout is not None else getattr(settings, 'PAGE_CACHE_TIMEOUT', 60),
+                )
+                response['X-Page-Cache'] = 'MISS'
+            return response
+        return wrapper
+    return decorator
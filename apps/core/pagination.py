@@ -0,0 +1,191 @@
+"""
+Keyset (seek) pagination
+
+Pages are addressed by an opaque cursor holding the ordering values of the
+first or last row of the neighbouring page instead of an OFFSET, so page 1000
+costs the same index seek as page 1 and no COUNT(*) is needed.
+
+    paginator = KeysetPaginator(News.objects.filter(status='published'), ('-publish_date', '-id'))
+    page = paginator.get_page(request.GET.get('cursor'))
+    page.object_list, page.next_cursor, page.previous_cursor
+
+The ordering must end with a unique field (normally the primary key) so that
+rows sharing the other values are neither skipped nor repeated. When a total
+is wanted for display, approximate_count() avoids an exact COUNT(*) on every
+request.
+"""
+
+import base64
+import datetime
+import hashlib
+import json
+import logging
+from functools import reduce
+from operator import or_
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connections
+from django.db.models import Q
+
+from .cache import get_or_refresh
+
+logger = logging.getLogger(__name__)
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+class CursorEncoder(DjangoJSONEncoder):
+    """JSON encoder keeping full microsecond precision, which seeks rely on"""
+
+    def default(self, o):
+        if isinstance(o, datetime.datetime):
+            return o.isoformat()
+        return super().default(o)
+
+
+class KeysetPage:
+    """One page of a KeysetPaginator"""
+
+    def __init__(self, object_list, next_cursor=None, previous_cursor=None):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    @property
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+
+class KeysetPaginator:
+    """
+    Paginate a queryset by seeking on its ordering fields
+
+    `ordering` is a sequence of field names, optionally prefixed with '-' for
+    descending order, ending with a unique field.
+    """
+
+    def __init__(self, queryset, ordering=('-timestamp', '-id'), per_page=20):
+        self.queryset = queryset
+        self.fields = [(name.lstrip('-'), name.startswith('-')) for name in ordering]
+        self.per_page = per_page
+
+    # Cursors
+
+    def encode_cursor(self, obj, direction):
+        values = [getattr(obj, name) for name, _ in self.fields]
+        raw = json.dumps({'d': direction, 'v': values}, cls=CursorEncoder, separators=(',', ':'))
+        return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+    def decode_cursor(self, cursor):
+        try:
+            raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+            data = json.loads(raw)
+            direction, values = data['d'], data['v']
+            if direction not in ('n', 'p') or len(values) != len(self.fields):
+                raise ValueError(cursor)
+            meta = self.queryset.model._meta
+            values = [meta.get_field(name).to_python(value) for (name, _), value in zip(self.fields, values)]
+        except Exception as e:
+            raise InvalidCursor(f'Invalid cursor: {cursor}') from e
+        return direction, values
+
+    # Queries
+
+    def seek_filter(self, values, forward):
+        """
+        Build the row comparison (f1, f2, ...) > (v1, v2, ...) in the ordering
+        direction, as OR-ed prefixes so each branch can use the index
+        """
+        branches = []
+        for i, (name, descending) in enumerate(self.fields):
+            lookup = 'lt' if descending == forward else 'gt'
+            equal = {prefix: value for (prefix, _), value in zip(self.fields[:i], values[:i])}
+            branches.append(Q(**equal, **{f'{name}__{lookup}': values[i]}))
+        return reduce(or_, branches)
+
+    def order_by(self, forward):
+        return [
+            f'-{name}' if descending == forward else name
+            for name, descending in self.fields
+        ]
+
+    def page(self, cursor=None):
+        """Get the page a cursor points to (the first page when cursor is empty)"""
+        direction, values = self.decode_cursor(cursor) if cursor else ('n', None)
+        forward = direction == 'n'
+
+        queryset = self.queryset.order_by(*self.order_by(forward))
+        if values is not None:
+            queryset = queryset.filter(self.seek_filter(values, forward))
+        rows = list(queryset[:self.per_page + 1])
+        has_more = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+
+        if not forward:
+            rows.reverse()
+        if not rows:
+            return KeysetPage([])
+
+        if forward:
+            next_cursor = self.encode_cursor(rows[-1], 'n') if has_more else None
+            previous_cursor = self.encode_cursor(rows[0], 'p') if values is not None else None
+        else:
+            next_cursor = self.encode_cursor(rows[-1], 'n')
+            previous_cursor = self.encode_cursor(rows[0], 'p') if has_more else None
+        return KeysetPage(rows, next_cursor, previous_cursor)
+
+    def get_page(self, cursor=None):
+        """Like page(), but fall back to the first page for an invalid cursor"""
+        try:
+            return self.page(cursor)
+        except InvalidCursor:
+            return self.page(None)
+
+
+def planner_estimate(queryset):
+    """
+    Row estimate of the PostgreSQL planner for a queryset, or None elsewhere
+    """
+    connection = connections[queryset.db]
+    if connection.vendor != 'postgresql':
+        return None
+    sql, params = queryset.order_by().query.sql_with_params()
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}', params)
+            plan = cursor.fetchone()[0]
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        return int(plan[0]['Plan']['Plan Rows'])
+    except Exception as e:
+        logger.warning(f"Could not read planner estimate: {e}")
+        return None
+
+
+def approximate_count(queryset, timeout=300, exact_below=10000):
+    """
+    Count rows cheaply for display
+
+    On PostgreSQL the planner estimate is used, falling back to an exact count
+    when the estimate is small enough to count quickly. Elsewhere the exact
+    count is cached (stale-while-revalidate) for `timeout` seconds.
+    """
+    estimate = planner_estimate(queryset)
+    if estimate is not None and estimate >= exact_below:
+        return estimate
+
+    sql, params = queryset.order_by().query.sql_with_params()
+    key = 'approximate_count:' + hashlib.md5(f'{queryset.db}|{sql}|{params}'.encode()).hexdigest()
+    return get_or_refresh(key, queryset.count, timeout=timeout)
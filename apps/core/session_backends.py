@@ -0,0 +1,80 @@
+"""
+Session engine for the site
+
+    SESSION_ENGINE = 'apps.core.session_backends'
+    SESSION_CACHE_ALIAS = 'sessions'
+
+Signed-in sessions are stored like Django's cached_db engine: the database
+row is authoritative and the "sessions" cache (a Redis instance of its own,
+maxmemory-policy noeviction) holds a copy for fast reads. If that copy is
+lost, or Redis is unavailable, the session is read back from the database,
+so cache pressure never logs anyone out.
+
+Anonymous sessions (no authenticated user) are kept in a compressed, signed
+cookie when SESSION_ANONYMOUS_SIGNED_COOKIE is on, the same way the
+signed_cookies engine does. Visitors who only browse therefore create no
+database rows or cache keys. The session moves to the server when the
+visitor signs in, and back to a cookie after logout.
+
+A cookie session key is the signed payload itself, which always contains
+':'; database session keys never do.
+"""
+
+from django.conf import settings
+from django.contrib.auth import SESSION_KEY
+from django.contrib.sessions.backends import cached_db
+from django.core import signing
+
+SIGNED_COOKIE_SALT = 'django.contrib.sessions.backends.signed_cookies'
+
+
+def is_cookie_key(session_key):
+    return bool(session_key) and ':' in session_key
+
+
+class SessionStore(cached_db.SessionStore):
+
+    def stays_in_cookie(self):
+        return settings.SESSION_ANONYMOUS_SIGNED_COOKIE and SESSION_KEY not in self._session
+
+    def load(self):
+        if not is_cookie_key(self.session_key):
+            return super().load()
+        try:
+            return signing.loads(
+                self.session_key,
+                serializer=self.serializer,
+                max_age=self.get_session_cookie_age(),
+                salt=SIGNED_COOKIE_SALT,
+            )
+        except Exception:
+            # Bad signature or expired: start over with an empty session
+            self._session_key = None
+            return {}
+
+    def exists(self, session_key):
+        if is_cookie_key(session_key):
+            return False
+        return super().exists(session_key)
+
+    def save(self, must_create=False):
+        if self.stays_in_cookie():
+            server_key = None if must_create or is_cookie_key(self.session_key) else self.session_key
+            self._session_key = signing.dumps(
+                self._session, compress=True, salt=SIGNED_COOKIE_SALT, serializer=self.serializer,
+            )
+            self.modified = False
+            if server_key:
+                # Signed out without a flush: drop the stored copy
+                super().delete(server_key)
+            return
+        if is_cookie_key(self.session_key):
+            # Signing in: the cookie's data gets a new server-side session
+            self._session_key = None
+        super().save(must_create=must_create)
+
+    def delete(self, session_key=None):
+        if is_cookie_key(self.session_key if session_key is None else session_key):
+            # Nothing is stored on the server for cookie sessions
+            return
+        super().delete(session_key)
@@ -0,0 +1,40 @@
+"""
+Signals for the core app
+"""
+
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from apps.candidates.models import Candidate, FeaturedCandidate
+from apps.news.models import News
+from .images import MANIFEST_FIELD, derivative_fields, queue_stale
+from .page_cache import purge_page_cache
+
+
+@receiver([post_save, post_delete], sender=Candidate)
+@receiver([post_save, post_delete], sender=FeaturedCandidate)
+def purge_candidate_pages(sender, instance, **kwargs):
+    """Re-render the cached pages listing candidates"""
+    purge_page_cache('candidates')
+
+
+@receiver([post_save, post_delete], sender=News)
+def purge_news_pages(sender, instance, **kwargs):
+    """News appears in the ticker of every page, so all cached pages are purged"""
+    if kwargs.get('update_fields') == frozenset({'views_count'}):
+        return
+    purge_page_cache()
+
+
+@receiver(post_save, sender=Candidate)
+@receiver(post_save, sender=News)
+def queue_image_derivatives(sender, instance, raw=False, update_fields=None, **kwargs):
+    """
+    Queue responsive image generation when a configured image changes
+
+    Only the models with images are connected; which of their fields get
+    derivatives comes from IMAGE_DERIVATIVE_FIELDS.
+    """
+    if raw or not derivative_fields(sender) or update_fields == frozenset({MANIFEST_FIELD}):
+        return
+    queue_stale(instance)
@@ -0,0 +1,366 @@
+"""
+Static asset build
+
+    python manage.py build_static
+
+runs collectstatic through OptimizedStaticFilesStorage. Before files are
+fingerprinted, the project's own assets (STATIC_BUILD_PATHS) are rewritten in
+STATIC_ROOT:
+
+    *.css          comments and redundant whitespace removed
+    *.js           comments and indentation removed, line breaks kept
+    *.png, *.jpg   recompressed losslessly with Pillow, kept only if smaller
+    *.ttf          subset to STATIC_BUILD_FONT_UNICODES and saved as .woff2
+                   next to the original (needs fontTools and brotli)
+
+The hashes are then computed from the optimized bytes, and WhiteNoise writes
+.gz and .br variants of every hashed file, which WhiteNoise and nginx's
+gzip_static send without compressing per request. The storage keeps the
+sizes of each step in `build_report` for the command to print.
+
+Third-party assets (admin, REST framework) ship their own minified files and
+are only precompressed.
+"""
+
+import importlib.util
+import io
+import logging
+import posixpath
+import re
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from whitenoise.storage import CompressedManifestStaticFilesStorage
+
+logger = logging.getLogger(__name__)
+
+FONT_EXTENSIONS = {'ttf', 'otf'}
+IMAGE_EXTENSIONS = {'png', 'jpg', 'jpeg'}
+# Fonts first, so stylesheets can point at the .woff2 files they produce
+STAGES = {'ttf': 0, 'otf': 0, 'png': 1, 'jpg': 1, 'jpeg': 1, 'css': 2, 'js': 2}
+
+# Strings and unquoted url() values are copied verbatim
+CSS_TOKEN_RE = re.compile(
+    r'''("(?:\\.|[^"\\])*"|'(?:\\.|[^'\\])*'|url\((?!\s*['"])[^)]*\))|(/\*.*?\*/)|(\s+)''', re.S | re.I,
+)
+CSS_TIGHT_BEFORE = set('{};,>)')
+CSS_TIGHT_AFTER = set('{};,>(:')
+TRUETYPE_SRC_RE = re.compile(r'''url\((['"]?)([^'")]+)\.ttf\1\)\s*format\((['"])truetype\3\)''')
+
+# After these, a slash starts a regular expression rather than a division
+JS_REGEX_PRECEDERS = set('(,=:[!&|?{};+-*%<>~^')
+JS_REGEX_KEYWORDS = ('return', 'typeof', 'case', 'do', 'else', 'in', 'of', 'void', 'throw', 'delete', 'new')
+
+
+def extension(name):
+    return posixpath.splitext(name)[1].lstrip('.').lower()
+
+
+def fonts_supported():
+    """Whether fontTools can write WOFF2 here"""
+    return all(importlib.util.find_spec(module) is not None for module in ('fontTools', 'brotli'))
+
+
+def minify_css(text):
+    """Drop comments and whitespace that does not separate tokens"""
+    out = []
+    pending_space = False
+    pos = 0
+
+    def add_code(chunk):
+        # Code between strings and comments: drop the last semicolon of each block
+        chunk = chunk.replace(';}', '}')
+        if chunk.startswith('}') and out and out[-1].endswith(';'):
+            out[-1] = out[-1][:-1]
+        out.append(chunk)
+
+    for match in CSS_TOKEN_RE.finditer(text):
+        chunk = text[pos:match.start()]
+        if chunk:
+            if pending_space and out and out[-1][-1] not in CSS_TIGHT_AFTER and chunk[0] not in CSS_TIGHT_BEFORE:
+                out.append(' ')
+            add_code(chunk)
+            pending_space = False
+        string, comment, _ = match.groups()
+        if string:
+            if pending_space and out and out[-1][-1] not in CSS_TIGHT_AFTER:
+                out.append(' ')
+            out.append(string)
+            pending_space = False
+        elif comment and comment.startswith('/*!'):
+            # License comments stay
+            out.append(comment)
+        else:
+            pending_space = True
+        pos = match.end()
+    tail = text[pos:]
+    if tail:
+        if pending_space and out and out[-1][-1] not in CSS_TIGHT_AFTER and tail[0] not in CSS_TIGHT_BEFORE:
+            out.append(' ')
+        add_code(tail)
+    return ''.join(out)
+
+
+def squeeze_js(code):
+    """Collapse whitespace in code outside strings, keeping line breaks for ASI"""
+    code = re.sub(r'[ \t]+', ' ', code)
+    return re.sub(r' ?\n\s*', '\n', code)
+
+
+def scan_string(source, i):
+    """End of the quoted string starting at source[i]"""
+    quote, n = source[i], len(source)
+    i += 1
+    while i < n and source[i] != quote and source[i] != '\n':
+        i += 2 if source[i] == '\\' else 1
+    return min(i + 1, n)
+
+
+def scan_regex(source, i):
+    """End of the regular expression literal (with flags) starting at source[i]"""
+    n = len(source)
+    i += 1
+    in_class = False
+    while i < n and source[i] != '\n':
+        char = source[i]
+        if char == '\\':
+            i += 2
+            continue
+        if char == '[':
+            in_class = True
+        elif char == ']':
+            in_class = False
+        elif char == '/' and not in_class:
+            i += 1
+            break
+        i += 1
+    while i < n and (source[i].isalnum() or source[i] == '_'):
+        i += 1
+    return i
+
+
+def scan_template(source, i):
+    """
+    Scan template literal text from source[i] up to its closing backtick or
+    the next `${`; returns (end, opens_expression)
+    """
+    n = len(source)
+    while i < n:
+        if source[i] == '\\':
+            i += 2
+        elif source[i] == '`':
+            return i + 1, False
+        elif source.startswith('${', i):
+            return i + 2, True
+        else:
+            i += 1
+    return n, False
+
+
+def starts_regex(code):
+    """Whether a slash following `code` begins a regular expression"""
+    stripped = code.rstrip()
+    if not stripped or stripped[-1] in JS_REGEX_PRECEDERS:
+        return True
+    word = re.search(r'[A-Za-z_$][\w$]*$', stripped)
+    return word is not None and word.group() in JS_REGEX_KEYWORDS
+
+
+def minify_js(source):
+    """
+    Remove comments and indentation from JavaScript
+
+    Strings, template literals and regular expressions are copied verbatim.
+    Line breaks are kept so automatic semicolon insertion is unaffected; no
+    identifiers are renamed.
+    """
+    out = []
+    code = []
+    # Open braces inside each `${ }` of the template literals being scanned
+    templates = []
+    i, n = 0, len(source)
+
+    def emit_code():
+        if code:
+            out.append(squeeze_js(''.join(code)))
+            code.clear()
+
+    while i < n:
+        char = source[i]
+        if char in '"\'':
+            end = scan_string(source, i)
+        elif char == '`' or (char == '}' and templates and templates[-1] == 0):
+            if char == '}':
+                templates.pop()
+            end, opens = scan_template(source, i + 1)
+            if opens:
+                templates.append(0)
+        elif source.startswith('//', i):
+            end = source.find('\n', i)
+            i = n if end == -1 else end
+            continue
+        elif source.startswith('/*', i):
+            end = source.find('*/', i + 2)
+            end = n if end == -1 else end + 2
+            if source.startswith('/*!', i):
+                emit_code()
+                out.append(source[i:end])
+            else:
+                code.append('\n' if '\n' in source[i:end] else ' ')
+            i = end
+            continue
+        elif char == '/' and starts_regex(''.join(code[-40:]) if code else (out[-1] if out else '')):
+            end = scan_regex(source, i)
+        else:
+            if templates:
+                if char == '{':
+                    templates[-1] += 1
+                elif char == '}':
+                    templates[-1] -= 1
+            code.append(char)
+            i += 1
+            continue
+        emit_code()
+        out.append(source[i:end])
+        i = end
+    emit_code()
+    return ''.join(out).strip() + '\n'
+
+
+def optimize_image(data, ext):
+    """Recompress an image without changing its pixels; returns the smaller of the two"""
+    from PIL import Image
+
+    try:
+        with Image.open(io.BytesIO(data)) as image:
+            options = {key: image.info[key] for key in ('exif', 'icc_profile') if image.info.get(key)}
+            buffer = io.BytesIO()
+            if ext == 'png':
+                image.save(buffer, 'PNG', optimize=True, **options)
+            else:
+                image.save(buffer, 'JPEG', quality='keep', subsampling='keep', optimize=True, progressive=True, **options)
+    except Exception as e:
+        logger.warning(f"Could not recompress image: {e}")
+        return data
+    optimized = buffer.getvalue()
+    return optimized if len(optimized) < len(data) else data
+
+
+def convert_font(data):
+    """Subset a TrueType/OpenType font to STATIC_BUILD_FONT_UNICODES as WOFF2"""
+    from fontTools import subset
+    from fontTools.ttLib import TTFont
+
+    options = subset.Options()
+    options.flavor = 'woff2'
+    # Arabic shaping (init/medi/fina, ligatures, mark positioning) lives in these
+    options.layout_features = ['*']
+    font = TTFont(io.BytesIO(data))
+    subsetter = subset.Subsetter(options)
+    subsetter.populate(unicodes=subset.parse_unicodes(settings.STATIC_BUILD_FONT_UNICODES))
+    subsetter.subset(font)
+    buffer = io.BytesIO()
+    font.flavor = 'woff2'
+    font.save(buffer)
+    return buffer.getvalue()
+
+
+def add_woff2_sources(css, name, woff2_names):
+    """Put a built .woff2 before each `url(x.ttf) format('truetype')` source"""
+    def replace(match):
+        quote, stem = match.group(1), match.group(2)
+        target = posixpath.normpath(posixpath.join(posixpath.dirname(name), stem + '.woff2'))
+        if target not in woff2_names:
+            return match.group(0)
+        return f"url({quote}{stem}.woff2{quote}) format('woff2'), {match.group(0)}"
+
+    return TRUETYPE_SRC_RE.sub(replace, css)
+
+
+def should_optimize(name):
+    return (
+        extension(name) in STAGES
+        and '.min.' not in name
+        and any(name.startswith(prefix) for prefix in settings.STATIC_BUILD_PATHS)
+    )
+
+
+def replace_file(storage, name, data):
+    if storage.exists(name):
+        storage.delete(name)
+    storage.save(name, ContentFile(data))
+
+
+def optimize_assets(storage, paths):
+    """
+    Rewrite the collected copies of the project's assets in place
+
+    `paths` (collectstatic's {name: (source storage, path)}) is updated to read
+    the optimized copies from `storage`, so the manifest hashes them. Returns
+    {name: {'source': bytes, 'built': bytes}}.
+    """
+    report = {}
+    woff2_names = set()
+    convert_fonts = fonts_supported()
+    if not convert_fonts:
+        logger.warning("fontTools/brotli not installed; fonts are not converted to WOFF2")
+
+    for name in sorted(filter(should_optimize, paths), key=lambda name: STAGES[extension(name)]):
+        source_storage, path = paths[name]
+        # Always start from the source, so repeated builds do not compound
+        with source_storage.open(path) as f:
+            data = f.read()
+        ext = extension(name)
+        built = data
+
+        if ext in FONT_EXTENSIONS:
+            if convert_fonts:
+                woff2_name = posixpath.splitext(name)[0] + '.woff2'
+                try:
+                    woff2 = convert_font(data)
+                except Exception as e:
+                    logger.warning(f"Could not convert {name} to WOFF2: {e}")
+                else:
+                    replace_file(storage, woff2_name, woff2)
+                    paths[woff2_name] = (storage, woff2_name)
+                    woff2_names.add(woff2_name)
+                    report[woff2_name] = {'source': len(data), 'built': len(woff2)}
+        elif ext in IMAGE_EXTENSIONS:
+            built = optimize_image(data, ext)
+        elif ext == 'css':
+            built = add_woff2_sources(minify_css(data.decode('utf-8')), name, woff2_names).encode('utf-8')
+        elif ext == 'js':
+            built = minify_js(data.decode('utf-8')).encode('utf-8')
+
+        if built != data:
+            replace_file(storage, name, built)
+            paths[name] = (storage, name)
+        report[name] = {'source': len(data), 'built': len(built)}
+    return report
+
+
+class OptimizedStaticFilesStorage(CompressedManifestStaticFilesStorage):
+    """
+    WhiteNoise's compressed manifest storage with the optimization pass above
+
+    After collectstatic, build_report maps each optimized asset to its source
+    and built sizes plus the hashed name and gzip/brotli sizes served.
+    """
+
+    build_report = None
+
+    def post_process(self, paths, dry_run=False, **options):
+        if dry_run:
+            yield from super().post_process(paths, dry_run=dry_run, **options)
+            return
+
+        report = optimize_assets(self, paths)
+        yield from super().post_process(paths, dry_run=dry_run, **options)
+
+        for name, sizes in report.items():
+            hashed_name = self.hashed_files.get(self.hash_key(self.clean_name(name)), name)
+            sizes['name'] = hashed_name
+            for encoding, suffix in (('gzip', '.gz'), ('brotli', '.br')):
+                if self.exists(hashed_name + suffix):
+                    sizes[encoding] = self.size(hashed_name + suffix)
+        self.build_report = report
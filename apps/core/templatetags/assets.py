@@ -0,0 +1,82 @@
+"""
+Template tags for render-blocking assets
+
+    {% load assets %}
+    {% font_faces %}
+    {% critical_css as critical %}
+    {% static 'naebak/css/style.css' as style_css %}
+    {% include 'core/partials/stylesheet.html' with href=style_css %}
+
+The stylesheet partial loads `href` without blocking rendering when the
+page's critical CSS (apps.core.critical_css) covers it.
+"""
+
+from functools import lru_cache
+
+from django import template
+from django.conf import settings
+from django.contrib.staticfiles import finders
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.templatetags.static import static
+
+from apps.core.critical_css import critical_css_for
+
+register = template.Library()
+
+FONT_FORMATS = (('woff2', 'woff2', 'font/woff2'), ('ttf', 'truetype', 'font/ttf'))
+
+
+@register.simple_tag(takes_context=True)
+def critical_css(context):
+    """Critical CSS of the current page ({'css', 'covers'}) or None"""
+    match = getattr(context.get('request'), 'resolver_match', None)
+    if match is None:
+        return None
+    return critical_css_for(match.view_name)
+
+
+def static_file_exists(path):
+    manifest = getattr(staticfiles_storage, 'hashed_files', None)
+    if manifest:
+        return path in manifest
+    return finders.find(path) is not None
+
+
+def font_source(stem):
+    """(url, css format, mime type) of the best built file of a font"""
+    for extension, css_format, mime_type in FONT_FORMATS:
+        path = f'{stem}.{extension}'
+        if static_file_exists(path):
+            return static(path), css_format, mime_type
+    return None
+
+
+cached_font_source = lru_cache(maxsize=None)(font_source)
+
+
+@register.inclusion_tag('core/partials/font_faces.html')
+def font_faces():
+    """
+    @font-face rules for SELF_HOSTED_FONTS, plus preload hints for
+    PRELOADED_FONTS so they download alongside the stylesheets
+
+    Weights without a file in static/ are requested from FONT_FALLBACK_URL.
+    """
+    lookup = font_source if settings.DEBUG else cached_font_source
+    faces = []
+    missing = {}
+    for family, weight, stem in settings.SELF_HOSTED_FONTS:
+        source = lookup(stem)
+        if source is None:
+            missing.setdefault(family, []).append(weight)
+            continue
+        url, css_format, mime_type = source
+        faces.append({
+            'family': family, 'weight': weight, 'url': url, 'format': css_format,
+            'type': mime_type, 'preload': stem in settings.PRELOADED_FONTS,
+        })
+    fallbacks = [
+        settings.FONT_FALLBACK_URL.format(family=family.replace(' ', '+'), weights=';'.join(map(str, sorted(weights))))
+        for family, weights in missing.items()
+    ]
+    return {'faces': faces, 'fallbacks': fallbacks}
@@ -0,0 +1,24 @@
+"""
+Template tags for responsive images
+
+    {% load images %}
+    {% responsive_image candidate 'profile_picture' sizes='120px' alt=candidate.name css_class='candidate-avatar' %}
+"""
+
+from django import template
+
+from apps.core.images import MANIFEST_FIELD, srcset_context
+
+register = template.Library()
+
+
+@register.inclusion_tag('core/partials/responsive_image.html')
+def responsive_image(instance, field_name, sizes='100vw', alt='', css_class='', style='', loading='lazy'):
+    """
+    Render an image field as a <picture> with a srcset per derivative format
+    """
+    field_file = getattr(instance, field_name)
+    manifest = (getattr(instance, MANIFEST_FIELD, None) or {}).get(field_name)
+    context = srcset_context(field_file, manifest, sizes)
+    context.update({'alt': alt, 'css_class': css_class, 'style': style, 'loading': loading})
+    return context
@@ -0,0 +1,50 @@
+"""
+Test helpers for the core app
+"""
+
+from contextlib import contextmanager
+
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.test.utils import CaptureQueriesContext
+
+from .middleware import QueryStats
+
+
+@contextmanager
+def assert_max_queries(max_queries, max_duplicates=None, using=DEFAULT_DB_ALIAS):
+    """
+    Fail if the enclosed block runs more than `max_queries` queries
+
+    With `max_duplicates` set, also fail when any SQL shape repeats more than
+    that many times, which catches N+1 patterns that fit the overall budget.
+
+        with assert_max_queries(10):
+            self.client.get(reverse('core:governorates'))
+    """
+    stats = QueryStats()
+    connection = connections[using]
+    with CaptureQueriesContext(connection) as context, connection.execute_wrapper(stats):
+        yield context
+
+    if stats.count > max_queries:
+        executed = '\n'.join(
+            f'{i}. {query["sql"]}' for i, query in enumerate(context.captured_queries, start=1)
+        )
+        raise AssertionError(
+            f'{stats.count} queries executed, {max_queries} allowed\nCaptured queries were:\n{executed}'
+        )
+
+    if max_duplicates is not None:
+        repeated = stats.duplicates(max_duplicates + 1)
+        if repeated:
+            shape, n = repeated[0]
+            raise AssertionError(f'Query repeated {n} times ({max_duplicates} allowed): {shape}')
+
+
+class QueryBudgetTestMixin:
+    """
+    TestCase mixin exposing assert_max_queries as an assertion method
+    """
+
+    def assertMaxQueries(self, max_queries, max_duplicates=None, using=DEFAULT_DB_ALIAS):
+        return assert_max_queries(max_queries, max_duplicates=max_duplicates, using=using)
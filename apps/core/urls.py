@@ -24,6 +24,8 @@ urlpatterns = [
     # API endpoints
     path('api/governorates/search/', views.api_governorates_search, name='api_governorates_search'),
     path("api/candidates/search/", views.api_candidates_search, name="api_candidates_search"),
+    path("metrics/", views.metrics, name="metrics"),
+    path("files/<str:token>/", views.signed_download, name="signed_download"),
     path("profile/", views.profile_view, name="profile"),
 
     path("logout/", views.logout_view, name="logout"),
@@ -4,41 +4,105 @@ Utility functions for core app
 
 import json
 import os
+import re
 from django.conf import settings
-from django.core.cache import cache
 
+from .cache import get_or_refresh
 
-def load_governorates_data():
+
+GOVERNORATES_PATHS = [
+    ('static', 'data', 'governorates.json'),
+    ('naebak', 'data', 'governorates.json'),
+]
+
+
+def read_governorates_file():
     """
-    Load governorates data from JSON file with caching
+    Read governorates data from the first JSON file found
     """
-    cache_key = 'governorates_data'
-    governorates = cache.get(cache_key)
-    
-    if governorates is None:
-        json_file_path = os.path.join(settings.BASE_DIR, 'static', 'data', 'governorates.json')
-        try:
+    for parts in GOVERNORATES_PATHS:
+        json_file_path = os.path.join(settings.BASE_DIR, *parts)
+        if os.path.exists(json_file_path):
             with open(json_file_path, 'r', encoding='utf-8') as file:
-                data = json.load(file)
-                governorates = data.get('governorates', [])
-                # Cache for 1 hour
-                cache.set(cache_key, governorates, 3600)
-        except FileNotFoundError:
-            # Try alternative path
-            json_file_path = os.path.join(settings.BASE_DIR, 'naebak', 'data', 'governorates.json')
-            try:
-                with open(json_file_path, 'r', encoding='utf-8') as file:
-                    data = json.load(file)
-                    governorates = data.get('governorates', [])
-                    cache.set(cache_key, governorates, 3600)
-            except FileNotFoundError:
-                print(f"Governorates JSON file not found at: {json_file_path}")
-                governorates = []
-        except json.JSONDecodeError:
-            print(f"Error decoding JSON file: {json_file_path}")
-            governorates = []
-    
-    return governorates
+                return json.load(file).get('governorates', [])
+    raise FileNotFoundError(json_file_path)
+
+
+def load_governorates_data():
+    """
+    Load governorates data from JSON file with stale-while-revalidate caching
+    """
+    try:
+        return get_or_refresh('governorates_data', read_governorates_file, timeout=3600, stale_timeout=86400)
+    except FileNotFoundError as e:
+        print(f"Governorates JSON file not found at: {e}")
+    except json.JSONDecodeError as e:
+        print(f"Error decoding governorates JSON file: {e}")
+    return []
+
+
+def get_site_stats():
+    """
+    Site-wide counters shown on every page, refreshed at most every 5 minutes
+    """
+    from apps.accounts.models import Citizen
+    from apps.candidates.models import Candidate
+
+    def compute():
+        return {
+            'total_governorates': 27,  # Fixed number of Egyptian governorates
+            'total_candidates': Candidate.objects.count(),
+            'total_voters': Citizen.objects.count(),
+            'online_visitors': 0,  # Can be implemented with sessions/cache
+        }
+
+    return get_or_refresh('site_stats', compute, timeout=300)
+
+
+def get_governorates_stats():
+    """
+    Candidate and activity aggregates per governorate ID for the governorates listing
+
+    Computed with one annotated candidate query and one grouped citizen count,
+    refreshed at most every 5 minutes.
+    """
+    from apps.accounts.models import Citizen
+    from apps.candidates.cards import annotate_card_stats
+    from apps.candidates.models import Candidate
+    from django.db.models import Count
+
+    def empty_row():
+        return {
+            'total_candidates': 0, 'total_messages': 0, 'total_votes': 0,
+            'total_ratings': 0, 'total_citizens': 0, 'rated': [],
+        }
+
+    def compute():
+        stats = {}
+        candidates = annotate_card_stats(Candidate.objects.order_by()).values_list(
+            'governorate_id', 'total_messages', 'total_votes', 'total_ratings', 'avg_rating',
+        )
+        for gov_id, messages, votes, ratings, avg_rating in candidates.iterator():
+            row = stats.setdefault(gov_id, empty_row())
+            row['total_candidates'] += 1
+            row['total_messages'] += messages
+            row['total_votes'] += votes
+            row['total_ratings'] += ratings
+            if ratings:
+                row['rated'].append(avg_rating)
+
+        citizens = Citizen.objects.order_by().values('governorate_id').annotate(n=Count('id'))
+        for row in citizens:
+            stats.setdefault(row['governorate_id'], empty_row())['total_citizens'] = row['n']
+
+        for row in stats.values():
+            rated = row.pop('rated')
+            row['total_activity'] = row['total_messages'] + row['total_votes'] + row['total_ratings']
+            # Average of the candidates' average ratings, as shown before
+            row['avg_rating'] = round(sum(rated) / len(rated), 1) if rated else 0
+        return stats
+
+    return get_or_refresh('governorates_stats', compute, timeout=300)
 
 
 def get_governorate_by_id(gov_id):
@@ -144,6 +208,21 @@ def get_client_ip(request):
     return ip
 
 
+def get_trusted_client_ip(request):
+    """
+    Client IP address for access control and rate limiting
+
+    Only the X-Forwarded-For entries appended by our own proxies
+    (TRUSTED_PROXY_HOPS, counted from the right) are trusted; anything the
+    client sent before them is ignored.
+    """
+    hops = settings.TRUSTED_PROXY_HOPS
+    forwarded = [ip.strip() for ip in request.META.get('HTTP_X_FORWARDED_FOR', '').split(',') if ip.strip()]
+    if hops and len(forwarded) >= hops:
+        return forwarded[-hops]
+    return request.META.get('REMOTE_ADDR')
+
+
 def get_user_agent(request):
     """
     Get user agent from request
@@ -211,8 +290,8 @@ def validate_egyptian_phone(phone):
     
     # Egyptian phone patterns
     patterns = [
-        r'^(\+20|0020|20)?1[0125]\d{8}$',  # Mobile numbers
-        r'^(\+20|0020|20)?[2-9]\d{7,8}$',  # Landline numbers
+        r'^(\+20|0020|20|0)?1[0125]\d{8}$',  # Mobile numbers
+        r'^(\+20|0020|20|0)?[2-9]\d{7,8}$',  # Landline numbers
     ]
     
     for pattern in patterns:
@@ -248,3 +327,31 @@ def format_egyptian_phone(phone):
     
     return phone
 
+
+
+def normalize_phone(phone):
+    """
+    Canonical form of an Egyptian phone number for lookups (01xxxxxxxxx),
+    or None when the number is not valid
+    """
+    if not validate_egyptian_phone(phone):
+        return None
+    return format_egyptian_phone(phone)
+
+
+ARABIC_DIACRITICS_RE = re.compile('[\u064B-\u065F\u0670\u0640]')  # tashkeel and tatweel
+ARABIC_LETTER_VARIANTS = str.maketrans({
+    'أ': 'ا', 'إ': 'ا', 'آ': 'ا', 'ٱ': 'ا',
+    'ى': 'ي', 'ئ': 'ي',
+    'ؤ': 'و',
+    'ة': 'ه',
+})
+
+
+def normalize_arabic_name(name):
+    """
+    Spelling-insensitive form of a name: no diacritics or tatweel, one form of
+    alef/yaa/taa marbuta, lowercase Latin, single spaces ("أحمد" == "احمد")
+    """
+    name = ARABIC_DIACRITICS_RE.sub('', name or '').translate(ARABIC_LETTER_VARIANTS)
+    return ' '.join(name.lower().split())
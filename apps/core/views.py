@@ -3,6 +3,7 @@ Core views for the main application functionality
 """
 
 from django.contrib.auth.models import User
+from django.core.files.storage import default_storage
 from django.core.paginator import Paginator
 from django.db.models import Count, Q, Avg
 from django.shortcuts import render, get_object_or_404, redirect
@@ -10,31 +11,39 @@ from django.contrib.auth import authenticate, login, logout
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 from django.http import HttpResponse, JsonResponse
-from django.views.decorators.cache import cache_page
 from django.views.decorators.http import require_POST, require_GET
 
 # Import models from their respective apps
 from apps.candidates.models import Candidate, ElectoralPromise, PublicServiceHistory, FeaturedCandidate
 from apps.messaging.models import Message
 from apps.voting.models import Rating, Vote
-from apps.news.models import News
+from apps.news.ticker import get_homepage_news_items
+from apps.candidates.cards import annotate_card_stats, card_stats, render_candidate_cards, COMPACT_CARD_TEMPLATE
 from apps.accounts.models import Citizen
 from .models import ActivityLog
-from .utils import load_governorates_data, get_governorate_by_id, get_governorate_by_slug, search_governorates
+from .utils import load_governorates_data, get_governorates_stats, get_governorate_by_id, get_governorate_by_slug, search_governorates, get_trusted_client_ip
+from .metrics import render_prometheus
+from .page_cache import anonymous_cache_page
+from .downloads import send_local_file, signed_file_name
 
 import json
 import os
 from django.conf import settings
 
 
+@anonymous_cache_page(group='candidates')
 def home(request):
     """
     الصفحة الرئيسية للموقع (Landing Page)
     """
     featured_candidates = Candidate.objects.filter(is_featured=True).order_by("name")[:6]
+    featured_candidates = render_candidate_cards(
+        ({'candidate': candidate} for candidate in featured_candidates),
+        template_name=COMPACT_CARD_TEMPLATE,
+    )
     
-    # Get latest news for ticker
-    latest_news = News.get_ticker_news()[:5]
+    # Latest news from the precomputed homepage list
+    latest_news = get_homepage_news_items()
     
     context = {
         'page_title': 'الصفحة الرئيسية',
@@ -44,6 +53,7 @@ def home(request):
     }
     return render(request, 'core/index.html', context)
 
+@anonymous_cache_page(group='candidates')
 def governorates(request):
     """
     صفحة قائمة المحافظات مع البحث المتقدم - تستخدم ملف JSON
@@ -58,42 +68,16 @@ def governorates(request):
     else:
         governorates_list = load_governorates_data()
     
-    # Calculate statistics for each governorate
-    governorates_with_stats = []
-    for governorate in governorates_list:
-        # Get candidates for this governorate
-        candidates = Candidate.objects.filter(governorate_id=governorate['id'])
-        total_candidates = candidates.count()
-        
-        # Calculate total activity
-        total_messages = sum(c.messages.count() for c in candidates)
-        total_votes = sum(c.votes.count() for c in candidates)
-        total_ratings = sum(c.ratings.count() for c in candidates)
-        total_activity = total_messages + total_votes + total_ratings
-        
-        # Calculate average rating for governorate
-        all_ratings = []
-        for candidate in candidates:
-            candidate_ratings = candidate.ratings.all()
-            if candidate_ratings.exists():
-                avg_rating = sum(r.stars for r in candidate_ratings) / len(candidate_ratings)
-                all_ratings.append(avg_rating)
-        
-        avg_governorate_rating = sum(all_ratings) / len(all_ratings) if all_ratings else 0
-        
-        # Get total citizens for this governorate
-        total_citizens = Citizen.objects.filter(governorate_id=governorate["id"]).count()
-        
-        governorates_with_stats.append({
-            'governorate': governorate,
-            'total_candidates': total_candidates,
-            'total_messages': total_messages,
-            'total_votes': total_votes,
-            'total_ratings': total_ratings,
-            'total_activity': total_activity,
-            'avg_rating': round(avg_governorate_rating, 1),
-            'total_citizens': total_citizens,
-        })
+    # Attach the cached per-governorate aggregates
+    stats = get_governorates_stats()
+    empty_stats = {
+        'total_candidates': 0, 'total_messages': 0, 'total_votes': 0, 'total_ratings': 0,
+        'total_activity': 0, 'avg_rating': 0, 'total_citizens': 0,
+    }
+    governorates_with_stats = [
+        {'governorate': governorate, **stats.get(governorate['id'], empty_stats)}
+        for governorate in governorates_list
+    ]
     
     # Apply sorting
     if sort_by == 'candidates_count':
@@ -114,6 +98,7 @@ def governorates(request):
     return render(request, 'core/governorates.html', context)
 
 
+@anonymous_cache_page(group='candidates')
 def governorate_detail(request, governorate_slug):
     """
     صفحة تفاصيل محافظة معينة مع قائمة المرشحين
@@ -140,55 +125,35 @@ def governorate_detail(request, governorate_slug):
             Q(electoral_program__icontains=search_query)
         )
     
-    # Calculate statistics for each candidate
-    candidates_with_stats = []
-    for candidate in candidates:
-        # Calculate statistics
-        total_votes = candidate.votes.count()
-        approve_votes = candidate.votes.filter(vote_type='approve').count()
-        disapprove_votes = candidate.votes.filter(vote_type='disapprove').count()
-        
-        ratings = candidate.ratings.all()
-        avg_rating = ratings.aggregate(Avg('stars'))['stars__avg'] or 0
-        total_ratings = ratings.count()
-        
-        total_messages = candidate.messages.count()
-        total_activity = total_votes + total_ratings + total_messages
-        
-        candidates_with_stats.append({
-            'candidate': candidate,
-            'total_votes': total_votes,
-            'approve_votes': approve_votes,
-            'disapprove_votes': disapprove_votes,
-            'avg_rating': round(avg_rating, 1),
-            'total_ratings': total_ratings,
-            'total_messages': total_messages,
-            'total_activity': total_activity,
-        })
+    # Calculate statistics for all candidates in one query
+    candidates = annotate_card_stats(candidates)
     
     # Apply sorting
     if sort_by == 'rating':
-        candidates_with_stats.sort(key=lambda x: x['avg_rating'], reverse=True)
+        candidates = candidates.order_by('-avg_rating', 'name')
     elif sort_by == 'votes':
-        candidates_with_stats.sort(key=lambda x: x['total_votes'], reverse=True)
+        candidates = candidates.order_by('-total_votes', 'name')
     elif sort_by == 'activity':
-        candidates_with_stats.sort(key=lambda x: x['total_activity'], reverse=True)
+        candidates = candidates.order_by('-total_activity', 'name')
     else:
         # Default sort by name
-        candidates_with_stats.sort(key=lambda x: x['candidate'].name)
+        candidates = candidates.order_by('name')
     
     # Pagination
-    paginator = Paginator(candidates_with_stats, 12)  # Show 12 candidates per page
+    paginator = Paginator(candidates, 12)  # Show 12 candidates per page
     page_number = request.GET.get('page')
     page_obj = paginator.get_page(page_number)
     
+    # Render the cards of the current page, mostly from cache
+    page_obj.object_list = render_candidate_cards(card_stats(candidate) for candidate in page_obj.object_list)
+    
     context = {
         'page_title': f'مرشحو {governorate["name_ar"]}',
         'governorate': governorate,
         'page_obj': page_obj,
         'search_query': search_query,
         'sort_by': sort_by,
-        'total_candidates': len(candidates_with_stats),
+        'total_candidates': paginator.count,
     }
     return render(request, 'core/governorate_detail.html', context)
 
@@ -206,6 +171,7 @@ def citizen_login_required(request):
         return redirect('accounts:citizen_register')
 
 
+@anonymous_cache_page(group='pages')
 def about(request):
     """
     صفحة حول الموقع
@@ -254,6 +220,7 @@ def contact(request):
     return render(request, 'naebak/contact.html', context)
 
 
+@anonymous_cache_page(group='pages')
 def privacy_policy(request):
     """
     صفحة سياسة الخصوصية
@@ -265,6 +232,7 @@ def privacy_policy(request):
     return render(request, 'naebak/privacy_policy.html', context)
 
 
+@anonymous_cache_page(group='pages')
 def terms_of_service(request):
     """
     صفحة شروط الخدمة
@@ -334,6 +302,26 @@ def api_candidates_search(request):
 
 
 
+@require_GET
+def metrics(request):
+    """
+    Prometheus metrics endpoint
+
+    Available to staff users, to addresses in METRICS_ALLOWED_IPS and to
+    scrapers presenting METRICS_TOKEN as a bearer token.
+    """
+    token = getattr(settings, 'METRICS_TOKEN', '')
+    allowed = (
+        request.user.is_staff
+        or get_trusted_client_ip(request) in getattr(settings, 'METRICS_ALLOWED_IPS', [])
+        or (token and request.META.get('HTTP_AUTHORIZATION') == f'Bearer {token}')
+    )
+    if not allowed:
+        return HttpResponse(status=403)
+
+    return HttpResponse(render_prometheus(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+
 @login_required
 def profile_view(request):
     """
@@ -363,7 +351,10 @@ def logout_view(request):
     return redirect("core:home")
 
 
-
-
-
-
+@require_GET
+def signed_download(request, token):
+    """
+    تنزيل ملف عبر رابط موقّع ومؤقت (بديل محلي لروابط GCS الموقّعة)
+    """
+    name = signed_file_name(token)
+    return send_local_file(request, default_storage, name, os.path.basename(name))
@@ -0,0 +1,143 @@
+"""
+Conversation summaries
+
+Every root message (a message without reply_to) starts a Conversation that
+stores the last message time, the number of messages and an unread counter
+per participant. The counters are updated with F() expressions when a
+message is written and reset when a participant opens the thread, so inbox
+listings and unread badges read one indexed table instead of walking
+reply_to trees.
+
+    record_message(message)          # from the post_save signal
+    mark_read(conversation, user)    # when a participant opens the thread
+    rebuild_conversations()          # after bulk inserts that skip signals
+"""
+
+from django.db import transaction
+from django.db.models import Count, F, Max, Q, Sum
+from django.db.models.functions import Greatest
+
+from .models import Conversation, Message
+
+
+def conversation_messages(root_id):
+    """The root message and its replies"""
+    return Message.objects.filter(Q(id=root_id) | Q(reply_to_id=root_id))
+
+
+def unread_field(conversation, user):
+    """Name of the unread counter belonging to `user`, or None for outsiders"""
+    if user.id is not None and user.id == conversation.citizen_id:
+        return 'citizen_unread_count'
+    candidate = getattr(user, 'candidate_profile', None)
+    if candidate is not None and candidate.id == conversation.candidate_id:
+        return 'candidate_unread_count'
+    return None
+
+
+def record_message(message):
+    """Start or update the conversation of a newly created message"""
+    if message.reply_to_id is None:
+        return Conversation.objects.create(
+            root=message,
+            candidate_id=message.candidate_id,
+            citizen_id=message.sender_user_id,
+            subject=message.subject,
+            last_message_at=message.timestamp,
+            message_count=1,
+            candidate_unread_count=0 if message.is_read else 1,
+        )
+
+    # Replies from the citizen who started the thread are unread for the candidate
+    from_citizen = (
+        message.sender_user_id is not None
+        and message.sender_user_id == message.reply_to.sender_user_id
+    )
+    updates = {
+        'last_message_at': Greatest(F('last_message_at'), message.timestamp),
+        'message_count': F('message_count') + 1,
+    }
+    if not message.is_read:
+        field = 'candidate_unread_count' if from_citizen else 'citizen_unread_count'
+        updates[field] = F(field) + 1
+    Conversation.objects.filter(root_id=message.reply_to_id).update(**updates)
+
+
+def refresh_conversation(root_id):
+    """Recompute one conversation's counters from its messages"""
+    root = Message.objects.filter(id=root_id).only('sender_user_id', 'is_read').first()
+    if root is None:
+        return
+    unread = Q(is_read=False)
+    stats = conversation_messages(root_id).aggregate(
+        message_count=Count('id'),
+        last_message_at=Max('timestamp'),
+        candidate_unread_count=Count('id', filter=unread & (Q(id=root_id) | Q(sender_user_id=root.sender_user_id))),
+        citizen_unread_count=Count('id', filter=unread & ~Q(id=root_id) & ~Q(sender_user_id=root.sender_user_id)),
+    )
+    Conversation.objects.filter(root_id=root_id).update(**stats)
+
+
+def mark_read(conversation, user):
+    """Mark everything the other participant wrote as read for `user`"""
+    field = unread_field(conversation, user)
+    if field is None:
+        return
+    with transaction.atomic():
+        conversation_messages(conversation.root_id).filter(is_read=False).exclude(
+            sender_user_id=user.id
+        ).update(is_read=True)
+        Conversation.objects.filter(pk=conversation.pk).update(**{field: 0})
+    setattr(conversation, field, 0)
+
+
+def unread_total(user):
+    """Unread messages across all of a user's conversations"""
+    total = Conversation.objects.filter(citizen_id=user.id).aggregate(
+        n=Sum('citizen_unread_count')
+    )['n'] or 0
+    candidate = getattr(user, 'candidate_profile', None)
+    if candidate is not None:
+        total += Conversation.objects.filter(candidate=candidate).aggregate(
+            n=Sum('candidate_unread_count')
+        )['n'] or 0
+    return total
+
+
+def build_conversations(message_model, conversation_model, batch_size=1000):
+    """
+    Recreate every conversation from the messages
+
+    Takes the models as arguments so migrations can pass historical models.
+    """
+    reply_unread = Q(replies__is_read=False)
+    from_citizen = Q(replies__sender_user_id=F('sender_user_id'))
+    roots = message_model.objects.filter(reply_to__isnull=True).annotate(
+        reply_count=Count('replies'),
+        last_reply_at=Max('replies__timestamp'),
+        citizen_replies_unread=Count('replies', filter=reply_unread & from_citizen),
+        candidate_replies_unread=Count('replies', filter=reply_unread & ~from_citizen),
+    ).order_by('id')
+
+    with transaction.atomic():
+        conversation_model.objects.all().delete()
+        rows = []
+        for root in roots.iterator(chunk_size=batch_size):
+            rows.append(conversation_model(
+                root_id=root.id,
+                candidate_id=root.candidate_id,
+                citizen_id=root.sender_user_id,
+                subject=root.subject,
+                last_message_at=max(filter(None, (root.timestamp, root.last_reply_at))),
+                message_count=root.reply_count + 1,
+                candidate_unread_count=root.citizen_replies_unread + (0 if root.is_read else 1),
+                citizen_unread_count=root.candidate_replies_unread,
+            ))
+            if len(rows) >= batch_size:
+                conversation_model.objects.bulk_create(rows)
+                rows = []
+        conversation_model.objects.bulk_create(rows)
+
+
+def rebuild_conversations(batch_size=1000):
+    build_conversations(Message, Conversation, batch_size)
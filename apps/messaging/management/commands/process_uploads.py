@@ -0,0 +1,61 @@
+"""
+Store finished attachment uploads in the background
+
+    python manage.py process_uploads            # long-running worker
+    python manage.py process_uploads --once     # single pass, e.g. from cron
+
+Each fully received upload is type-checked, hashed, stored once per content
+and thumbnailed when it is an image. Idle and rejected uploads are purged.
+"""
+
+import signal
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from apps.messaging.uploads import process_uploads, purge_stale_uploads
+
+
+class Command(BaseCommand):
+    help = 'Process fully received attachment uploads'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='Process waiting uploads and exit')
+        parser.add_argument('--interval', type=float, default=2.0,
+                            help='Seconds to sleep when no upload is waiting')
+
+    def handle(self, *args, **options):
+        if options['once']:
+            processed = process_uploads(limit=1000)
+            purged = purge_stale_uploads()
+            self.stdout.write(self.style.SUCCESS(f'{processed} uploads processed, {purged} stale uploads purged.'))
+            return
+
+        self.running = True
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGINT, self.stop)
+        self.stdout.write('Upload worker started.')
+
+        last_purge = 0.0
+        while self.running:
+            close_old_connections()
+            processed = process_uploads()
+            if processed:
+                self.stdout.write(f'{processed} uploads processed.')
+            if time.monotonic() - last_purge > 3600:
+                purge_stale_uploads()
+                last_purge = time.monotonic()
+            if not processed:
+                self.sleep(options['interval'])
+
+        self.stdout.write('Upload worker stopped.')
+
+    def sleep(self, seconds):
+        # Sleep in short steps so a stop signal is handled promptly
+        deadline = time.monotonic() + seconds
+        while self.running and time.monotonic() < deadline:
+            time.sleep(min(1.0, max(0.0, deadline - time.monotonic())))
+
+    def stop(self, signum, frame):
+        self.running = False
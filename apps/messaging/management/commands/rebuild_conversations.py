@@ -0,0 +1,26 @@
+"""
+Recreate the conversation summaries from the messages
+
+    python manage.py rebuild_conversations
+
+Needed after messages were inserted without signals (bulk_create, raw SQL)
+or when the unread counters are suspected to have drifted.
+"""
+
+from django.core.management.base import BaseCommand
+
+from apps.messaging.conversations import rebuild_conversations
+from apps.messaging.models import Conversation
+
+
+class Command(BaseCommand):
+    help = 'Rebuild conversation summaries and unread counters from messages'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        rebuild_conversations(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Rebuilt {Conversation.objects.count():,} conversations.'
+        ))
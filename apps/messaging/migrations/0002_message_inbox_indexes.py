@@ -0,0 +1,24 @@
+# Generated by Django 5.0.6 on 2026-10-19 14:43
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('candidates', '0001_initial'),
+        ('messaging', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='message',
+            index=models.Index(fields=['sender_user', 'timestamp', 'id'], name='messaging_m_sender__b1116f_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='message',
+            index=models.Index(fields=['candidate', 'timestamp', 'id'], name='messaging_m_candida_e62ea8_idx'),
+        ),
+    ]
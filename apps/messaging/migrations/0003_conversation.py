@@ -0,0 +1,44 @@
+# Generated by Django 5.0.6 on 2026-10-19 14:45
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+from apps.messaging.conversations import build_conversations
+
+
+def fill_conversations(apps, schema_editor):
+    build_conversations(apps.get_model('messaging', 'Message'), apps.get_model('messaging', 'Conversation'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('candidates', '0001_initial'),
+        ('messaging', '0002_message_inbox_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Conversation',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('subject', models.CharField(max_length=300, verbose_name='الموضوع')),
+                ('last_message_at', models.DateTimeField(verbose_name='آخر رسالة')),
+                ('message_count', models.PositiveIntegerField(default=1, verbose_name='عدد الرسائل')),
+                ('candidate_unread_count', models.PositiveIntegerField(default=0, verbose_name='غير مقروءة لدى المرشح')),
+                ('citizen_unread_count', models.PositiveIntegerField(default=0, verbose_name='غير مقروءة لدى المواطن')),
+                ('candidate', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='conversations', to='candidates.candidate')),
+                ('citizen', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='conversations', to=settings.AUTH_USER_MODEL, verbose_name='المواطن')),
+                ('root', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='started_conversation', to='messaging.message', verbose_name='الرسالة الأولى')),
+            ],
+            options={
+                'verbose_name': 'محادثة',
+                'verbose_name_plural': 'المحادثات',
+                'ordering': ['-last_message_at', '-id'],
+                'indexes': [models.Index(fields=['candidate', 'last_message_at', 'id'], name='messaging_c_candida_4c2d2d_idx'), models.Index(fields=['citizen', 'last_message_at', 'id'], name='messaging_c_citizen_599751_idx')],
+            },
+        ),
+        migrations.RunPython(fill_conversations, migrations.RunPython.noop),
+    ]
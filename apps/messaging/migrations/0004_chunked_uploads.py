@@ -0,0 +1,54 @@
+# Generated by Django 5.0.6 on 2026-10-19 14:49
+
+import apps.messaging.models
+import django.db.models.deletion
+import uuid
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('messaging', '0003_conversation'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StoredFile',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('sha256', models.CharField(max_length=64, unique=True, verbose_name='بصمة المحتوى')),
+                ('file', models.FileField(max_length=255, upload_to=apps.messaging.models.blob_path, verbose_name='الملف')),
+                ('size', models.PositiveBigIntegerField(verbose_name='الحجم')),
+                ('content_type', models.CharField(max_length=100, verbose_name='نوع المحتوى')),
+                ('thumbnail', models.ImageField(blank=True, null=True, upload_to='message_attachments/thumbs/', verbose_name='صورة مصغرة')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name': 'ملف مخزن',
+                'verbose_name_plural': 'الملفات المخزنة',
+            },
+        ),
+        migrations.CreateModel(
+            name='Upload',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('filename', models.CharField(max_length=255, verbose_name='اسم الملف')),
+                ('size', models.PositiveBigIntegerField(verbose_name='الحجم المعلن')),
+                ('offset', models.PositiveBigIntegerField(default=0, verbose_name='البايتات المستلمة')),
+                ('status', models.CharField(choices=[('receiving', 'قيد الاستلام'), ('uploaded', 'بانتظار المعالجة'), ('ready', 'جاهز'), ('rejected', 'مرفوض')], default='receiving', max_length=10, verbose_name='الحالة')),
+                ('error', models.CharField(blank=True, max_length=200, verbose_name='سبب الرفض')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('stored_file', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='uploads', to='messaging.storedfile')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='uploads', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'رفع ملف',
+                'verbose_name_plural': 'عمليات رفع الملفات',
+                'indexes': [models.Index(fields=['status', 'updated_at'], name='messaging_u_status_6cf231_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.0.6 on 2026-10-19 15:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('messaging', '0004_chunked_uploads'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='message',
+            name='attachment_name',
+            field=models.CharField(blank=True, max_length=255, verbose_name='اسم المرفق'),
+        ),
+    ]
@@ -1,3 +1,5 @@
+import uuid
+
 from django.db import models
 from django.contrib.auth.models import User
 from django.utils import timezone
@@ -12,6 +14,7 @@ class Message(models.Model):
     subject = models.CharField(max_length=300, verbose_name="موضوع الرسالة")
     content = models.TextField(verbose_name="محتوى الرسالة")
     attachment = models.FileField(upload_to='message_attachments/', null=True, blank=True, verbose_name="مرفق")
+    attachment_name = models.CharField(max_length=255, blank=True, verbose_name="اسم المرفق")
     timestamp = models.DateTimeField(default=timezone.now, verbose_name="وقت الإرسال")
     is_read = models.BooleanField(default=False, verbose_name="مقروءة")
     reply_to = models.ForeignKey('self', on_delete=models.CASCADE, null=True, blank=True, related_name='replies')
@@ -20,7 +23,89 @@ class Message(models.Model):
         verbose_name = "رسالة"
         verbose_name_plural = "الرسائل"
         ordering = ['-timestamp']
+        indexes = [
+            models.Index(fields=['sender_user', 'timestamp', 'id']),
+            models.Index(fields=['candidate', 'timestamp', 'id']),
+        ]
 
     def __str__(self):
         sender = self.sender_user.get_full_name() if self.sender_user else self.sender_name
         return f"رسالة من {sender} إلى {self.candidate.name}"
+
+
+class Conversation(models.Model):
+    """A root message and its replies, with counters kept up to date on write"""
+    root = models.OneToOneField(Message, on_delete=models.CASCADE, related_name='started_conversation', verbose_name="الرسالة الأولى")
+    candidate = models.ForeignKey('candidates.Candidate', on_delete=models.CASCADE, related_name='conversations')
+    citizen = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='conversations', verbose_name="المواطن")
+    subject = models.CharField(max_length=300, verbose_name="الموضوع")
+    last_message_at = models.DateTimeField(verbose_name="آخر رسالة")
+    message_count = models.PositiveIntegerField(default=1, verbose_name="عدد الرسائل")
+    candidate_unread_count = models.PositiveIntegerField(default=0, verbose_name="غير مقروءة لدى المرشح")
+    citizen_unread_count = models.PositiveIntegerField(default=0, verbose_name="غير مقروءة لدى المواطن")
+
+    class Meta:
+        verbose_name = "محادثة"
+        verbose_name_plural = "المحادثات"
+        ordering = ['-last_message_at', '-id']
+        indexes = [
+            models.Index(fields=['candidate', 'last_message_at', 'id']),
+            models.Index(fields=['citizen', 'last_message_at', 'id']),
+        ]
+
+    def __str__(self):
+        return f"محادثة: {self.subject}"
+
+
+def blob_path(instance, filename):
+    """Content-addressed path: identical files share one stored object"""
+    ext = filename.rsplit('.', 1)[-1].lower() if '.' in filename else 'bin'
+    return f'message_attachments/{instance.sha256[:2]}/{instance.sha256}.{ext}'
+
+
+class StoredFile(models.Model):
+    """An attachment stored once per distinct content (SHA-256)"""
+    sha256 = models.CharField(max_length=64, unique=True, verbose_name="بصمة المحتوى")
+    file = models.FileField(upload_to=blob_path, max_length=255, verbose_name="الملف")
+    size = models.PositiveBigIntegerField(verbose_name="الحجم")
+    content_type = models.CharField(max_length=100, verbose_name="نوع المحتوى")
+    thumbnail = models.ImageField(upload_to='message_attachments/thumbs/', null=True, blank=True, verbose_name="صورة مصغرة")
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = "ملف مخزن"
+        verbose_name_plural = "الملفات المخزنة"
+
+    def __str__(self):
+        return self.sha256
+
+
+class Upload(models.Model):
+    """A chunked, resumable attachment upload in progress"""
+    STATUS_CHOICES = [
+        ('receiving', 'قيد الاستلام'),
+        ('uploaded', 'بانتظار المعالجة'),
+        ('ready', 'جاهز'),
+        ('rejected', 'مرفوض'),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='uploads')
+    filename = models.CharField(max_length=255, verbose_name="اسم الملف")
+    size = models.PositiveBigIntegerField(verbose_name="الحجم المعلن")
+    offset = models.PositiveBigIntegerField(default=0, verbose_name="البايتات المستلمة")
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='receiving', verbose_name="الحالة")
+    error = models.CharField(max_length=200, blank=True, verbose_name="سبب الرفض")
+    stored_file = models.ForeignKey(StoredFile, on_delete=models.SET_NULL, null=True, blank=True, related_name='uploads')
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "رفع ملف"
+        verbose_name_plural = "عمليات رفع الملفات"
+        indexes = [
+            models.Index(fields=['status', 'updated_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.filename} ({self.get_status_display()})"
@@ -0,0 +1,25 @@
+"""
+Signals for the messaging app
+"""
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .conversations import record_message, refresh_conversation
+from .models import Message
+
+
+@receiver(post_save, sender=Message)
+def update_conversation(sender, instance, created, **kwargs):
+    """Start a conversation for root messages and bump its counters for replies"""
+    if created:
+        record_message(instance)
+
+
+@receiver(post_delete, sender=Message)
+def recount_conversation(sender, instance, **kwargs):
+    """Recount the conversation a deleted reply belonged to"""
+    if instance.reply_to_id is not None:
+        root_id = instance.reply_to_id
+        transaction.on_commit(lambda: refresh_conversation(root_id))
@@ -0,0 +1,257 @@
+"""
+Chunked, resumable attachment uploads
+
+Request threads only append bytes to a part file in ATTACHMENT_UPLOAD_DIR;
+hashing, type checks, deduplication and thumbnails run in the
+process_uploads worker, which must see the same directory (a shared volume,
+since chunks of one upload may reach different web instances).
+
+    POST  uploads/              filename, size -> {id, offset, chunk_size}
+    PATCH uploads/<id>/         raw chunk, Upload-Offset header -> {offset, status}
+    GET   uploads/<id>/         current offset and status, to resume
+
+A chunk is accepted only at the current offset, so a client that lost a
+response asks for the offset and continues from there. Size and type limits
+are enforced while data streams in: the declared size caps every chunk and
+the first bytes must match the file extension. Finished files are stored
+once per SHA-256, so the same file sent to many candidates is kept once.
+"""
+
+import hashlib
+import io
+import logging
+import os
+from datetime import timedelta
+from pathlib import Path
+
+from django.conf import settings
+from django.core.files import File
+from django.core.files.base import ContentFile
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from .models import StoredFile, Upload
+
+logger = logging.getLogger(__name__)
+
+READ_SIZE = 64 * 1024
+SNIFF_SIZE = 16
+THUMBNAIL_SIZE = (320, 320)
+
+# Sniffed content type -> extensions a file of that type may have
+CONTENT_TYPES = {
+    'application/pdf': {'pdf'},
+    'image/png': {'png'},
+    'image/jpeg': {'jpg', 'jpeg'},
+    'image/gif': {'gif'},
+    'image/webp': {'webp'},
+    'application/zip': {'docx', 'xlsx', 'pptx'},
+    'application/x-ole-storage': {'doc', 'xls', 'ppt'},
+}
+
+
+class UploadError(Exception):
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.status = status
+
+
+def sniff_type(head):
+    """Content type from the first bytes of a file, or None if unknown"""
+    if head.startswith(b'%PDF-'):
+        return 'application/pdf'
+    if head.startswith(b'\x89PNG\r\n\x1a\n'):
+        return 'image/png'
+    if head.startswith(b'\xff\xd8\xff'):
+        return 'image/jpeg'
+    if head[:6] in (b'GIF87a', b'GIF89a'):
+        return 'image/gif'
+    if head[:4] == b'RIFF' and head[8:12] == b'WEBP':
+        return 'image/webp'
+    if head.startswith(b'PK\x03\x04'):
+        return 'application/zip'
+    if head.startswith(b'\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1'):
+        return 'application/x-ole-storage'
+    return None
+
+
+def extension(filename):
+    return filename.rsplit('.', 1)[-1].lower() if '.' in filename else ''
+
+
+def matches_extension(head, filename):
+    content_type = sniff_type(head)
+    return content_type is not None and extension(filename) in CONTENT_TYPES[content_type]
+
+
+def part_path(upload):
+    return Path(settings.ATTACHMENT_UPLOAD_DIR) / f'{upload.id}.part'
+
+
+def start_upload(user, filename, size):
+    """Validate the declared file and open an upload for it"""
+    filename = os.path.basename(filename or '').strip()
+    if not filename or extension(filename) not in settings.ATTACHMENT_ALLOWED_EXTENSIONS:
+        raise UploadError('File type not allowed', 415)
+    try:
+        size = int(size)
+    except (TypeError, ValueError):
+        raise UploadError('Invalid size')
+    if size <= 0:
+        raise UploadError('Invalid size')
+    if size > settings.ATTACHMENT_MAX_SIZE:
+        raise UploadError('File too large', 413)
+
+    upload = Upload.objects.create(user=user, filename=filename[:255], size=size)
+    part_path(upload).parent.mkdir(parents=True, exist_ok=True)
+    part_path(upload).touch()
+    return upload
+
+
+def receive_chunk(upload, offset, stream, length):
+    """
+    Append `length` bytes read from `stream` at `offset`
+
+    The upload row is locked while the chunk is written, and offset and
+    status are checked again under the lock, so a repeated or concurrent
+    chunk for the same offset is written at most once and never truncates
+    data an earlier request already committed.
+    """
+    if length <= 0 or length > settings.ATTACHMENT_CHUNK_SIZE:
+        raise UploadError('Invalid chunk size', 413)
+
+    mismatch = False
+    with transaction.atomic():
+        upload = Upload.objects.select_for_update().get(pk=upload.pk)
+        if upload.status != 'receiving':
+            raise UploadError('Upload is not accepting data', 409)
+        if offset != upload.offset:
+            raise UploadError('Offset mismatch', 409)
+        if offset + length > upload.size:
+            raise UploadError('Chunk exceeds declared size', 413)
+
+        path = part_path(upload)
+        if not path.exists():
+            raise UploadError('Upload expired', 410)
+        written = 0
+        with open(path, 'r+b') as part:
+            part.seek(offset)
+            while written < length:
+                data = stream.read(min(READ_SIZE, length - written))
+                if not data:
+                    break
+                if offset == 0 and written == 0 and not matches_extension(data[:SNIFF_SIZE], upload.filename):
+                    mismatch = True
+                    break
+                part.write(data)
+                written += len(data)
+            part.truncate(offset + written)
+
+        if not mismatch:
+            upload.offset = offset + written
+            upload.status = 'uploaded' if upload.offset == upload.size else 'receiving'
+            upload.save(update_fields=['offset', 'status', 'updated_at'])
+
+    if mismatch:
+        reject(upload, 'Content does not match file type')
+        raise UploadError('Content does not match file type', 415)
+    return upload
+
+
+def reject(upload, reason):
+    Upload.objects.filter(pk=upload.pk).update(status='rejected', error=reason[:200], updated_at=timezone.now())
+    upload.status, upload.error = 'rejected', reason
+    part_path(upload).unlink(missing_ok=True)
+
+
+def make_thumbnail(stored_file):
+    from PIL import Image
+
+    try:
+        with stored_file.file.open('rb') as f, Image.open(f) as image:
+            image.thumbnail(THUMBNAIL_SIZE)
+            if image.mode not in ('RGB', 'RGBA'):
+                image = image.convert('RGB')
+            buffer = io.BytesIO()
+            image.save(buffer, 'WEBP', quality=80)
+    except Exception as e:
+        logger.warning(f"Could not create thumbnail for {stored_file.sha256}: {e}")
+        return
+    stored_file.thumbnail.save(f'{stored_file.sha256}.webp', ContentFile(buffer.getvalue()), save=False)
+
+
+def store_part(path, filename):
+    """Hash a finished part file and store it unless the content already exists"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as part:
+        head = part.read(SNIFF_SIZE)
+        digest.update(head)
+        for data in iter(lambda: part.read(READ_SIZE), b''):
+            digest.update(data)
+    sha256 = digest.hexdigest()
+
+    stored_file = StoredFile.objects.filter(sha256=sha256).first()
+    if stored_file is not None:
+        return stored_file
+
+    stored_file = StoredFile(sha256=sha256, size=path.stat().st_size, content_type=sniff_type(head))
+    with open(path, 'rb') as part:
+        stored_file.file.save(filename, File(part), save=False)
+    if stored_file.content_type.startswith('image/'):
+        make_thumbnail(stored_file)
+    try:
+        with transaction.atomic():
+            stored_file.save()
+    except IntegrityError:
+        # Another worker stored the same content first
+        return StoredFile.objects.get(sha256=sha256)
+    return stored_file
+
+
+def process_upload(upload):
+    """Check, deduplicate and store a fully received upload"""
+    path = part_path(upload)
+    if not path.exists():
+        reject(upload, 'Upload data missing')
+        return upload
+    with open(path, 'rb') as part:
+        head = part.read(SNIFF_SIZE)
+    if path.stat().st_size != upload.size or not matches_extension(head, upload.filename):
+        reject(upload, 'Content does not match file type')
+        return upload
+
+    upload.stored_file = store_part(path, upload.filename)
+    upload.status = 'ready'
+    upload.save(update_fields=['stored_file', 'status', 'updated_at'])
+    path.unlink(missing_ok=True)
+    return upload
+
+
+def process_uploads(limit=20):
+    """Process waiting uploads; returns how many were handled"""
+    processed = 0
+    while processed < limit:
+        with transaction.atomic():
+            upload = Upload.objects.select_for_update(skip_locked=True).filter(
+                status='uploaded',
+            ).order_by('updated_at').first()
+            if upload is None:
+                break
+            try:
+                # A savepoint, so a database error leaves the transaction usable for reject()
+                with transaction.atomic():
+                    process_upload(upload)
+            except Exception as e:
+                logger.exception(f"Processing upload {upload.id} failed: {e}")
+                reject(upload, 'Processing failed')
+        processed += 1
+    return processed
+
+
+def purge_stale_uploads():
+    """Drop uploads that stopped receiving data, and their part files"""
+    cutoff = timezone.now() - timedelta(seconds=settings.ATTACHMENT_UPLOAD_EXPIRY)
+    stale = Upload.objects.filter(status__in=['receiving', 'rejected'], updated_at__lt=cutoff)
+    for upload in stale.only('id'):
+        part_path(upload).unlink(missing_ok=True)
+    return stale.delete()[0]
@@ -13,5 +13,12 @@ urlpatterns = [
     path('inbox/', views.message_inbox, name='message_inbox'),
     path('thread/<int:message_id>/', views.message_thread, name='message_thread'),
     path('reply/<int:message_id>/', views.reply_message, name='reply_message'),
+    path('attachment/<int:message_id>/', views.download_attachment, name='download_attachment'),
+
+    # API endpoints
+    path('api/inbox/', views.api_message_inbox, name='api_message_inbox'),
+    path('api/thread/<int:message_id>/', views.api_message_thread, name='api_message_thread'),
+    path('api/uploads/', views.api_upload_start, name='api_upload_start'),
+    path('api/uploads/<uuid:upload_id>/', views.api_upload, name='api_upload'),
 ]
 
@@ -2,13 +2,27 @@
 Views for messaging app
 """
 
+from django.conf import settings
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
-from django.http import HttpResponse
+from django.core.exceptions import ValidationError
+from django.db.models import Prefetch, Q
+from django.http import Http404, JsonResponse
+from django.urls import reverse
+from django.views.decorators.http import require_GET, require_http_methods, require_POST
+from urllib.parse import urlencode
 
-from .models import Message
+from .conversations import mark_read, unread_total
+from .models import Conversation, Message, Upload
+from .uploads import UploadError, receive_chunk, start_upload
 from apps.candidates.models import Candidate
+from apps.core.downloads import serve_file
+from apps.core.pagination import KeysetPaginator
+
+
+INBOX_PER_PAGE = 20
+THREAD_PER_PAGE = 50
 
 
 @login_required
@@ -22,36 +36,145 @@ def send_message(request, candidate_id):
         subject = request.POST.get('subject', '').strip()
         content = request.POST.get('content', '').strip()
         
-        if subject and content:
-            message = Message.objects.create(
+        upload_id = request.POST.get('upload_id')
+        upload = None
+        if upload_id:
+            try:
+                upload = Upload.objects.select_related('stored_file').get(
+                    id=upload_id, user=request.user, status='ready'
+                )
+            except (Upload.DoesNotExist, ValidationError):
+                messages.error(request, 'المرفق غير جاهز بعد، يرجى المحاولة بعد لحظات.')
+                upload_id = None
+        
+        if subject and content and (upload or not upload_id):
+            message = Message(
                 candidate=candidate,
                 sender_user=request.user,
                 subject=subject,
                 content=content
             )
+            if upload is not None:
+                # Point at the shared, content-addressed copy
+                message.attachment.name = upload.stored_file.file.name
+                message.attachment_name = upload.filename
+            message.save()
             messages.success(request, 'تم إرسال الرسالة بنجاح.')
             return redirect('candidates:candidate_detail', pk=candidate_id)
-        else:
+        elif not upload_id or upload:
             messages.error(request, 'يرجى ملء جميع الحقول المطلوبة.')
     
     context = {
         'candidate': candidate,
         'page_title': f'إرسال رسالة إلى {candidate.name}',
+        'attachment_accept': ','.join(f'.{ext}' for ext in settings.ATTACHMENT_ALLOWED_EXTENSIONS),
+        'attachment_max_mb': settings.ATTACHMENT_MAX_SIZE // (1024 * 1024),
     }
     return render(request, 'messaging/send_message.html', context)
 
 
+def inbox_filters(user):
+    """
+    Conditions selecting the messages a user sent and the ones they received
+
+    Citizens receive the replies to their messages; a candidate also receives
+    the messages addressed to their profile.
+    """
+    sent = Q(sender_user=user)
+    received = Q(reply_to__sender_user=user)
+    candidate = getattr(user, 'candidate_profile', None)
+    if candidate is not None:
+        received |= Q(candidate=candidate, reply_to__isnull=True)
+    return sent, received & ~Q(sender_user=user)
+
+
+def get_inbox_page(user, message_type='all', search_query='', cursor=None):
+    """
+    Get one page of a user's messages, newest first, by seeking on (timestamp, id)
+    """
+    sent, received = inbox_filters(user)
+    if message_type == 'sent':
+        condition = sent
+    elif message_type == 'received':
+        condition = received
+    else:
+        condition = sent | received
+
+    inbox = Message.objects.filter(condition).select_related('candidate', 'sender_user').prefetch_related(
+        Prefetch('replies', queryset=Message.objects.select_related('sender_user').order_by('timestamp', 'id'))
+    )
+    if search_query:
+        inbox = inbox.filter(
+            Q(subject__icontains=search_query) |
+            Q(content__icontains=search_query) |
+            Q(candidate__name__icontains=search_query)
+        )
+    return KeysetPaginator(inbox, ordering=('-timestamp', '-id'), per_page=INBOX_PER_PAGE).get_page(cursor)
+
+
+def get_thread_root(user, message_id):
+    """
+    Get the root message of the conversation containing a message, or None
+    when the user is neither its sender nor its candidate
+    """
+    message = get_object_or_404(
+        Message.objects.select_related('candidate', 'reply_to__candidate'), id=message_id
+    )
+    root = message.reply_to or message
+    candidate = getattr(user, 'candidate_profile', None)
+    if root.sender_user_id != user.id and (candidate is None or candidate.id != root.candidate_id):
+        return None
+    return root
+
+
+def get_thread_page(root, cursor=None):
+    """
+    Get one page of a conversation; the first page holds the latest messages
+    """
+    conversation = Message.objects.filter(Q(id=root.id) | Q(reply_to=root)).select_related('candidate', 'sender_user')
+    return KeysetPaginator(conversation, ordering=('-timestamp', '-id'), per_page=THREAD_PER_PAGE).get_page(cursor)
+
+
+def serialize_message(message):
+    return {
+        'id': message.id,
+        'reply_to': message.reply_to_id,
+        'candidate_id': message.candidate_id,
+        'candidate_name': message.candidate.name,
+        'sender_name': message.sender_user.get_full_name() if message.sender_user else message.sender_name,
+        'subject': message.subject,
+        'content': message.content,
+        'attachment_url': reverse('messaging:download_attachment', args=[message.id]) if message.attachment else None,
+        'attachment_name': message.attachment_name if message.attachment else None,
+        'timestamp': message.timestamp.isoformat(),
+        'is_read': message.is_read,
+    }
+
+
 @login_required
 def message_inbox(request):
     """
     Message inbox for users
     """
-    # Get messages sent by the user
-    sent_messages = Message.objects.filter(sender_user=request.user).order_by('-timestamp')
-    
+    message_type = request.GET.get('type', 'all')  # all, sent, received
+    search_query = request.GET.get('search', '').strip()
+    page_obj = get_inbox_page(request.user, message_type, search_query, request.GET.get('cursor'))
+
+    sent, received = inbox_filters(request.user)
+    # Two counts, each on its own index, rather than one pass over all messages
+    stats = {
+        'total_sent': Message.objects.filter(sent).count(),
+        'total_received': Message.objects.filter(received).count(),
+        'unread_received': unread_total(request.user),
+    }
+
     context = {
-        'sent_messages': sent_messages,
+        'page_obj': page_obj,
+        'message_type': message_type,
+        'search_query': search_query,
+        'cursor_query': urlencode({'type': message_type, 'search': search_query}),
         'page_title': 'صندوق الرسائل',
+        **stats,
     }
     return render(request, 'messaging/messages_management.html', context)
 
@@ -61,20 +184,87 @@ def message_thread(request, message_id):
     """
     View message thread
     """
-    message = get_object_or_404(Message, id=message_id)
-    
-    # Check if user has permission to view this message
-    if message.sender_user != request.user and not hasattr(request.user, 'candidate_profile'):
+    root_message = get_thread_root(request.user, message_id)
+    if root_message is None:
         messages.error(request, 'ليس لديك صلاحية لعرض هذه الرسالة.')
         return redirect('messaging:message_inbox')
-    
+
+    conversation = Conversation.objects.filter(root=root_message).first()
+    if conversation is not None:
+        mark_read(conversation, request.user)
+    page_obj = get_thread_page(root_message, request.GET.get('cursor'))
+
+    candidate = getattr(request.user, 'candidate_profile', None)
     context = {
-        'message': message,
-        'page_title': f'الرسالة: {message.subject}',
+        'root_message': root_message,
+        'conversation_messages': list(reversed(page_obj.object_list)),
+        'page_obj': page_obj,
+        'total_messages': conversation.message_count if conversation else len(page_obj),
+        'can_reply': candidate is not None and candidate.id == root_message.candidate_id,
+        'page_title': f'الرسالة: {root_message.subject}',
     }
     return render(request, 'messaging/message_thread.html', context)
 
 
+@login_required
+@require_GET
+def download_attachment(request, message_id):
+    """
+    Download a message attachment without reading it into memory
+    """
+    root_message = get_thread_root(request.user, message_id)
+    if root_message is None:
+        raise Http404('Message not found')
+    message = root_message if root_message.id == message_id else get_object_or_404(Message, id=message_id)
+    if not message.attachment:
+        raise Http404('No attachment found')
+    # Shared blobs are named by their hash; download under the uploaded name
+    return serve_file(request, message.attachment, filename=message.attachment_name or None)
+
+
+@login_required
+@require_GET
+def api_message_inbox(request):
+    """
+    API endpoint listing the user's messages page by page (cursor pagination)
+    """
+    page_obj = get_inbox_page(
+        request.user,
+        request.GET.get('type', 'all'),
+        request.GET.get('search', '').strip(),
+        request.GET.get('cursor'),
+    )
+    return JsonResponse({
+        'messages': [
+            {
+                **serialize_message(message),
+                'replies_count': len(message.replies.all()),
+            }
+            for message in page_obj
+        ],
+        'next_cursor': page_obj.next_cursor,
+        'previous_cursor': page_obj.previous_cursor,
+    })
+
+
+@login_required
+@require_GET
+def api_message_thread(request, message_id):
+    """
+    API endpoint listing a conversation page by page, latest messages first
+    """
+    root_message = get_thread_root(request.user, message_id)
+    if root_message is None:
+        return JsonResponse({'error': 'Forbidden'}, status=403)
+
+    page_obj = get_thread_page(root_message, request.GET.get('cursor'))
+    return JsonResponse({
+        'messages': [serialize_message(message) for message in page_obj],
+        'next_cursor': page_obj.next_cursor,
+        'previous_cursor': page_obj.previous_cursor,
+    })
+
+
 @login_required
 def reply_message(request, message_id):
     """
@@ -108,3 +298,48 @@ def reply_message(request, message_id):
         'page_title': f'الرد على: {original_message.subject}',
     }
     return render(request, 'messaging/reply_message.html', context)
+
+
+def upload_state(upload):
+    return {
+        'id': str(upload.id),
+        'offset': upload.offset,
+        'size': upload.size,
+        'status': upload.status,
+        'error': upload.error,
+        'chunk_size': settings.ATTACHMENT_CHUNK_SIZE,
+    }
+
+
+@login_required
+@require_POST
+def api_upload_start(request):
+    """
+    API endpoint opening a chunked attachment upload
+    """
+    try:
+        upload = start_upload(request.user, request.POST.get('filename'), request.POST.get('size'))
+    except UploadError as e:
+        return JsonResponse({'error': str(e)}, status=e.status)
+    return JsonResponse(upload_state(upload), status=201)
+
+
+@login_required
+@require_http_methods(['GET', 'PATCH'])
+def api_upload(request, upload_id):
+    """
+    API endpoint receiving one chunk (PATCH) or reporting progress (GET)
+    """
+    upload = get_object_or_404(Upload, id=upload_id, user=request.user)
+    if request.method == 'PATCH':
+        try:
+            offset = int(request.headers.get('Upload-Offset', ''))
+            length = int(request.headers.get('Content-Length', ''))
+        except ValueError:
+            return JsonResponse({'error': 'Upload-Offset and Content-Length are required', **upload_state(upload)}, status=400)
+        try:
+            upload = receive_chunk(upload, offset, request, length)
+        except UploadError as e:
+            upload.refresh_from_db()
+            return JsonResponse({'error': str(e), **upload_state(upload)}, status=e.status)
+    return JsonResponse(upload_state(upload))
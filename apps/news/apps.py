@@ -5,3 +5,6 @@ class NewsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.news'
     verbose_name = 'إدارة الأخبار'
+
+    def ready(self):
+        import apps.news.signals  # noqa: F401
@@ -0,0 +1,68 @@
+"""
+Public news listing with keyset pagination and cached page slices
+
+Every page of the listing is addressed by a cursor and cached under the
+current listing version; any news change or scheduler transition bumps the
+version, and slices also expire at the next publish_date/expire_date, so
+cached slices never outlive the data they were built from.
+"""
+
+import hashlib
+import time
+
+from django.core.cache import cache
+from django.utils import timezone
+
+from apps.core.pagination import KeysetPaginator
+from .models import News
+
+LIST_VERSION_KEY = 'news_list_version'
+LIST_SLICE_KEY = 'news_list_slice:{}:{}'
+LIST_PAGE_SIZE = 10
+LIST_SLICE_TIMEOUT = 60 * 60
+
+LIST_FIELDS = ('id', 'title', 'summary', 'priority', 'publish_date', 'views_count')
+
+
+def bump_list_version():
+    cache.set(LIST_VERSION_KEY, time.time_ns(), None)
+
+
+def get_list_version():
+    version = cache.get(LIST_VERSION_KEY)
+    if version is None:
+        version = time.time_ns()
+        cache.add(LIST_VERSION_KEY, version, None)
+    return version
+
+
+def slice_timeout():
+    """LIST_SLICE_TIMEOUT, cut short by the next scheduling boundary"""
+    from .ticker import next_boundary
+
+    now = timezone.now()
+    boundary = next_boundary(now)
+    if boundary is None:
+        return LIST_SLICE_TIMEOUT
+    return max(1, min(LIST_SLICE_TIMEOUT, int((boundary - now).total_seconds()) + 1))
+
+
+def get_news_page(cursor=None):
+    """
+    Get one page of published news, newest first, as a KeysetPage
+
+    Seeks on the (status, publish_date) index, so deep pages cost the same as
+    the first one.
+    """
+    cursor = cursor or ''
+    key = LIST_SLICE_KEY.format(get_list_version(), hashlib.md5(cursor.encode()).hexdigest())
+    page = cache.get(key)
+    if page is None:
+        paginator = KeysetPaginator(
+            News.get_active_news().only(*LIST_FIELDS),
+            ordering=('-publish_date', '-id'),
+            per_page=LIST_PAGE_SIZE,
+        )
+        page = paginator.get_page(cursor)
+        cache.set(key, page, slice_timeout())
+    return page
@@ -0,0 +1,22 @@
+"""
+Write buffered news view counts to the database
+
+    python manage.py flush_news_views
+
+Run it from cron for a regular flush and in the shutdown hook of the web
+workers so no buffered views are lost on deploy.
+"""
+
+from django.core.management.base import BaseCommand
+
+from apps.news.view_counter import flush_view_counts
+
+
+class Command(BaseCommand):
+    help = 'Flush buffered news view counts to the database'
+
+    def handle(self, *args, **options):
+        counts = flush_view_counts()
+        self.stdout.write(self.style.SUCCESS(
+            f'Flushed {sum(counts.values()):,} views for {len(counts):,} news items.'
+        ))
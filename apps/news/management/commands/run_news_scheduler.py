@@ -0,0 +1,55 @@
+"""
+Publish and expire news at their scheduled times
+
+    python manage.py run_news_scheduler            # long-running worker
+    python manage.py run_news_scheduler --once     # single pass, e.g. from cron
+
+The worker sleeps until the next publish_date/expire_date instant, but never
+longer than --max-wait seconds so newly scheduled news is picked up.
+"""
+
+import signal
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from apps.news.scheduler import apply_transitions, seconds_until_next_transition
+
+
+class Command(BaseCommand):
+    help = 'Move news between scheduled, published and archived at their publish and expire times'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='Apply due transitions and exit')
+        parser.add_argument('--max-wait', type=float, default=60.0,
+                            help='Maximum seconds to sleep between checks')
+
+    def handle(self, *args, **options):
+        if options['once']:
+            published, expired = apply_transitions()
+            self.stdout.write(self.style.SUCCESS(f'{published} news published, {expired} expired.'))
+            return
+
+        self.running = True
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGINT, self.stop)
+        self.stdout.write('News scheduler started.')
+
+        while self.running:
+            close_old_connections()
+            published, expired = apply_transitions()
+            if published or expired:
+                self.stdout.write(f'{published} news published, {expired} expired.')
+            self.sleep(seconds_until_next_transition(max_wait=options['max_wait']))
+
+        self.stdout.write('News scheduler stopped.')
+
+    def sleep(self, seconds):
+        # Sleep in short steps so a stop signal is handled promptly
+        deadline = time.monotonic() + seconds
+        while self.running and time.monotonic() < deadline:
+            time.sleep(min(1.0, max(0.0, deadline - time.monotonic())))
+
+    def stop(self, signum, frame):
+        self.running = False
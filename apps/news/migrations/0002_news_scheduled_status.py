@@ -0,0 +1,18 @@
+# Generated by Django 5.0.6 on 2026-10-19 14:37
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('news', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='news',
+            name='status',
+            field=models.CharField(choices=[('draft', 'مسودة'), ('scheduled', 'مجدول'), ('published', 'منشور'), ('archived', 'مؤرشف')], default='draft', max_length=20, verbose_name='حالة الخبر'),
+        ),
+    ]
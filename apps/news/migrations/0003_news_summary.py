@@ -0,0 +1,31 @@
+# Generated by Django 5.0.6 on 2026-10-19 15:02
+
+from django.db import migrations, models
+from django.utils.html import strip_tags
+
+from apps.core.utils import truncate_text
+
+
+def fill_summaries(apps, schema_editor):
+    News = apps.get_model('news', 'News')
+    rows = []
+    for news in News.objects.only('id', 'content', 'meta_description').iterator():
+        news.summary = truncate_text(strip_tags(news.meta_description or news.content), 280)
+        rows.append(news)
+    News.objects.bulk_update(rows, ['summary'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('news', '0002_news_scheduled_status'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='news',
+            name='summary',
+            field=models.CharField(blank=True, editable=False, max_length=300, verbose_name='ملخص الخبر'),
+        ),
+        migrations.RunPython(fill_summaries, migrations.RunPython.noop),
+    ]
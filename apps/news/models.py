@@ -1,12 +1,16 @@
 from django.db import models
 from django.contrib.auth.models import User
 from django.utils import timezone
+from django.utils.html import strip_tags
+
+from apps.core.utils import truncate_text
 
 
 class News(models.Model):
     """Model for managing news ticker content"""
     STATUS_CHOICES = [
         ('draft', 'مسودة'),
+        ('scheduled', 'مجدول'),
         ('published', 'منشور'),
         ('archived', 'مؤرشف'),
     ]
@@ -20,6 +24,7 @@ class News(models.Model):
     
     title = models.CharField(max_length=200, verbose_name="عنوان الخبر")
     content = models.TextField(verbose_name="محتوى الخبر")
+    summary = models.CharField(max_length=300, blank=True, editable=False, verbose_name="ملخص الخبر")
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='draft', verbose_name="حالة الخبر")
     priority = models.CharField(max_length=20, choices=PRIORITY_CHOICES, default='normal', verbose_name="أولوية الخبر")
     
@@ -54,11 +59,37 @@ class News(models.Model):
     def __str__(self):
         return f"{self.title} ({self.get_status_display()})"
     
+    def save(self, *args, **kwargs):
+        """
+        Keep status in step with publish_date so reads only need the status
+
+        Published news with a future publish_date is stored as scheduled; the
+        news scheduler publishes it when the date is reached.
+        """
+        self.summary = self.build_summary()
+        now = timezone.now()
+        if self.status == 'published' and self.publish_date > now:
+            self.status = 'scheduled'
+        elif self.status == 'scheduled' and self.publish_date <= now:
+            self.status = 'published'
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None:
+            if 'publish_date' in update_fields:
+                update_fields = set(update_fields) | {'status'}
+            if {'content', 'meta_description'} & set(update_fields):
+                update_fields = set(update_fields) | {'summary'}
+            kwargs['update_fields'] = update_fields
+        super().save(*args, **kwargs)
+    
+    def build_summary(self):
+        """Plain-text summary for listings, from the meta description or the content"""
+        return truncate_text(strip_tags(self.meta_description or self.content), 280)
+    
     def is_published(self):
         """Check if news is currently published and not expired"""
         now = timezone.now()
         return (
-            self.status == 'published' and
+            self.status in ('published', 'scheduled') and
             self.publish_date <= now and
             (self.expire_date is None or self.expire_date > now)
         )
@@ -74,17 +105,28 @@ class News(models.Model):
         return priority_classes.get(self.priority, 'priority-normal')
     
     def increment_views(self):
-        """Increment views count"""
-        self.views_count += 1
-        self.save(update_fields=['views_count'])
+        """
+        Increment views count atomically
+
+        Page views are counted by apps.news.view_counter.record_view, which
+        buffers them and writes them back in batches.
+        """
+        News.objects.filter(pk=self.pk).update(views_count=models.F('views_count') + 1)
     
     @classmethod
     def get_active_news(cls):
-        """Get all currently active news"""
+        """
+        Get all currently active news
+
+        The news scheduler (run_news_scheduler) moves news in and out of the
+        published status at publish_date and expire_date. The date guards keep
+        the result right between its runs: scheduled news that is due already
+        shows, expired news no longer does.
+        """
         now = timezone.now()
         return cls.objects.filter(
-            status='published',
-            publish_date__lte=now
+            status__in=('published', 'scheduled'),
+            publish_date__lte=now,
         ).filter(
             models.Q(expire_date__isnull=True) | models.Q(expire_date__gt=now)
         )
@@ -0,0 +1,52 @@
+"""
+Scheduled news publishing and expiry
+
+News status is moved at its publish_date and expire_date so that read paths
+only filter on status:
+
+    scheduled -> published   when publish_date is reached
+    published -> archived    when expire_date is reached
+
+After every transition the ticker/homepage payloads are rebuilt and the
+anonymous page cache is purged, so both can use long TTLs.
+"""
+
+import logging
+
+from django.db import transaction
+from django.utils import timezone
+
+from apps.core.page_cache import purge_page_cache
+from .models import News
+from .ticker import next_boundary, refresh_news_payloads
+
+logger = logging.getLogger(__name__)
+
+
+def apply_transitions(now=None):
+    """
+    Move news whose publish or expire time has passed to its new status
+
+    Returns the number of (published, expired) news.
+    """
+    now = now or timezone.now()
+    with transaction.atomic():
+        # Published news saved with a future date before scheduling existed
+        News.objects.filter(status='published', publish_date__gt=now).update(status='scheduled')
+        published = News.objects.filter(status='scheduled', publish_date__lte=now).update(status='published')
+        expired = News.objects.filter(status='published', expire_date__lte=now).update(status='archived')
+
+    if published or expired:
+        logger.info(f"News scheduler: {published} published, {expired} expired")
+        refresh_news_payloads()
+        purge_page_cache()
+    return published, expired
+
+
+def seconds_until_next_transition(now=None, max_wait=60):
+    """Seconds to sleep until the next publish/expire instant, capped at max_wait"""
+    now = now or timezone.now()
+    boundary = next_boundary(now)
+    if boundary is None:
+        return max_wait
+    return max(0.0, min(max_wait, (boundary - now).total_seconds()))
@@ -0,0 +1,18 @@
+"""
+Signals for the news app
+"""
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import News
+from .ticker import refresh_news_payloads
+
+
+@receiver([post_save, post_delete], sender=News)
+def rebuild_ticker(sender, instance, **kwargs):
+    """Recompute the ticker and homepage payloads once the change is committed"""
+    if kwargs.get('update_fields') == frozenset({'views_count'}):
+        return
+    transaction.on_commit(refresh_news_payloads)
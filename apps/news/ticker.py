@@ -0,0 +1,139 @@
+"""
+Precomputed news ticker and homepage payloads
+
+The active ticker items are computed once, serialised with an ETag and cached
+until the next scheduling boundary (the earliest upcoming publish_date or
+expire_date of a ticker item). Signals rebuild the payloads whenever news is
+saved or deleted and the news scheduler rebuilds them at every status
+transition, so pages and the ticker API only read one cache key each.
+"""
+
+import hashlib
+import json
+
+from django.core.cache import cache
+from django.db import models
+from django.utils import timezone
+
+from .listing import bump_list_version
+from .models import News
+
+TICKER_CACHE_KEY = 'news_ticker_payload'
+HOMEPAGE_CACHE_KEY = 'news_homepage_items'
+TICKER_SIZE = 5
+HOMEPAGE_SIZE = 5
+# Payloads without an upcoming boundary are still rebuilt once a day
+TICKER_MAX_AGE = 60 * 60 * 24
+
+PRIORITY_RANK = models.Case(
+    models.When(priority='urgent', then=models.Value(4)),
+    models.When(priority='high', then=models.Value(3)),
+    models.When(priority='normal', then=models.Value(2)),
+    models.When(priority='low', then=models.Value(1)),
+    default=models.Value(0),
+    output_field=models.IntegerField(),
+)
+
+
+def by_priority(queryset):
+    """Order news most urgent first (priority is ranked, not sorted as text)"""
+    return queryset.annotate(priority_rank=PRIORITY_RANK).order_by(
+        '-priority_rank', '-publish_date', '-created_at'
+    )
+
+
+def get_ordered_ticker_news():
+    return by_priority(News.get_ticker_news())
+
+
+def next_boundary(now):
+    """Earliest future publish_date or expire_date that changes the published news"""
+    next_publish = News.objects.filter(
+        status='scheduled', publish_date__gt=now,
+    ).aggregate(t=models.Min('publish_date'))['t']
+    next_expire = News.objects.filter(
+        status__in=('published', 'scheduled'), expire_date__gt=now,
+    ).aggregate(t=models.Min('expire_date'))['t']
+    boundaries = [t for t in (next_publish, next_expire) if t is not None]
+    return min(boundaries) if boundaries else None
+
+
+def serialize_news(news):
+    return {
+        'id': news.id,
+        'title': news.title,
+        'summary': news.summary,
+        'priority': news.priority,
+        'priority_class': news.get_priority_class(),
+        'ticker_speed': news.ticker_speed,
+        'publish_date': news.publish_date.isoformat(),
+        'created_at': news.created_at.isoformat(),
+    }
+
+
+def build_ticker_payload():
+    """Compute the ticker items, their ETag and how long they stay valid"""
+    now = timezone.now()
+    items = [serialize_news(news) for news in get_ordered_ticker_news()[:TICKER_SIZE]]
+    valid_until = next_boundary(now)
+    body = json.dumps({'news': items}, ensure_ascii=False)
+    return {
+        'items': items,
+        'body': body,
+        'etag': hashlib.sha1(body.encode()).hexdigest(),
+        'generated_at': now.isoformat(),
+        'valid_until': valid_until.timestamp() if valid_until else None,
+    }
+
+
+def _timeout_until(valid_until):
+    timeout = TICKER_MAX_AGE
+    if valid_until is not None:
+        timeout = max(1, min(timeout, int(valid_until - timezone.now().timestamp()) + 1))
+    return timeout
+
+
+def refresh_ticker():
+    """Rebuild the payload and cache it until the next scheduling boundary"""
+    payload = build_ticker_payload()
+    cache.set(TICKER_CACHE_KEY, payload, _timeout_until(payload['valid_until']))
+    return payload
+
+
+def get_ticker_payload():
+    """Get the cached ticker payload, rebuilding it once a boundary has passed"""
+    payload = cache.get(TICKER_CACHE_KEY)
+    if payload is None or (
+        payload['valid_until'] is not None and payload['valid_until'] <= timezone.now().timestamp()
+    ):
+        payload = refresh_ticker()
+    return payload
+
+
+def refresh_homepage_news():
+    """Rebuild the homepage news list and cache it until the next scheduling boundary"""
+    now = timezone.now()
+    valid_until = next_boundary(now)
+    payload = {
+        'items': [serialize_news(news) for news in by_priority(News.get_homepage_news())[:HOMEPAGE_SIZE]],
+        'valid_until': valid_until.timestamp() if valid_until else None,
+    }
+    cache.set(HOMEPAGE_CACHE_KEY, payload, _timeout_until(payload['valid_until']))
+    return payload
+
+
+def get_homepage_news_items():
+    """Get the cached homepage news items, rebuilding them once a boundary has passed"""
+    payload = cache.get(HOMEPAGE_CACHE_KEY)
+    if payload is None or (
+        payload['valid_until'] is not None and payload['valid_until'] <= timezone.now().timestamp()
+    ):
+        payload = refresh_homepage_news()
+    return payload['items']
+
+
+def refresh_news_payloads():
+    """Rebuild every precomputed news payload and retire cached listing pages"""
+    refresh_ticker()
+    refresh_homepage_news()
+    bump_list_version()
@@ -0,0 +1,184 @@
+"""
+Buffered news view counting
+
+Page views are de-duplicated per visitor within NEWS_VIEW_DEDUP_WINDOW and
+accumulated in a buffer instead of updating the news row on every view. The
+buffer lives in a Redis hash shared by all workers when the default cache is
+django_redis, and in process memory otherwise. Buffered counts are written
+back in batches with F() updates at most every NEWS_VIEW_FLUSH_INTERVAL
+seconds, and by the flush_news_views management command on shutdown.
+"""
+
+import atexit
+import hashlib
+import logging
+import threading
+import time
+import uuid
+from collections import Counter, defaultdict
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F
+
+from apps.core.metrics import uses_django_redis
+from apps.core.utils import get_trusted_client_ip, get_user_agent
+from .models import News
+
+logger = logging.getLogger(__name__)
+
+BUFFER_KEY = 'naebak:news_views'
+SEEN_KEY = 'news_view_seen:{}:{}'
+FLUSH_LOCK_KEY = 'news_views_flush_lock'
+
+
+class LocalViewBuffer:
+    """In-process view buffer, used when Redis is not configured"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.counts = Counter()
+
+    def add(self, news_id):
+        with self.lock:
+            self.counts[news_id] += 1
+
+    def drain(self):
+        with self.lock:
+            counts, self.counts = self.counts, Counter()
+        return counts
+
+    def restore(self, counts):
+        with self.lock:
+            self.counts.update(counts)
+
+
+class RedisViewBuffer:
+    """View buffer shared by all workers through a Redis hash"""
+
+    def __init__(self, alias='default'):
+        self.alias = alias
+
+    @property
+    def client(self):
+        from django_redis import get_redis_connection
+        return get_redis_connection(self.alias)
+
+    def add(self, news_id):
+        self.client.hincrby(BUFFER_KEY, news_id, 1)
+
+    def drain(self):
+        # Renaming is atomic, so increments arriving during the flush land in a fresh hash
+        draining = f'{BUFFER_KEY}:flushing:{uuid.uuid4().hex}'
+        try:
+            self.client.rename(BUFFER_KEY, draining)
+        except Exception:
+            # Nothing buffered yet
+            return Counter()
+        counts = Counter({int(k): int(v) for k, v in self.client.hgetall(draining).items()})
+        self.client.delete(draining)
+        return counts
+
+    def restore(self, counts):
+        pipe = self.client.pipeline(transaction=False)
+        for news_id, n in counts.items():
+            pipe.hincrby(BUFFER_KEY, news_id, n)
+        pipe.execute()
+
+
+_buffer = None
+_buffer_lock = threading.Lock()
+_last_flush = time.monotonic()
+
+
+def get_view_buffer():
+    """
+    Get the configured view buffer
+
+    settings.NEWS_VIEW_BACKEND may be 'redis' or 'local'; by default Redis is
+    used whenever the default cache is backed by django_redis.
+    """
+    global _buffer
+    if _buffer is None:
+        with _buffer_lock:
+            if _buffer is None:
+                backend = getattr(settings, 'NEWS_VIEW_BACKEND', None)
+                if backend is None:
+                    backend = 'redis' if uses_django_redis('default') else 'local'
+                if backend == 'redis':
+                    _buffer = RedisViewBuffer()
+                else:
+                    _buffer = LocalViewBuffer()
+                    # In-process counts would be lost when the worker exits
+                    atexit.register(_flush_at_exit)
+    return _buffer
+
+
+def visitor_id(request):
+    """Identify the visitor by session, falling back to IP and user agent"""
+    if request.user.is_authenticated:
+        return f'u{request.user.pk}'
+    session_key = getattr(request, 'session', None) and request.session.session_key
+    if session_key:
+        return f's{session_key}'
+    raw = f'{get_trusted_client_ip(request)}|{get_user_agent(request)}'
+    return 'a' + hashlib.md5(raw.encode()).hexdigest()
+
+
+def record_view(request, news_id):
+    """
+    Count a view of a news item, once per visitor within the de-duplication window
+    """
+    window = getattr(settings, 'NEWS_VIEW_DEDUP_WINDOW', 60 * 30)
+    try:
+        if window and not cache.add(SEEN_KEY.format(news_id, visitor_id(request)), 1, window):
+            return False
+        get_view_buffer().add(news_id)
+        maybe_flush()
+    except Exception as e:
+        logger.warning(f"Could not record news view: {e}")
+        return False
+    return True
+
+
+def maybe_flush():
+    """Flush the buffer when the flush interval has passed (one worker at a time)"""
+    global _last_flush
+    interval = getattr(settings, 'NEWS_VIEW_FLUSH_INTERVAL', 60)
+    if time.monotonic() - _last_flush < interval:
+        return
+    _last_flush = time.monotonic()
+    if isinstance(get_view_buffer(), RedisViewBuffer) and not cache.add(FLUSH_LOCK_KEY, 1, interval):
+        return
+    flush_view_counts()
+
+
+def flush_view_counts():
+    """
+    Write buffered view counts to the database
+
+    News items with the same increment are updated together, so a flush costs
+    one UPDATE per distinct increment rather than one per news item.
+    """
+    buffer = get_view_buffer()
+    counts = buffer.drain()
+    by_increment = defaultdict(list)
+    for news_id, n in counts.items():
+        by_increment[n].append(news_id)
+    try:
+        with transaction.atomic():
+            for n, ids in by_increment.items():
+                News.objects.filter(pk__in=ids).update(views_count=F('views_count') + n)
+    except Exception:
+        # Keep the counts for the next flush instead of losing them
+        buffer.restore(counts)
+        raise
+    return counts
+
+
+def _flush_at_exit():
+    try:
+        flush_view_counts()
+    except Exception as e:
+        logger.warning(f"Could not flush news views on exit: {e}")
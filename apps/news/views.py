@@ -3,22 +3,25 @@ Views for news app
 """
 
 from django.shortcuts import render, get_object_or_404
-from django.http import JsonResponse
-from django.core.paginator import Paginator
+from django.http import HttpResponse
+from django.views.decorators.http import condition, require_GET
 
+from apps.core.page_cache import anonymous_cache_page
+from .listing import get_news_page
 from .models import News
+from .ticker import get_ticker_payload
+from .view_counter import record_view
 
+# Clients revalidate the ticker with If-None-Match after this many seconds
+TICKER_CLIENT_MAX_AGE = 30
 
+
+@anonymous_cache_page(group='news')
 def news_list(request):
     """
-    List all published news
+    List all published news with cursor pagination
     """
-    news_items = News.objects.filter(is_published=True).order_by('-created_at')
-    
-    # Pagination
-    paginator = Paginator(news_items, 10)  # Show 10 news per page
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    page_obj = get_news_page(request.GET.get('cursor'))
     
     context = {
         'page_title': 'الأخبار',
@@ -29,9 +32,20 @@ def news_list(request):
 
 def news_detail(request, pk):
     """
-    Display news detail
+    Display news detail and count the view
+    """
+    response = render_news_detail(request, pk)
+    if response.status_code == 200:
+        record_view(request, pk)
+    return response
+
+
+@anonymous_cache_page(group='news')
+def render_news_detail(request, pk):
     """
-    news_item = get_object_or_404(News, pk=pk, is_published=True)
+    Render news detail, cached for anonymous visitors
+    """
+    news_item = get_object_or_404(News.get_active_news().select_related('author'), pk=pk)
     
     context = {
         'page_title': news_item.title,
@@ -40,19 +54,15 @@ def news_detail(request, pk):
     return render(request, 'news/news_detail.html', context)
 
 
+@require_GET
+@condition(etag_func=lambda request: get_ticker_payload()['etag'])
 def api_ticker_news(request):
     """
-    API endpoint for ticker news
+    API endpoint for ticker news, served from the precomputed payload
+
+    Clients sending the last ETag in If-None-Match get a 304.
     """
-    ticker_news = News.get_ticker_news()[:5]
-    
-    news_data = []
-    for news in ticker_news:
-        news_data.append({
-            'id': news.id,
-            'title': news.title,
-            'summary': news.summary,
-            'created_at': news.created_at.isoformat(),
-        })
-    
-    return JsonResponse({'news': news_data})
+    payload = get_ticker_payload()
+    response = HttpResponse(payload['body'], content_type='application/json')
+    response['Cache-Control'] = f'public, max-age={TICKER_CLIENT_MAX_AGE}'
+    return response
@@ -0,0 +1,190 @@
+"""
+Concurrent load test for the vote and rating write paths
+
+    python manage.py load_test_votes --citizens 2000 --workers 32 --actions 5
+
+Every simulated citizen logs in with its own test client and fires a mix of
+vote_candidate, api_vote, rate_candidate and api_rate requests at candidates
+picked from a skewed (Zipf-like) popularity distribution, so a handful of hot
+candidates receive most of the writes. Requests run in-process in a thread
+pool, each thread using its own database connection.
+"""
+
+import itertools
+import random
+import statistics
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import IntegrityError, OperationalError, connection, connections
+from django.db.models import Count
+from django.test import Client
+from django.urls import reverse
+
+from apps.accounts.models import Citizen
+from apps.candidates.models import Candidate
+from apps.voting.models import Rating, Vote
+
+
+WRITE_PREFIXES = ('INSERT', 'UPDATE', 'DELETE')
+
+
+class WriteTimer:
+    """Execute wrapper timing write statements to spot lock waits"""
+
+    def __init__(self, threshold):
+        self.threshold = threshold
+        self.slow_writes = 0
+        self.write_time = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        if not sql.lstrip().upper().startswith(WRITE_PREFIXES):
+            return execute(sql, params, many, context)
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = time.perf_counter() - start
+            self.write_time += elapsed
+            if elapsed >= self.threshold:
+                self.slow_writes += 1
+
+
+class Command(BaseCommand):
+    help = 'Simulate concurrent citizens voting and rating candidates and report throughput and integrity errors'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--citizens', type=int, default=1000, help='Number of simulated citizens')
+        parser.add_argument('--workers', type=int, default=16, help='Concurrent threads')
+        parser.add_argument('--actions', type=int, default=5, help='Write requests per citizen')
+        parser.add_argument('--candidates', type=int, default=200, help='Size of the candidate pool')
+        parser.add_argument('--skew', type=float, default=1.2, help='Zipf exponent of candidate popularity')
+        parser.add_argument('--lock-threshold-ms', type=float, default=100.0,
+                            help='Write statements slower than this are counted as lock waits')
+        parser.add_argument('--seed', type=int, default=2025)
+
+    def handle(self, *args, **options):
+        user_ids = list(Citizen.objects.order_by('id').values_list('user_id', flat=True)[:options['citizens']])
+        candidate_ids = list(Candidate.objects.order_by('id').values_list('id', flat=True)[:options['candidates']])
+        if not user_ids or not candidate_ids:
+            raise CommandError('No citizens or candidates found; run generate_election_data first.')
+
+        rng = random.Random(options['seed'])
+        rng.shuffle(candidate_ids)
+        cum_weights = list(itertools.accumulate(1.0 / (rank + 1) ** options['skew'] for rank in range(len(candidate_ids))))
+        self.plans = [
+            [
+                (rng.choice(['vote_candidate', 'api_vote', 'rate_candidate', 'api_rate']),
+                 rng.choices(candidate_ids, cum_weights=cum_weights)[0],
+                 rng.choice(['approve', 'disapprove']),
+                 rng.randint(1, 5))
+                for _ in range(options['actions'])
+            ]
+            for _ in user_ids
+        ]
+
+        self.lock = threading.Lock()
+        self.timings = []
+        self.outcomes = Counter()
+        self.slow_writes = 0
+        self.write_time = 0.0
+        self.threshold = options['lock_threshold_ms'] / 1000
+
+        votes_before, ratings_before = Vote.objects.count(), Rating.objects.count()
+        # Close the main thread connection so the workers do not share it
+        connection.close()
+
+        self.stdout.write(
+            f'Running {len(user_ids) * options["actions"]:,} writes from {len(user_ids):,} citizens '
+            f'on {options["workers"]} threads against {len(candidate_ids)} candidates...'
+        )
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=options['workers']) as executor:
+            list(executor.map(self.run_citizen, user_ids, self.plans))
+        elapsed = time.perf_counter() - started
+
+        self.report(elapsed, votes_before, ratings_before)
+
+    def run_citizen(self, user_id, plan):
+        """Log one citizen in and run its planned writes"""
+        client = Client(raise_request_exception=True)
+        timer = WriteTimer(self.threshold)
+        try:
+            try:
+                client.force_login(User.objects.get(pk=user_id))
+            except (OperationalError, User.DoesNotExist):
+                with self.lock:
+                    self.outcomes[('login', 'error')] += 1
+                return
+            with connection.execute_wrapper(timer):
+                for action, candidate_id, vote_type, stars in plan:
+                    self.request(client, action, candidate_id, vote_type, stars)
+        finally:
+            with self.lock:
+                self.slow_writes += timer.slow_writes
+                self.write_time += timer.write_time
+            connections.close_all()
+
+    def request(self, client, action, candidate_id, vote_type, stars):
+        if action == 'vote_candidate':
+            url, data = reverse('candidates:vote_candidate', args=[candidate_id]), {'vote_type': vote_type}
+        elif action == 'rate_candidate':
+            url, data = reverse('candidates:rate_candidate', args=[candidate_id]), {'stars': stars}
+        elif action == 'api_vote':
+            url, data = reverse('voting:api_vote'), {'candidate_id': candidate_id, 'vote_type': vote_type}
+        else:
+            url, data = reverse('voting:api_rate'), {'candidate_id': candidate_id, 'stars': stars}
+
+        start = time.perf_counter()
+        try:
+            response = client.post(url, data)
+            outcome = 'ok' if response.status_code < 400 else f'http_{response.status_code}'
+        except IntegrityError:
+            outcome = 'integrity_error'
+        except OperationalError as e:
+            outcome = 'lock_error' if 'lock' in str(e).lower() else 'operational_error'
+        except Exception:
+            outcome = 'other_error'
+        elapsed = time.perf_counter() - start
+
+        with self.lock:
+            self.timings.append(elapsed * 1000)
+            self.outcomes[(action, outcome)] += 1
+
+    def report(self, elapsed, votes_before, ratings_before):
+        timings = sorted(self.timings)
+        total = len(timings)
+
+        def pct(fraction):
+            return timings[min(total - 1, int(fraction * (total - 1)))]
+
+        self.stdout.write('')
+        self.stdout.write(f'Requests:      {total:,} in {elapsed:.1f}s ({total / elapsed:,.0f} req/s)')
+        self.stdout.write(
+            f'Latency (ms):  p50 {pct(0.5):.1f}  p90 {pct(0.9):.1f}  p99 {pct(0.99):.1f}  '
+            f'max {timings[-1]:.1f}  mean {statistics.mean(timings):.1f}'
+        )
+        self.stdout.write(
+            f'Lock waits:    {self.slow_writes:,} write statements over the threshold, '
+            f'{self.write_time:.1f}s total write time'
+        )
+
+        self.stdout.write('Outcomes:')
+        for (action, outcome), count in sorted(self.outcomes.items()):
+            style = self.style.SUCCESS if outcome == 'ok' else self.style.ERROR
+            self.stdout.write(style(f'  {action:<16} {outcome:<18} {count:,}'))
+
+        duplicate_votes = Vote.objects.values('candidate', 'citizen').annotate(n=Count('id')).filter(n__gt=1).count()
+        duplicate_ratings = Rating.objects.values('candidate', 'citizen').annotate(n=Count('id')).filter(n__gt=1).count()
+        self.stdout.write(
+            f'Rows:          votes {Vote.objects.count() - votes_before:+,}, '
+            f'ratings {Rating.objects.count() - ratings_before:+,}'
+        )
+        self.stdout.write(
+            f'Integrity:     {sum(n for (_, o), n in self.outcomes.items() if o == "integrity_error"):,} unique_together '
+            f'violations raised, {duplicate_votes} duplicate votes and {duplicate_ratings} duplicate ratings stored'
+        )
@@ -16,6 +16,10 @@ class Rating(models.Model):
         verbose_name = "تقييم"
         verbose_name_plural = "التقييمات"
         ordering = ['-timestamp']
+        indexes = [
+            # Keyset pagination seeks on (timestamp, id)
+            models.Index(fields=['timestamp', 'id']),
+        ]
         unique_together = ['candidate', 'citizen']  # One rating per citizen per candidate
 
     def __str__(self):
@@ -53,6 +57,10 @@ class Vote(models.Model):
         verbose_name = "تصويت"
         verbose_name_plural = "التصويتات"
         ordering = ['-timestamp']
+        indexes = [
+            # Keyset pagination seeks on (timestamp, id)
+            models.Index(fields=['timestamp', 'id']),
+        ]
         unique_together = ['candidate', 'citizen']  # One vote per citizen per candidate
 
     def __str__(self):
@@ -15,5 +15,7 @@ urlpatterns = [
     # API endpoints for AJAX voting/rating
     path('api/vote/', views.api_vote, name='api_vote'),
     path('api/rate/', views.api_rate, name='api_rate'),
+    path('api/ratings/', views.api_rating_list, name='api_rating_list'),
+    path('api/votes/', views.api_vote_list, name='api_vote_list'),
 ]
 
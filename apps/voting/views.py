@@ -5,27 +5,43 @@ Views for voting app
 from django.shortcuts import render, get_object_or_404
 from django.contrib.auth.decorators import login_required
 from django.http import JsonResponse
-from django.core.paginator import Paginator
-from django.views.decorators.http import require_POST
+from django.views.decorators.http import require_GET, require_POST
 
 from .models import Rating, Vote
 from apps.candidates.models import Candidate
+from apps.core.pagination import KeysetPaginator, approximate_count
+
+
+RATINGS_PER_PAGE = 20
+VOTES_PER_PAGE = 20
+
+
+def get_ratings_page(cursor=None):
+    """
+    Get one page of ratings, newest first, by seeking on (timestamp, id)
+    """
+    ratings = Rating.objects.select_related('candidate')
+    return KeysetPaginator(ratings, ordering=('-timestamp', '-id'), per_page=RATINGS_PER_PAGE).get_page(cursor)
+
+
+def get_votes_page(cursor=None):
+    """
+    Get one page of votes, newest first, by seeking on (timestamp, id)
+    """
+    votes = Vote.objects.select_related('candidate')
+    return KeysetPaginator(votes, ordering=('-timestamp', '-id'), per_page=VOTES_PER_PAGE).get_page(cursor)
 
 
 def rating_list(request):
     """
     List all ratings
     """
-    ratings = Rating.objects.all().order_by('-timestamp')
-    
-    # Pagination
-    paginator = Paginator(ratings, 20)  # Show 20 ratings per page
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    page_obj = get_ratings_page(request.GET.get('cursor'))
     
     context = {
         'page_title': 'التقييمات',
         'page_obj': page_obj,
+        'total_ratings': approximate_count(Rating.objects.all()),
     }
     return render(request, 'voting/rating_list.html', context)
 
@@ -34,20 +50,63 @@ def vote_list(request):
     """
     List all votes
     """
-    votes = Vote.objects.all().order_by('-timestamp')
-    
-    # Pagination
-    paginator = Paginator(votes, 20)  # Show 20 votes per page
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    page_obj = get_votes_page(request.GET.get('cursor'))
     
     context = {
         'page_title': 'التصويتات',
         'page_obj': page_obj,
+        'total_votes': approximate_count(Vote.objects.all()),
     }
     return render(request, 'voting/vote_list.html', context)
 
 
+@require_GET
+def api_rating_list(request):
+    """
+    API endpoint listing ratings page by page (cursor pagination)
+
+    Public, so ratings are listed without who gave them.
+    """
+    page_obj = get_ratings_page(request.GET.get('cursor'))
+    return JsonResponse({
+        'ratings': [
+            {
+                'id': rating.id,
+                'candidate_id': rating.candidate_id,
+                'candidate_name': rating.candidate.name,
+                'stars': rating.stars,
+                'comment': rating.comment,
+                'timestamp': rating.timestamp.isoformat(),
+            }
+            for rating in page_obj
+        ],
+        'next_cursor': page_obj.next_cursor,
+        'previous_cursor': page_obj.previous_cursor,
+    })
+
+
+@require_GET
+def api_vote_list(request):
+    """
+    API endpoint listing votes page by page (cursor pagination)
+    """
+    page_obj = get_votes_page(request.GET.get('cursor'))
+    return JsonResponse({
+        'votes': [
+            {
+                'id': vote.id,
+                'candidate_id': vote.candidate_id,
+                'candidate_name': vote.candidate.name,
+                'vote_type': vote.vote_type,
+                'timestamp': vote.timestamp.isoformat(),
+            }
+            for vote in page_obj
+        ],
+        'next_cursor': page_obj.next_cursor,
+        'previous_cursor': page_obj.previous_cursor,
+    })
+
+
 @login_required
 @require_POST
 def api_vote(request):
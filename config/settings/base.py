@@ -4,6 +4,7 @@
 هذا الملف يحتوي على الإعدادات المشتركة بين بيئات التطوير والإنتاج
 """
 
+import importlib.util
 import os
 from pathlib import Path
 from decouple import config
@@ -51,6 +52,8 @@ MIDDLEWARE = [
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',
+    'apps.core.middleware.RequestMetricsMiddleware',
+    'apps.core.middleware.QueryBudgetMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -84,6 +87,24 @@ TEMPLATES = [
 WSGI_APPLICATION = 'config.wsgi.application'
 ASGI_APPLICATION = 'config.asgi.application'
 
+# Password hashing (apps.accounts.hashers)
+# Argon2 when argon2-cffi is installed; older hashes are upgraded on login
+PASSWORD_HASHERS = [
+    'django.contrib.auth.hashers.PBKDF2PasswordHasher',
+    'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+    'django.contrib.auth.hashers.Argon2PasswordHasher',
+    'django.contrib.auth.hashers.BCryptSHA256PasswordHasher',
+    'django.contrib.auth.hashers.ScryptPasswordHasher',
+]
+if importlib.util.find_spec('argon2') is not None:
+    PASSWORD_HASHERS.insert(0, 'apps.accounts.hashers.TunedArgon2PasswordHasher')
+PASSWORD_ARGON2_TIME_COST = config('PASSWORD_ARGON2_TIME_COST', default=2, cast=int)
+PASSWORD_ARGON2_MEMORY_COST = config('PASSWORD_ARGON2_MEMORY_COST', default=19456, cast=int)  # KiB
+PASSWORD_ARGON2_PARALLELISM = config('PASSWORD_ARGON2_PARALLELISM', default=1, cast=int)
+# Password verifications running at once per process, and how long a login waits for a slot
+PASSWORD_HASH_CONCURRENCY = config('PASSWORD_HASH_CONCURRENCY', default=2, cast=int)
+PASSWORD_HASH_WAIT_TIMEOUT = config('PASSWORD_HASH_WAIT_TIMEOUT', default=5.0, cast=float)
+
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -154,19 +175,129 @@ CHANNEL_LAYERS = {
 }
 
 # Cache settings
+# A per-process LRU tier sits in front of Redis; writes are broadcast over
+# pub/sub so every worker drops its local copy
 CACHES = {
     'default': {
-        'BACKEND': 'django_redis.cache.RedisCache',
+        'BACKEND': 'apps.core.cache_backends.TwoTierRedisCache',
         'LOCATION': config('REDIS_URL', default='redis://localhost:6379/1'),
         'OPTIONS': {
             'CLIENT_CLASS': 'django_redis.client.DefaultClient',
+            'LOCAL_MAX_ENTRIES': 1000,
+            'LOCAL_TIMEOUT': 5,
+            'INVALIDATION_CHANNEL': 'naebak:cache:invalidate',
         }
-    }
+    },
+    # Sessions only (apps.core.session_backends). Point SESSION_REDIS_URL at a
+    # Redis with maxmemory-policy noeviction: the policy is per instance, so
+    # another DB of the cache's Redis would still be evicted with it.
+    'sessions': {
+        'BACKEND': 'django_redis.cache.RedisCache',
+        'LOCATION': config('SESSION_REDIS_URL', default='redis://localhost:6379/2'),
+        'OPTIONS': {
+            'CLIENT_CLASS': 'django_redis.client.DefaultClient',
+            'SERIALIZER': 'django_redis.serializers.json.JSONSerializer',
+            # Errors count as misses, so sessions are read from the database
+            'IGNORE_EXCEPTIONS': True,
+        },
+    },
 }
 
-# Session settings
-SESSION_ENGINE = 'django.contrib.sessions.backends.cache'
-SESSION_CACHE_ALIAS = 'default'
+# Candidate card fragment cache (apps.candidates.cards)
+# Vote/rating bumps within CANDIDATE_CARD_DEBOUNCE seconds are coalesced
+CANDIDATE_CARD_TIMEOUT = 60 * 10
+CANDIDATE_CARD_DEBOUNCE = 0
+
+# Stale-while-revalidate cache helper (apps.core.cache.get_or_refresh)
+# Soft and hard timeouts are spread by +/- CACHE_REFRESH_JITTER
+CACHE_REFRESH_LOCK_TIMEOUT = 30
+# How long a cold miss waits for another worker's computation before doing its own
+CACHE_REFRESH_WAIT_TIMEOUT = 3
+CACHE_REFRESH_JITTER = 0.1
+
+# Anonymous full-page cache (apps.core.page_cache)
+# Purged on candidate and news changes, so the timeout only bounds stale stats
+PAGE_CACHE_ENABLED = True
+PAGE_CACHE_ALIAS = 'default'
+PAGE_CACHE_TIMEOUT = 60
+
+# Buffered news view counting (apps.news.view_counter)
+# Repeat views by the same visitor within the window are not counted
+NEWS_VIEW_DEDUP_WINDOW = 60 * 30
+NEWS_VIEW_FLUSH_INTERVAL = 60
+
+# Message attachment delivery (apps.core.downloads)
+# Behind the bundled nginx.conf set ATTACHMENT_X_ACCEL_PREFIX=/protected-media/
+# so nginx sends the file; signing storages redirect to URLs valid this long
+ATTACHMENT_X_ACCEL_PREFIX = config('ATTACHMENT_X_ACCEL_PREFIX', default='')
+ATTACHMENT_SIGNED_URL_EXPIRY = 300
+
+# Chunked attachment uploads (apps.messaging.uploads)
+# Part files wait in ATTACHMENT_UPLOAD_DIR until the process_uploads worker
+# stores them; uploads idle for ATTACHMENT_UPLOAD_EXPIRY seconds are dropped.
+# The directory must be shared by every web instance and the worker (a
+# docker volume, or the Filestore NFS mount on Cloud Run)
+ATTACHMENT_MAX_SIZE = 10 * 1024 * 1024
+ATTACHMENT_CHUNK_SIZE = 1024 * 1024
+ATTACHMENT_ALLOWED_EXTENSIONS = ['pdf', 'png', 'jpg', 'jpeg', 'gif', 'webp', 'doc', 'docx', 'xls', 'xlsx', 'ppt', 'pptx']
+ATTACHMENT_UPLOAD_DIR = config('ATTACHMENT_UPLOAD_DIR', default=str(BASE_DIR / 'tmp' / 'uploads'))
+ATTACHMENT_UPLOAD_EXPIRY = 60 * 60 * 24
+
+# Responsive image derivatives (apps.core.images)
+# Widths per image field; formats the Pillow build cannot write are skipped
+IMAGE_DERIVATIVE_FIELDS = {
+    'candidates.Candidate': {
+        'profile_picture': [160, 320, 640],
+        'banner_image': [640, 1280, 1920],
+    },
+}
+IMAGE_DERIVATIVE_FORMATS = ['avif', 'webp', 'jpeg']
+
+# Static asset build (apps.core.static_build)
+# build_static minifies, recompresses and converts the assets under these
+# prefixes; fonts are subset to these code points (Latin, Arabic) as WOFF2
+STATIC_BUILD_PATHS = ['naebak/']
+STATIC_BUILD_FONT_UNICODES = 'U+0020-007E,U+00A0-00FF,U+0600-06FF,U+200C-200F,U+2010-2027,U+FB50-FDFF,U+FE70-FEFF'
+
+# Critical CSS and fonts (apps.core.critical_css)
+# build_critical_css renders these pages and stores the rules their first
+# CRITICAL_CSS_FOLD_ELEMENTS elements need; base.html inlines them and defers
+# the stylesheets they cover
+CRITICAL_CSS_PAGES = [
+    'core:home',
+    'core:governorates',
+    'core:governorate_detail',
+    'candidates:candidate_list',
+    'candidates:candidate_detail',
+]
+CRITICAL_CSS_FOLD_ELEMENTS = 150
+CRITICAL_CSS_FILE = BASE_DIR / 'apps' / 'core' / 'data' / 'critical_css.json'
+# (family, weight, static path without extension); the .woff2 from
+# build_static is used when present, the .ttf otherwise. Weights whose files
+# are not in static/ yet are loaded from FONT_FALLBACK_URL without blocking.
+# Tajawal has no 600 cut; font-weight 600 renders with the 700 file.
+SELF_HOSTED_FONTS = [
+    ('Tajawal', 300, 'naebak/fonts/Tajawal-Light'),
+    ('Tajawal', 400, 'naebak/fonts/Tajawal-Regular'),
+    ('Tajawal', 500, 'naebak/fonts/Tajawal-Medium'),
+    ('Tajawal', 700, 'naebak/fonts/Tajawal-Bold'),
+    ('Tajawal', 800, 'naebak/fonts/Tajawal-ExtraBold'),
+]
+FONT_FALLBACK_URL = 'https://fonts.googleapis.com/css2?family={family}:wght@{weights}&display=swap'
+PRELOADED_FONTS = ['naebak/fonts/Tajawal-Regular', 'naebak/fonts/Tajawal-Bold']
+
+# Bulk user import (apps.core.bulk_import)
+# Passwords are hashed in this many processes; uploads from the admin are
+# imported by the process_user_imports worker
+USER_IMPORT_BATCH_SIZE = 500
+USER_IMPORT_HASH_WORKERS = config('USER_IMPORT_HASH_WORKERS', default=os.cpu_count() or 1, cast=int)
+
+# Session settings (apps.core.session_backends)
+# Signed-in sessions: database rows with a copy in the "sessions" cache;
+# anonymous visitors keep their session in a signed cookie
+SESSION_ENGINE = 'apps.core.session_backends'
+SESSION_CACHE_ALIAS = 'sessions'
+SESSION_ANONYMOUS_SIGNED_COOKIE = config('SESSION_ANONYMOUS_SIGNED_COOKIE', default=True, cast=bool)
 
 # Security settings
 SECURE_BROWSER_XSS_FILTER = True
@@ -179,6 +310,35 @@ CORS_ALLOW_CREDENTIALS = True
 
 # Rate limiting settings
 RATELIMIT_ENABLE = True
+# key='ip' limits use the client address appended by our proxy (TRUSTED_PROXY_HOPS);
+# REMOTE_ADDR is the proxy itself, which would put every visitor in one bucket
+RATELIMIT_IP_META_KEY = 'apps.core.utils.get_trusted_client_ip'
+# Quick login attempts (apps.accounts.views.quick_login), counted in the default cache
+QUICK_LOGIN_RATE_PER_IP = config('QUICK_LOGIN_RATE_PER_IP', default='20/m')
+QUICK_LOGIN_RATE_PER_PHONE = config('QUICK_LOGIN_RATE_PER_PHONE', default='5/10m')
+
+# Query budget settings (apps.core.middleware.QueryBudgetMiddleware)
+# Budgets are keyed by URL name; X-Query-* headers are exposed when DEBUG is on
+QUERY_BUDGET_ENABLED = True
+QUERY_BUDGET_DEFAULT = 50
+QUERY_BUDGET_DUPLICATE_THRESHOLD = 5
+QUERY_BUDGETS = {
+    'core:home': 10,
+    'core:governorates': 15,
+    'core:governorate_detail': 15,
+    'candidates:candidate_list': 15,
+    'candidates:candidate_detail': 20,
+    'candidates:candidate_dashboard': 20,
+}
+
+# Request metrics settings (apps.core.metrics)
+# Stored in Redis when the default cache is django_redis, in process memory otherwise
+METRICS_ENABLED = True
+METRICS_TOKEN = config('METRICS_TOKEN', default='')
+METRICS_ALLOWED_IPS = ['127.0.0.1']
+# Proxies in front of the app that append to X-Forwarded-For (nginx or the
+# Cloud Run front end); apps.core.utils.get_trusted_client_ip reads that entry
+TRUSTED_PROXY_HOPS = config('TRUSTED_PROXY_HOPS', default=1, cast=int)
 
 # Logging configuration
 LOGGING = {
@@ -48,8 +48,14 @@ STATICFILES_STORAGE = 'django.contrib.staticfiles.storage.StaticFilesStorage'
 CACHES = {
     'default': {
         'BACKEND': 'django.core.cache.backends.dummy.DummyCache',
-    }
+    },
+    # Local memory page cache so cached pages can be checked without Redis
+    'pages': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'naebak-pages',
+    },
 }
+PAGE_CACHE_ALIAS = 'pages'
 
 # Session settings for development
 SESSION_ENGINE = 'django.contrib.sessions.backends.db'
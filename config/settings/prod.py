@@ -5,6 +5,7 @@
 from .base import *  # noqa
 from decouple import config
 import os
+from pathlib import Path
 
 DEBUG = config("DEBUG", default=False, cast=bool)
 SECRET_KEY = "ffd;gjsfd556546$$^$^VBNgfngFY^^U^##@#$2FFHsfh"
@@ -31,7 +32,8 @@ STATIC_URL = "/static/"
 MEDIA_URL = "/media/"
 # BASE_DIR جاي من base.py
 STATIC_ROOT = BASE_DIR / "staticfiles"
-MEDIA_ROOT = BASE_DIR / "media"
+# على Cloud Run يشير MEDIA_ROOT إلى مشاركة NFS حتى تقرأ مهام الخلفية ملفات الاستيراد والمرفقات
+MEDIA_ROOT = Path(os.getenv("MEDIA_ROOT", BASE_DIR / "media"))
 
 # تأكد من إضافة WhiteNoise في الميدلوير (لو مش موجود)
 _whitenoise = "whitenoise.middleware.WhiteNoiseMiddleware"
@@ -45,9 +47,10 @@ if _whitenoise not in MIDDLEWARE:
 
 if STATIC_BACKEND == "local":
     # تقديم الستاتيك من داخل الكونتينر
+    # build_static يصغّر الملفات ويبصمها ويولّد نسخ gzip/brotli جاهزة يقدمها WhiteNoise مباشرة
     STORAGES = {
         "staticfiles": {
-            "BACKEND": "django.contrib.staticfiles.storage.ManifestStaticFilesStorage",
+            "BACKEND": "apps.core.static_build.OptimizedStaticFilesStorage",
         },
         "default": {
             "BACKEND": "django.core.files.storage.FileSystemStorage",
@@ -96,21 +99,39 @@ DATABASES = {
 REDIS_HOST = "10.190.151.116"
 REDIS_PORT = os.environ.get("REDIS_PORT", "6379")
 REDIS_URL = f"redis://{REDIS_HOST}:{REDIS_PORT}/0"
+# Redis الجلسات: يفضل خادم مستقل بسياسة noeviction (سياسة الإخلاء لكل خادم وليست لكل قاعدة)
+SESSION_REDIS_URL = os.environ.get("SESSION_REDIS_URL", f"redis://{REDIS_HOST}:{REDIS_PORT}/2")
 
 CACHES = {
     "default": {
-        "BACKEND": "django_redis.cache.RedisCache",
+        # ذاكرة محلية صغيرة لكل عملية أمام Redis مع إبطال عبر pub/sub
+        "BACKEND": "apps.core.cache_backends.TwoTierRedisCache",
         "LOCATION": REDIS_URL,
         "OPTIONS": {
             "CLIENT_CLASS": "django_redis.client.DefaultClient",
             # تصحيح المفتاح (كان KWARTS)
             "CONNECTION_POOL_KWARGS": {"ssl_cert_reqs": None},
+            "LOCAL_MAX_ENTRIES": 1000,
+            "LOCAL_TIMEOUT": 5,
+            "INVALIDATION_CHANNEL": "naebak:cache:invalidate",
         },
-    }
+    },
+    # نسخة الجلسات فقط؛ قاعدة البيانات هي المرجع عند فقدانها
+    "sessions": {
+        "BACKEND": "django_redis.cache.RedisCache",
+        "LOCATION": SESSION_REDIS_URL,
+        "OPTIONS": {
+            "CLIENT_CLASS": "django_redis.client.DefaultClient",
+            "CONNECTION_POOL_KWARGS": {"ssl_cert_reqs": None},
+            "SERIALIZER": "django_redis.serializers.json.JSONSerializer",
+            "IGNORE_EXCEPTIONS": True,
+        },
+    },
 }
 
-SESSION_ENGINE = "django.contrib.sessions.backends.cache"
-SESSION_CACHE_ALIAS = "default"
+# جلسات المسجلين في قاعدة البيانات مع نسخة في Redis، وجلسات الزوار في كوكي موقع
+SESSION_ENGINE = "apps.core.session_backends"
+SESSION_CACHE_ALIAS = "sessions"
 
 CHANNEL_LAYERS = {
     "default": {
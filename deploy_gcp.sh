@@ -10,6 +10,17 @@ PROJECT_ID="stalwart-star-468902-j1"
 SERVICE_NAME="naebak-service"
 REGION="europe-west1"
 IMAGE_NAME="gcr.io/${PROJECT_ID}/${SERVICE_NAME}"
+ENV_VARS="DJANGO_SETTINGS_MODULE=config.settings.prod,ALLOWED_HOSTS=*,DB_NAME=naebak_db,DB_USER=postgres,DB_PASSWORD=YOUR_DB_PASSWORD,DB_HOST=/cloudsql/naebak:europe-west1:naebak-db-instance,DB_PORT=5432,REDIS_HOST=10.231.192.181,REDIS_PORT=6379,ATTACHMENT_UPLOAD_DIR=/mnt/uploads/parts,MEDIA_ROOT=/mnt/uploads/media"
+# أجزاء الرفع المجزأ وملفات media (ومنها ملفات استيراد المستخدمين) على مشاركة NFS (Filestore)
+# مشتركة بين كل نسخ الخدمة ومهام الخلفية، لأن قرص كل نسخة من Cloud Run محلي لها وحدها.
+# تحتاج بيئة gen2 ووصولاً إلى الـ VPC مثل Redis. مع STATIC_BACKEND=gcs تكون media في GCS.
+UPLOADS_NFS_SERVER="YOUR_FILESTORE_IP"
+UPLOADS_NFS_PATH="/uploads"
+VOLUME_FLAGS=(
+    --execution-environment gen2
+    --add-volume "name=uploads,type=nfs,location=${UPLOADS_NFS_SERVER}:${UPLOADS_NFS_PATH}"
+    --add-volume-mount "volume=uploads,mount-path=/mnt/uploads"
+)
 
 # ألوان للإخراج
 RED='\033[0;31m'
@@ -49,8 +60,9 @@ gcloud run deploy ${SERVICE_NAME} \
     --platform managed \
     --region ${REGION} \
     --allow-unauthenticated \
-    --set-env-vars "DJANGO_SETTINGS_MODULE=config.settings.prod,ALLOWED_HOSTS=*,DB_NAME=naebak_db,DB_USER=postgres,DB_PASSWORD=YOUR_DB_PASSWORD,DB_HOST=/cloudsql/naebak:europe-west1:naebak-db-instance,DB_PORT=5432,REDIS_HOST=10.231.192.181,REDIS_PORT=6379" \
+    --set-env-vars "${ENV_VARS}" \
     --set-secrets "SECRET_KEY=django-secret-key:latest" \
+    "${VOLUME_FLAGS[@]}" \
     --memory 512Mi \
     --cpu 1 \
     --timeout 300 \
@@ -76,5 +88,50 @@ else
     exit 1
 fi
 
+# مهام الخلفية: مهمة Cloud Run لكل أمر إدارة يشغلها Cloud Scheduler بشكل دوري
+# الاستخدام: deploy_worker_job اسم_المهمة "جدول cron" الأمر [وسائط...]
+deploy_worker_job() {
+    local job_name=$1 schedule=$2
+    shift 2
+    local args
+    args=$(IFS=,; echo "manage.py,$*")
+    local project_number
+    project_number=$(gcloud projects describe ${PROJECT_ID} --format="value(projectNumber)")
+
+    gcloud run jobs deploy ${job_name} \
+        --image ${IMAGE_NAME} \
+        --region ${REGION} \
+        --set-env-vars "${ENV_VARS}" \
+        --set-secrets "SECRET_KEY=django-secret-key:latest" \
+        "${VOLUME_FLAGS[@]}" \
+        --command python \
+        --args "${args}" \
+        --max-retries 0 \
+        --memory 512Mi
+
+    local scheduler_args=(
+        --location ${REGION}
+        --schedule "${schedule}"
+        --uri "https://${REGION}-run.googleapis.com/apis/run.googleapis.com/v1/namespaces/${PROJECT_ID}/jobs/${job_name}:run"
+        --http-method POST
+        --oauth-service-account-email "${project_number}-compute@developer.gserviceaccount.com"
+    )
+    if gcloud scheduler jobs describe ${job_name} --location ${REGION} > /dev/null 2>&1; then
+        gcloud scheduler jobs update http ${job_name} "${scheduler_args[@]}"
+    else
+        gcloud scheduler jobs create http ${job_name} "${scheduler_args[@]}"
+    fi
+}
+
+echo -e "${YELLOW}⏱️  نشر مهام الخلفية...${NC}"
+# نشر الأخبار المجدولة وإنهاء المنتهية كل دقيقة
+deploy_worker_job naebak-news-scheduler "* * * * *" run_news_scheduler --once
+# تخزين المرفقات المكتملة من مشاركة NFS وحذف الرفع المتوقف كل دقيقة
+deploy_worker_job naebak-process-uploads "* * * * *" process_uploads --once
+# استيراد ملفات المرشحين والمواطنين المرفوعة من لوحة الإدارة
+deploy_worker_job naebak-user-imports "*/2 * * * *" process_user_imports --once
+# توليد أحجام وصيغ الصور المتجاوبة للصور المرفوعة حديثاً
+deploy_worker_job naebak-image-derivatives "* * * * *" process_image_derivatives --once
+
 echo -e "${GREEN}🎉 انتهى النشر!${NC}"
 
@@ -0,0 +1,133 @@
+/**
+ * رفع المرفقات على أجزاء مع الاستئناف
+ * Chunked, resumable attachment upload for forms with [data-chunked-upload]
+ *
+ * <form data-chunked-upload data-start-url="..." data-status-url="(api_upload URL for the nil UUID)">
+ *     <input type="file" data-upload-file>
+ *     <input type="hidden" name="upload_id">
+ *     <div data-upload-progress></div>
+ * </form>
+ *
+ * The file is sent in chunks of the size the server asks for. A chunk that
+ * fails is resumed from the offset the server reports. The form can only be
+ * submitted once the worker has stored the file (status "ready").
+ */
+
+document.addEventListener('DOMContentLoaded', function() {
+    document.querySelectorAll('form[data-chunked-upload]').forEach(initializeChunkedUpload);
+});
+
+const UPLOAD_RETRIES = 5;
+const UPLOAD_POLL_INTERVAL = 1500;
+const UPLOAD_ID_PLACEHOLDER = '00000000-0000-0000-0000-000000000000';
+
+function initializeChunkedUpload(form) {
+    const fileInput = form.querySelector('[data-upload-file]');
+    const idInput = form.querySelector('input[name=upload_id]');
+    const progress = form.querySelector('[data-upload-progress]');
+    const submit = form.querySelector('[type=submit]');
+    const csrfToken = form.querySelector('[name=csrfmiddlewaretoken]').value;
+    let current = null;
+
+    function showProgress(text, isError) {
+        progress.textContent = text;
+        progress.classList.toggle('text-danger', Boolean(isError));
+    }
+
+    function statusUrl(id) {
+        return form.dataset.statusUrl.replace(UPLOAD_ID_PLACEHOLDER, id);
+    }
+
+    async function request(url, options) {
+        const response = await fetch(url, {
+            credentials: 'same-origin',
+            ...options,
+            headers: { 'X-CSRFToken': csrfToken, ...(options && options.headers) }
+        });
+        const data = await response.json();
+        return { ok: response.ok, status: response.status, data: data };
+    }
+
+    async function sendChunks(file, state) {
+        let retries = 0;
+        while (state.offset < state.size) {
+            const chunk = file.slice(state.offset, state.offset + state.chunk_size);
+            let result;
+            try {
+                result = await request(statusUrl(state.id), {
+                    method: 'PATCH',
+                    headers: { 'Upload-Offset': String(state.offset), 'Content-Type': 'application/octet-stream' },
+                    body: chunk
+                });
+            } catch (error) {
+                result = null;
+            }
+            if (result && result.ok) {
+                state = result.data;
+                retries = 0;
+            } else if (result && result.status !== 409 && result.status < 500) {
+                throw new Error(result.data.error || 'تعذر رفع الملف');
+            } else if (++retries > UPLOAD_RETRIES) {
+                throw new Error('انقطع الاتصال أثناء رفع الملف');
+            } else {
+                // Resume from the offset the server actually has
+                state = (await request(statusUrl(state.id))).data;
+            }
+            showProgress(`جاري الرفع... ${Math.floor(100 * state.offset / state.size)}%`);
+        }
+        return state;
+    }
+
+    async function waitUntilStored(state) {
+        while (state.status === 'uploaded') {
+            showProgress('جاري فحص الملف...');
+            await new Promise(resolve => setTimeout(resolve, UPLOAD_POLL_INTERVAL));
+            state = (await request(statusUrl(state.id))).data;
+        }
+        if (state.status !== 'ready') {
+            throw new Error(state.error || 'تم رفض الملف');
+        }
+        return state;
+    }
+
+    async function upload(file) {
+        const token = current = {};
+        idInput.value = '';
+        submit.disabled = true;
+        try {
+            const body = new FormData();
+            body.append('filename', file.name);
+            body.append('size', String(file.size));
+            const started = await request(form.dataset.startUrl, { method: 'POST', body: body });
+            if (!started.ok) {
+                throw new Error(started.data.error || 'تعذر بدء رفع الملف');
+            }
+            let state = await sendChunks(file, started.data);
+            state = await waitUntilStored(state);
+            if (token === current) {
+                idInput.value = state.id;
+                showProgress(`تم إرفاق ${file.name}`);
+            }
+        } catch (error) {
+            if (token === current) {
+                fileInput.value = '';
+                showProgress(error.message, true);
+            }
+        } finally {
+            if (token === current) {
+                submit.disabled = false;
+            }
+        }
+    }
+
+    fileInput.addEventListener('change', function() {
+        if (fileInput.files.length) {
+            upload(fileInput.files[0]);
+        } else {
+            current = null;
+            idInput.value = '';
+            showProgress('');
+            submit.disabled = false;
+        }
+    });
+}